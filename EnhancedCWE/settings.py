@@ -157,6 +157,36 @@ DATABASES = {
 DATABASES['default']['ENGINE'] = 'django_postgrespool'
 
 
+# Caches
+# https://docs.djangoproject.com/en/1.8/topics/cache/
+# The in-memory CWE search indexes publish their changes to the other worker processes through the
+# 'shared' cache, and the responses of the REST API suggestion and lookup functions are cached in their
+# own cache. Both are stored in the database, so that all the worker processes share them. Their tables
+# are created by the migrations, or by "python manage.py createcachetable". A memcached server shared by
+# the worker processes can be used instead.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'enhancedcwe_shared_cache',
+    },
+    'rest_api_responses': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'rest_api_response_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+RESPONSE_CACHE = 'rest_api_responses'
+CWE_SEARCH_INDEX_CACHE = 'shared'
+# The token revocations are published through the 'shared' cache, so the users of the authentication
+# tokens can be cached by every worker process.
+TOKEN_CACHE_TTL = 60
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.8/topics/i18n/
 
@@ -183,12 +213,27 @@ STATICFILES_DIRS = (
 
 # Settings for the REST framework
 REST_FRAMEWORK = {
-    # Use token to authenticate users.
-    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.TokenAuthentication'],
+    # Use token to authenticate users. The users of the tokens are cached for a short time.
+    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_api.authentication.CachedTokenAuthentication'],
     # Only authenticated users can view or change information.
-    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated']
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer',
+                                 'rest_framework.renderers.BrowsableAPIRenderer'],
+    'DEFAULT_PARSER_CLASSES': ['rest_framework.parsers.JSONParser',
+                               'rest_framework.parsers.FormParser',
+                               'rest_framework.parsers.MultiPartParser'],
 }
 
+# The responses can also be rendered, and the requests parsed, as MessagePack when the optional
+# msgpack-python package is installed.
+try:
+    import msgpack
+except ImportError:
+    pass
+else:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('rest_api.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('rest_api.renderers.MessagePackParser')
+
 CRISPY_TEMPLATE_PACK = 'bootstrap3'
 
 
@@ -18,3 +18,22 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
 
+
+class CounterFieldsMixin(object):
+    """
+    This mixin is for the models with denormalized counter fields, which are maintained with F-expression
+    updates by signal receivers. The counters of an object loaded in memory are not refreshed by these
+    updates, so saving an existing object writes all its fields but the counters, which would otherwise be
+    overwritten with stale values.
+    """
+
+    COUNTER_FIELDS = ()  # The names of the counter fields
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        if not self._state.adding and not force_insert and update_fields is None:
+            # Write the loaded fields, as Model.save() does for the objects with deferred fields
+            update_fields = [field.name for field in self._meta.concrete_fields
+                             if not field.primary_key and field.name not in self.COUNTER_FIELDS and
+                             field.attname in self.__dict__]
+        super(CounterFieldsMixin, self).save(force_insert=force_insert, force_update=force_update, using=using,
+                                             update_fields=update_fields)
@@ -0,0 +1,69 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def on_commit(func, using=None):
+    """
+    Run a function once the current transaction is committed, e.g. to publish a change to the other
+    processes or to send a notification about it. Django 1.8 has no such hook, so the pending functions are
+    kept on the database connection, run when the outermost atomic block commits, and dropped when the
+    transaction, or the savepoint they were registered in, is rolled back. Outside of an atomic block the
+    changes are already committed, so the function is run immediately.
+    Note that the functions registered in a django.test.TestCase are never run, as the transaction of the
+    test is rolled back: the tests relying on them should use a TransactionTestCase.
+    :param func: A function without arguments
+    :param using: The alias of the database of the transaction
+    """
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    if not connection.in_atomic_block:
+        func()
+        return
+    _install_commit_hooks(connection)
+    # The function is dropped when any of the savepoints it was registered in is rolled back
+    connection.pending_commit_functions.append((set(connection.savepoint_ids), func))
+
+
+def _install_commit_hooks(connection):
+    """
+    Wrap the methods of a connection which end its transactions, or roll back its savepoints, so that they
+    run or drop the pending functions registered with on_commit()
+    :param connection: The database connection wrapper of the current thread
+    """
+    if hasattr(connection, 'pending_commit_functions'):
+        return
+    connection.pending_commit_functions = []
+    commit, rollback, savepoint_rollback, close = (connection.commit, connection.rollback,
+                                                   connection.savepoint_rollback, connection.close)
+
+    def commit_and_run():
+        commit()
+        functions = [func for savepoint_ids, func in connection.pending_commit_functions]
+        del connection.pending_commit_functions[:]
+        if functions and not connection.in_atomic_block and connection.commit_on_exit:
+            # The outermost atomic block restores the autocommit mode only after the commit. It is restored
+            # first, so that the queries of the functions are committed rather than left in a new transaction.
+            if connection.features.autocommits_when_autocommit_is_off:
+                connection.autocommit = True
+            else:
+                connection.set_autocommit(True)
+        for func in functions:
+            func()
+
+    def rollback_and_drop():
+        del connection.pending_commit_functions[:]
+        rollback()
+
+    def savepoint_rollback_and_drop(sid):
+        connection.pending_commit_functions[:] = [(savepoint_ids, func) for savepoint_ids, func
+                                                  in connection.pending_commit_functions
+                                                  if sid not in savepoint_ids]
+        savepoint_rollback(sid)
+
+    def close_and_drop():
+        # The database rolls back the transaction of a connection closed in it
+        del connection.pending_commit_functions[:]
+        close()
+
+    connection.commit = commit_and_run
+    connection.rollback = rollback_and_drop
+    connection.savepoint_rollback = savepoint_rollback_and_drop
+    connection.close = close_and_drop
@@ -64,6 +64,7 @@ class CWEAdmin(BaseAdmin):
                    'classes': ['box-col-md-12']}),
     ]
     search_fields = ['name', 'code', 'categories__name', 'keywords__name']
+    list_display = ['__str__', 'misuse_case_count', 'published_misuse_case_count']
     list_filter = ['categories', 'keywords', ('created_by', admin.RelatedOnlyFieldListFilter)]
     date_hierarchy = 'created_at'
 
@@ -6,4 +6,6 @@ class CWEConfig(AppConfig):
 
     def ready(self):
         # Importing autocomplete_registry only after models are ready and app is fully loaded
-        import autocomplete_registry
\ No newline at end of file
+        import autocomplete_registry
+        # Registering the system checks of the app
+        import cwe.checks
\ No newline at end of file
@@ -1,4 +1,5 @@
 from .models import *
+from .cwe_lookup import lookup_cwes
 import autocomplete_light
 
 class CWEAutocomplete(autocomplete_light.AutocompleteModelBase):
@@ -8,6 +9,14 @@ class CWEAutocomplete(autocomplete_light.AutocompleteModelBase):
     widget_attrs = {
         'class': 'modern-style',
     }
+
+    def choices_for_request(self):
+        # Search the CWEs whose code starts with the query or whose name contains it through the CWE
+        # lookup service, so that the trigram index of the names is used
+        q = self.request.GET.get('q', '')
+        exclude = self.request.GET.getlist('exclude')
+        choices = lookup_cwes(q, self.choices, match_code_prefix=True).exclude(pk__in=exclude)
+        return self.order_choices(choices)[0:self.limit_choices]
 autocomplete_light.register(CWEAutocomplete)
 
 
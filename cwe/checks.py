@@ -0,0 +1,20 @@
+from django.core import checks
+from cwe.cwe_search import is_shared_cache
+from cwe.settings import CWE_SEARCH_INDEX_CACHE
+
+
+@checks.register()
+def check_search_index_cache(app_configs, **kwargs):
+    """
+    Warn when the generation counters of the in-memory CWE search indexes are published through a cache
+    local to each process, as the processes then never notice the changes made by the others
+    """
+    from django.core.cache import caches
+    if is_shared_cache(caches[CWE_SEARCH_INDEX_CACHE]):
+        return []
+    return [checks.Warning(
+        "The CWE search indexes publish their changes through the '%s' cache, which is local to each process."
+        % CWE_SEARCH_INDEX_CACHE,
+        hint="Set CWE_SEARCH_INDEX_CACHE to a cache shared by all the worker processes, e.g. memcached.",
+        id='cwe.W001',
+    )]
@@ -0,0 +1,212 @@
+from array import array
+import heapq
+import math
+import threading
+from .cwe_search import CWESearchLocator, CWEKeywordSearch, GenerationCounter, load_scored_cwes
+from .settings import CWE_SEARCH_BM25_PRIORITY, CWE_SEARCH_INDEX_CHECK_INTERVAL
+
+
+_keyword_search = CWEKeywordSearch()
+
+
+def analyze_text(text):
+    """
+    Turn a string into the list of its stemmed terms, keeping the duplicates. The CWE texts and the
+    searched texts are analyzed the same way.
+    :param text: A string or None
+    :return: A list of stemmed terms
+    """
+    if not text:
+        return []
+    return _keyword_search.stem_many(_keyword_search.iter_filtered_words(text))
+
+
+class CWEBM25Index(object):
+    """
+    This class keeps an in-memory BM25 index of the CWE names, descriptions and keywords. All the
+    document-frequency and length-normalisation work is done when the index is built: every posting
+    list holds the final BM25 weight of the term in each CWE, so that scoring a text only sums floats.
+    The index is rebuilt lazily on the next use after any process changed the CWEs or the keywords.
+    """
+
+    K1 = 1.2  # Term frequency saturation
+    B = 0.75  # Strength of the document length normalisation
+
+    # Weight of a term occurrence in each field of the CWE
+    FIELD_WEIGHTS = {
+        'name': 2.0,
+        'description': 1.0,
+        'keywords': 3.0,
+    }
+
+    def __init__(self, generation_key='cwe_bm25_index_generation'):
+        self._lock = threading.RLock()
+        self.generation = GenerationCounter(generation_key, CWE_SEARCH_INDEX_CHECK_INTERVAL)
+        self._is_built = False
+        self._built_generation = None
+        self._cwe_ids = array('i')  # Document number -> CWE ID
+        self._cwe_codes = array('i')  # Document number -> CWE code, used to break ties
+        self._terms = {}  # Stemmed term -> (array of document numbers, array of BM25 weights)
+
+    def invalidate(self):
+        """
+        Drop the content of the index so that it is rebuilt from the database on the next use
+        """
+        with self._lock:
+            self._is_built = False
+            self._built_generation = None
+            self._cwe_ids = array('i')
+            self._cwe_codes = array('i')
+            self._terms = {}
+
+    def changed(self):
+        """
+        Publish a change of the CWEs or the keywords so that every process rebuilds its index
+        """
+        with self._lock:
+            self._is_built = False
+            self.generation.increment()
+
+    def _weighted_term_frequencies(self, name, description, keyword_names):
+        frequencies = {}
+        for field, terms in (('name', analyze_text(name)),
+                             ('description', analyze_text(description)),
+                             ('keywords', keyword_names)):
+            weight = self.FIELD_WEIGHTS[field]
+            for term in terms:
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+        return frequencies
+
+    def build(self):
+        """
+        Load the CWEs and their keywords from the database with two queries and compute the BM25 weights
+        """
+        from cwe.models import CWE
+
+        with self._lock:
+            generation = self.generation.get()
+
+            cwe_keyword_names = {}
+            for cwe_id, keyword_name in CWE.keywords.through.objects.values_list('cwe_id', 'keyword__name'):
+                cwe_keyword_names.setdefault(cwe_id, []).append(keyword_name)
+
+            cwe_ids = array('i')
+            cwe_codes = array('i')
+            documents = []  # Document number -> {term: weighted term frequency}
+            lengths = array('d')  # Document number -> weighted length
+            for cwe_id, code, name, description in CWE.objects.order_by('code').values_list('id', 'code', 'name',
+                                                                                              'description'):
+                frequencies = self._weighted_term_frequencies(name, description, cwe_keyword_names.get(cwe_id, []))
+                cwe_ids.append(cwe_id)
+                cwe_codes.append(code)
+                documents.append(frequencies)
+                lengths.append(sum(frequencies.itervalues()))
+
+            document_count = len(documents)
+            average_length = (sum(lengths) / document_count) if document_count else 0.0
+
+            # Collect the posting lists and the document frequency of every term
+            postings = {}
+            for document, frequencies in enumerate(documents):
+                for term, frequency in frequencies.iteritems():
+                    postings.setdefault(term, []).append((document, frequency))
+
+            terms = {}
+            for term, term_postings in postings.iteritems():
+                # The '+ 1' keeps the IDF positive for the terms found in more than half of the CWEs
+                idf = math.log(1.0 + (document_count - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                documents_array = array('i')
+                weights_array = array('d')
+                for document, frequency in term_postings:
+                    norm = self.K1 * (1.0 - self.B + self.B * lengths[document] / average_length)
+                    documents_array.append(document)
+                    weights_array.append(idf * frequency * (self.K1 + 1.0) / (frequency + norm))
+                terms[term] = (documents_array, weights_array)
+
+            self._cwe_ids = cwe_ids
+            self._cwe_codes = cwe_codes
+            self._terms = terms
+            self._built_generation = generation
+            self._is_built = True
+
+    def ensure_fresh(self):
+        """
+        Build the index if it is not built yet or if another process has changed the CWEs since
+        """
+        with self._lock:
+            if not self._is_built or self._built_generation != self.generation.get():
+                self.build()
+
+    def score(self, terms, max_results=None):
+        """
+        Compute the BM25 score of every CWE for the given query terms
+        :param terms: A collection of distinct stemmed terms
+        :param max_results: The maximum number of tuples to return. 'None' returns all the matching CWEs
+        :return: A list of (CWE ID, score) tuples sorted by the score and then by the CWE code
+        """
+        with self._lock:
+            self.ensure_fresh()
+            cwe_ids = self._cwe_ids
+            cwe_codes = self._cwe_codes
+            scores = array('d', [0.0]) * len(cwe_ids)
+            matched = set()
+            for term in terms:
+                posting = self._terms.get(term)
+                if posting is not None:
+                    documents_array, weights_array = posting
+                    for document, weight in zip(documents_array, weights_array):
+                        scores[document] += weight
+                    matched.update(documents_array)
+
+        # Higher score first, and lower CWE code first among the CWEs with the same score
+        sort_key = lambda document: (-scores[document], cwe_codes[document])
+        if max_results is None:
+            ranked = sorted(matched, key=sort_key)
+        else:
+            ranked = heapq.nsmallest(max_results, matched, key=sort_key)
+        return [(cwe_ids[document], scores[document]) for document in ranked]
+
+
+class CWEBM25Search(CWEKeywordSearch):
+    """
+    This CWE search algorithm ranks the CWEs by their BM25 score over the CWE name, description and
+    keywords, instead of the raw count of matching keywords. The second item of the returned tuples
+    is the BM25 score. The ranking is deterministic: ties are broken by the CWE code.
+    """
+
+    def __init__(self, index=None):
+        super(CWEBM25Search, self).__init__()
+        self.index = index if index is not None else cwe_bm25_index
+
+    def search_cwes(self, text, max_results=None):
+        """
+        This is the concrete implementation of the super class' abstract method
+        """
+        return self.search_cwes_many([text], max_results)[0]
+
+    def search_cwes_many(self, texts, max_results=None):
+        """
+        This is the concrete implementation of the super class' abstract method
+        """
+        id_score_lists = []
+        for text in texts:
+            # Validate text for None or empty string
+            if not text:
+                id_score_lists.append([])
+                continue
+
+            if not isinstance(text, basestring):
+                raise ValueError('Please pass a string in the text description.')
+
+            id_score_lists.append(self.index.score(set(analyze_text(text)), max_results))
+
+        return load_scored_cwes(id_score_lists)
+
+
+# The BM25 index shared by all the CWEBM25Search objects of the process
+cwe_bm25_index = CWEBM25Index()
+
+
+# Register the BM25 algorithm with the service locator only if it is enabled in the settings
+if CWE_SEARCH_BM25_PRIORITY is not None:
+    CWESearchLocator.register(CWEBM25Search(), CWE_SEARCH_BM25_PRIORITY)
@@ -0,0 +1,99 @@
+from django.db import connections
+from .cwe_search import CWESearchLocator, CWEKeywordSearch, CWEKeywordIndexSearch
+from .settings import CWE_SEARCH_FULLTEXT_PRIORITY
+
+
+# The ranking expression and the condition used against the full-text search vector of the CWEs. The
+# vector is only created on PostgreSQL, by the migration 0010_cwe_search_vector.
+RANK_SQL = "ts_rank_cd(cwe_cwe.search_vector, to_tsquery('english', %s))"
+MATCH_SQL = "cwe_cwe.search_vector @@ to_tsquery('english', %s)"
+
+
+def is_fulltext_search_available(using):
+    """
+    Check if the full-text search vector of the CWEs exists in a database
+    :param using: The alias of the database
+    :return: True if the database is PostgreSQL, False otherwise
+    """
+    return connections[using].vendor == 'postgresql'
+
+
+def tsquery_terms(words):
+    """
+    Turn words into terms which can be safely put into a tsquery, i.e. which only contain letters and
+    digits. The duplicated terms are dropped and the order of their first occurrence is kept.
+    :param words: An iterable of words
+    :return: A list of terms
+    """
+    terms = []
+    seen = set()
+    for word in words:
+        for term in word.lower().split('_'):
+            if term and term not in seen:
+                seen.add(term)
+                terms.append(term)
+    return terms
+
+
+def to_or_tsquery(words):
+    """
+    Form a tsquery matching the documents which contain any of the words
+    :param words: An iterable of words
+    :return: The tsquery as a string, or None if there is no word to search
+    """
+    terms = tsquery_terms(words)
+    return ' | '.join(terms) if terms else None
+
+
+class CWEFullTextSearch(CWEKeywordSearch):
+    """
+    This CWE search algorithm ranks the CWEs with the PostgreSQL full-text search. The CWE names,
+    descriptions and keywords are kept in a tsvector column backed by a GIN index, so that each text
+    is matched and ranked with ts_rank_cd in a single SQL statement. On the other databases, e.g. the
+    SQLite database used to run the tests locally, the search falls back to another algorithm.
+    """
+
+    def __init__(self, fallback=None):
+        super(CWEFullTextSearch, self).__init__()
+        self.fallback = fallback if fallback is not None else CWEKeywordIndexSearch()
+
+    def search_cwes(self, text, max_results=None):
+        """
+        This is the concrete implementation of the super class' abstract method
+        """
+        return self.search_cwes_many([text], max_results)[0]
+
+    def search_cwes_many(self, texts, max_results=None):
+        """
+        This is the concrete implementation of the super class' abstract method
+        """
+        from cwe.models import CWE
+        if not is_fulltext_search_available(CWE.objects.db):
+            return self.fallback.search_cwes_many(texts, max_results)
+
+        results = []
+        for text in texts:
+            # Validate text for None or empty string
+            if not text:
+                results.append([])
+                continue
+
+            if not isinstance(text, basestring):
+                raise ValueError('Please pass a string in the text description.')
+
+            query = to_or_tsquery(self.iter_filtered_words(text))
+            if query is None:
+                results.append([])
+                continue
+
+            cwes = CWE.objects.extra(select={'rank': RANK_SQL}, select_params=[query],
+                                     where=[MATCH_SQL], params=[query],
+                                     order_by=['-rank', 'code'])[:max_results]
+            results.append([(cwe, cwe.rank) for cwe in cwes])
+
+        return results
+
+
+# Register the full-text search algorithm with the service locator only if it is enabled in the settings
+if CWE_SEARCH_FULLTEXT_PRIORITY is not None:
+    CWESearchLocator.register(CWEFullTextSearch(), CWE_SEARCH_FULLTEXT_PRIORITY)
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+import re
+from django.db import connections
+from django.db.models import Q
+
+
+# The largest value which can be stored in an integer field on all the databases
+DJANGO_DB_INTEGER_FIELD_SAFE_UPPER_LIMIT = 2147483647
+
+# Only the ASCII digits form a CWE code. unicode.isdigit() also accepts digits like u'\xb2', which int() rejects.
+CWE_CODE_REGEX = re.compile(r'^[0-9]+$')
+
+# The aliases of the databases which were checked for the pg_trgm extension, with the outcome
+_trigram_search_available = {}
+
+
+def is_trigram_search_available(using):
+    """
+    Check if the CWE names can be searched with the trigram index, i.e. if the database is PostgreSQL
+    and the pg_trgm extension is installed. The migration 0011_cwe_name_trigram_index installs it
+    when the server provides it.
+    :param using: The alias of the database
+    :return: True if the trigram functions and index can be used, False otherwise
+    """
+    if using not in _trigram_search_available:
+        connection = connections[using]
+        if connection.vendor != 'postgresql':
+            _trigram_search_available[using] = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                _trigram_search_available[using] = cursor.fetchone() is not None
+    return _trigram_search_available[using]
+
+
+def lookup_cwes_by_name(name, queryset=None):
+    """
+    Find the CWEs whose name contains a string, ignoring the case. On PostgreSQL the search uses the
+    trigram index of the CWE names and the CWEs are ordered by the similarity of their name to the
+    string. Otherwise, or when the similarity is the same, they are ordered by their code.
+    :param name: The string to search in the CWE names
+    :param queryset: The queryset of the CWEs to search, or None to search all the CWEs
+    :return: A queryset of the CWEs found
+    """
+    return lookup_cwes(name, queryset, search_code=False)
+
+
+def lookup_cwes(search_str, queryset=None, search_code=True, match_code_prefix=False):
+    """
+    Find the CWEs matching a search string which could be either a CWE code or a part of a CWE name.
+    When the string is made of digits, the CWEs whose code matches it are found along with the ones
+    whose name contains it, and they are returned first. The other CWEs are ordered by the similarity
+    of their name to the string on PostgreSQL, and then by their code.
+    :param search_str: The search string. When it is None or empty, all the CWEs are returned.
+    :param queryset: The queryset of the CWEs to search, or None to search all the CWEs
+    :param search_code: True to search the string in the CWE codes too, False to only search the names
+    :param match_code_prefix: True to find the CWEs whose code starts with the string, False to find
+                              the CWE whose code is the string
+    :return: A queryset of the CWEs found
+    """
+    if queryset is None:
+        from cwe.models import CWE
+        queryset = CWE.objects.all()
+
+    if not search_str:
+        return queryset
+
+    conditions = Q(name__icontains=search_str)
+    # The parameters of the extra select clause are taken in the order of its keys
+    select = OrderedDict()
+    select_params = []
+    order_by = []
+
+    # A number larger than an integer field can't be a CWE code, nor the prefix of one, and comparing the
+    # codes with it would fail on some databases.
+    if (search_code and CWE_CODE_REGEX.match(search_str) and
+            int(search_str) <= DJANGO_DB_INTEGER_FIELD_SAFE_UPPER_LIMIT):
+        if match_code_prefix:
+            conditions |= Q(code__startswith=search_str)
+        else:
+            conditions |= Q(code=int(search_str))
+        select['code_match'] = "CASE WHEN cwe_cwe.code = %s THEN 1 ELSE 0 END"
+        select_params.append(int(search_str))
+        order_by.append('-code_match')
+
+    if is_trigram_search_available(queryset.db):
+        select['name_similarity'] = "similarity(cwe_cwe.name, %s)"
+        select_params.append(search_str)
+        order_by.append('-name_similarity')
+
+    order_by.append('code')
+
+    return queryset.filter(conditions).extra(select=select, select_params=select_params,
+                                             order_by=order_by)
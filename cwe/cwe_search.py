@@ -2,7 +2,12 @@ from abc import ABCMeta, abstractmethod
 import collections
 from collections import OrderedDict
 from nltk.stem.porter import *
+import os
 import re
+import threading
+import time
+import uuid
+from .settings import CWE_SEARCH_INDEX_CACHE, CWE_SEARCH_INDEX_CHECK_INTERVAL, CWE_SEARCH_STEM_CACHE_SIZE
 
 class CWESearchLocator:
     """
@@ -61,16 +66,28 @@ class CWESearchBase:
 
     # Abstract method declaration
     @abstractmethod
-    def search_cwes(self, text):
+    def search_cwes(self, text, max_results=None):
         """
         This is the main abstract method which receives a string and passes the CWE Objects with their match counts
         It also invokes two other methods, i.e, remove_stopwords() and stem_text() to remove redundant words and stem
         the remaining text
         :param text: A string which corresponds to description
+        :param max_results: The maximum number of tuples to return. 'None' returns all the matching CWEs
         :return: A list of tuples wherein the first item will be a CWE Object and second item will be its match count
         """
         pass
 
+    def search_cwes_many(self, texts, max_results=None):
+        """
+        This method is the batch version of search_cwes(). This default implementation searches the texts one by
+        one. The search algorithms can override it to search all the texts in a single pass, so that a CWE found for
+        several texts is loaded only once
+        :param texts: A list of strings which correspond to descriptions
+        :param max_results: The maximum number of tuples to return for each text. 'None' returns all the matching CWEs
+        :return: A list with the search_cwes() result of every text, in the same order
+        """
+        return [self.search_cwes(text, max_results) for text in texts]
+
     @abstractmethod
     def remove_stopwords(self, text):
         """
@@ -90,26 +107,144 @@ class CWESearchBase:
         """
         pass
 
+    def stem_many(self, words):
+        """
+        This method receives a collection of words and stems all of them. This default implementation stems the
+        words one by one with the shared memoized Porter stemmer. The search algorithms can override it to stem
+        the words in a single pass or with another stemmer
+        :param words: A collection of words
+        :return: A list with the stemmed form of every word, in the same order and keeping the duplicates
+        """
+        return [cwe_stem_cache.stem(word) for word in words]
+
+
+class StemCache(object):
+    """
+    This class memoizes the Porter stemmer. A single stemmer is shared by all the callers and the
+    stemmed form of the most recently used words is kept in a bounded LRU cache. The hit and miss
+    counters tell how effective the cache is.
+    """
+
+    def __init__(self, max_size=CWE_SEARCH_STEM_CACHE_SIZE):
+        self._lock = threading.RLock()
+        self._stemmer = PorterStemmer()
+        self._stems = OrderedDict()  # Word -> stemmed word, from the least to the most recently used
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._stems)
+
+    def clear(self):
+        """
+        Empty the cache and reset the counters
+        """
+        with self._lock:
+            self._stems.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stem(self, word):
+        """
+        :param word: A word
+        :return: The stemmed form of the word
+        """
+        return self.stem_many([word])[0]
+
+    def stem_many(self, words):
+        """
+        :param words: A collection of words
+        :return: A list with the stemmed form of every word, in the same order and keeping the duplicates
+        """
+        stems = self._stems
+        stemmed = []
+        with self._lock:
+            for word in words:
+                stem = stems.pop(word, None)
+                if stem is None:
+                    self.misses += 1
+                    stem = self._stemmer.stem(word)
+                    if len(stems) >= self.max_size:
+                        stems.popitem(last=False)  # Evict the least recently used word
+                else:
+                    self.hits += 1
+                # (Re)insert the word as the most recently used one
+                stems[word] = stem
+                stemmed.append(stem)
+        return stemmed
+
+
+# The stem cache shared by all the CWE search algorithms of the process
+cwe_stem_cache = StemCache()
+
+
+# Matches the words, i.e. the runs of alphanumeric characters and underscores
+WORD_REGEX = re.compile(r'\w+')
+
+
+def load_stop_words(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stopwords.txt')):
+    """
+    Read the stop words from a file with whitespace-separated words
+    :param path: The path of the file
+    :return: A frozenset of the stop words
+    """
+    with open(path, 'r') as f:
+        return frozenset(word for line in f for word in line.split())
+
+
+def iter_words(text):
+    """
+    Tokenize a text lazily into lower case words. The text can be given as a sequence of chunks, e.g.
+    a file object, so that a large text never has to be held in memory as a whole. A word split across
+    two chunks is yielded as a single word.
+    :param text: A string or an iterable of strings
+    :return: A generator of the lower case words of the text
+    """
+    if isinstance(text, basestring):
+        text = (text,)
+
+    partial_word = ''
+    for chunk in text:
+        if partial_word:
+            chunk = partial_word + chunk
+            partial_word = ''
+        for match in WORD_REGEX.finditer(chunk):
+            if match.end() == len(chunk):
+                # The word might continue in the next chunk
+                partial_word = match.group()
+            else:
+                yield match.group().lower()
+    if partial_word:
+        yield partial_word.lower()
+
+
+def iter_filtered_words(text, stop_words):
+    """
+    Tokenize a text lazily into lower case words and drop the stop words
+    :param text: A string or an iterable of strings
+    :param stop_words: A set of lower case stop words
+    :return: A generator of the lower case words of the text that are not stop words
+    """
+    return (word for word in iter_words(text) if word not in stop_words)
+
+
+# The stop words are read from the disk only once per process
+STOP_WORDS = load_stop_words()
+
 
 #  Concrete Class definition
 class CWEKeywordSearch(CWESearchBase):
 
     def __init__(self):
         """
-        This is a constructor of the class which reads stop words from a file and stores them.
-        The words don't need to be read from the disk again and again for every request.
+        This is a constructor of the class which gets the stop words that were read from a file once
+        for all. The words don't need to be read from the disk again and again for every request.
         """
+        self.stop_words = STOP_WORDS
 
-        # Read stop words in a collection from a file stored in the disk
-        import os
-        self.stop_words = []
-        with open(os.getcwd() + '/cwe/stopwords.txt', 'r') as f:
-            for line in f:
-                for word in line.split():
-                    self.stop_words.append(word)
 
-
-    def search_cwes(self, text):
+    def search_cwes(self, text, max_results=None):
         """
         This is the concrete implementation of the super class' abstract method
         """
@@ -123,7 +258,7 @@ class CWEKeywordSearch(CWESearchBase):
             raise ValueError('Please pass a string in the text description.')
 
         # Call Stop Word method here
-        filtered_words = self.remove_stopwords(text)
+        filtered_words = self.iter_filtered_words(text)
 
         # Call stemmer here
         stemmed_list = self.stem_text(filtered_words)
@@ -137,7 +272,13 @@ class CWEKeywordSearch(CWESearchBase):
             match_count.append((cwe, cwe.keywords.filter(name__in = stemmed_list).count()))
 
         match_count.sort(key= lambda x: x[1], reverse=True)
-        return match_count
+        return match_count[:max_results]
+
+    def search_cwes_many(self, texts, max_results=None):
+        """
+        This is the concrete implementation of the super class' abstract method
+        """
+        return [self.search_cwes(text, max_results) for text in texts]
 
 
     def remove_stopwords(self, text):
@@ -145,15 +286,16 @@ class CWEKeywordSearch(CWESearchBase):
         This is the concrete implementation of the super class' abstract method
         """
 
-        # make lower case and remove non-alphanumeric characters except for underscore
-        text = text.lower()
-        text = re.sub(r'\W+', ' ', text)
+        # make lower case, remove non-alphanumeric characters except for underscore and remove stop words
+        return list(self.iter_filtered_words(text))
 
-        words_in_text = text.split()  # Tokenize the words
-
-        # Remove Stop words
-        filtered_words = [word for word in words_in_text if word not in self.stop_words]
-        return filtered_words
+    def iter_filtered_words(self, text):
+        """
+        Lazy version of remove_stopwords() that doesn't build any intermediate list
+        :param text: A string or an iterable of strings, e.g. a file object
+        :return: A generator of the words of the text from which all the stop words have been removed
+        """
+        return iter_filtered_words(text, self.stop_words)
 
 
     def stem_text(self, filtered_words):
@@ -161,10 +303,8 @@ class CWEKeywordSearch(CWESearchBase):
         This is the concrete implementation of the super class' abstract method
         """
 
-        st = PorterStemmer()  # Initialize a stemmer
-
         # Build stemmed list
-        stemmed = [st.stem(word) for word in filtered_words]
+        stemmed = self.stem_many(filtered_words)
 
         # Sort by frequency
         counts = collections.Counter(stemmed)
@@ -174,9 +314,339 @@ class CWEKeywordSearch(CWESearchBase):
         stemmed = list(OrderedDict.fromkeys(stemmed))
         return stemmed
 
+    def stem_many(self, words):
+        """
+        This is the concrete implementation of the super class' abstract method
+        """
+        return cwe_stem_cache.stem_many(words)
+
+
+def is_shared_cache(cache):
+    """
+    :param cache: A Django cache
+    :return: Whether the cache is shared by the processes, i.e. it is not a cache local to each process
+    """
+    from django.core.cache.backends.dummy import DummyCache
+    from django.core.cache.backends.locmem import LocMemCache
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+class GenerationCounter(object):
+    """
+    This class is a counter published through the Django cache. A process increments it every time it
+    changes the data an in-memory index is built from. Comparing the counter with the value seen when
+    the index was last brought up to date tells a process whether another process changed the data.
+    The caches whose increments are not atomic, e.g. the database cache, get a new unique value instead
+    of an increment, so that two processes changing the data at the same time never publish the same value.
+    The last value read is trusted for check_interval seconds, so that the cache is not queried on every use.
+    """
+
+    def __init__(self, key, check_interval=0):
+        """
+        :param key: The cache key of the counter
+        :param check_interval: The number of seconds during which the last value read is trusted
+        """
+        self.key = key
+        self.check_interval = check_interval
+        self._last_seen = None  # (cache, value, time) of the last value read or set by this process
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[CWE_SEARCH_INDEX_CACHE]
+
+    @property
+    def is_shared(self):
+        """
+        :return: Whether the other processes see the counter, i.e. whether its cache is not local to this process
+        """
+        return is_shared_cache(self.cache)
+
+    @property
+    def is_atomic(self):
+        """
+        :return: Whether the increments are atomic, i.e. whether the counter is incremented by one every time
+        """
+        from django.core.cache.backends.locmem import LocMemCache
+        from django.core.cache.backends.memcached import BaseMemcachedCache
+        return isinstance(self.cache, (LocMemCache, BaseMemcachedCache))
+
+    def get(self):
+        """
+        :return: The current value of the counter
+        """
+        cache = self.cache
+        last_seen = self._last_seen
+        if self.check_interval and last_seen is not None and last_seen[0] is cache and \
+                time.time() - last_seen[2] < self.check_interval:
+            return last_seen[1]
+        value = cache.get(self.key)
+        if value is None:
+            cache.add(self.key, 0, timeout=None)
+            value = cache.get(self.key, 0)
+        self._remember(cache, value)
+        return value
+
+    def _remember(self, cache, value):
+        self._last_seen = (cache, value, time.time())
+
+    def increment(self):
+        """
+        :return: The value of the counter after the increment
+        """
+        cache = self.cache
+        if not self.is_atomic:
+            # Reading and incrementing the value is not atomic, so a value no other process has seen is set
+            value = uuid.uuid4().hex
+            cache.set(self.key, value, timeout=None)
+        else:
+            cache.add(self.key, 0, timeout=None)
+            try:
+                value = cache.incr(self.key)
+            except ValueError:
+                # The key was evicted between add() and incr()
+                cache.add(self.key, 1, timeout=None)
+                value = cache.get(self.key, 1)
+        self._remember(cache, value)
+        return value
+
+
+class CWEKeywordIndex(object):
+    """
+    This class keeps an in-memory inverted index of the CWE keywords, i.e. a posting list of CWE IDs
+    for every stemmed keyword name. The index is built from the database on its first use. After that,
+    it is kept up to date by the CWE and Keyword signal receivers with small add/remove updates, and
+    it is rebuilt lazily only when another process has changed the keywords in the meantime.
+    """
+
+    def __init__(self, generation_key='cwe_keyword_index_generation'):
+        self._lock = threading.RLock()
+        self.generation = GenerationCounter(generation_key, CWE_SEARCH_INDEX_CHECK_INTERVAL)
+        self._is_built = False
+        self._built_generation = None  # Value of the generation counter the index is up to date with
+        self._keyword_ids = {}  # Stemmed keyword name -> keyword ID
+        self._keyword_names = {}  # Keyword ID -> stemmed keyword name
+        self._postings = {}  # Keyword ID -> set of the IDs of the CWEs having the keyword
+        self._cwe_keywords = {}  # CWE ID -> set of the IDs of the keywords of the CWE
+
+    def invalidate(self):
+        """
+        Drop the content of the index so that it is rebuilt from the database on the next use
+        """
+        with self._lock:
+            self._is_built = False
+            self._built_generation = None
+            self._keyword_ids = {}
+            self._keyword_names = {}
+            self._postings = {}
+            self._cwe_keywords = {}
+
+    def build(self):
+        """
+        Load all the keywords and the CWE-keyword relationships from the database with two queries
+        """
+        from cwe.models import CWE, Keyword
+
+        with self._lock:
+            # Read the generation first, so that a change made while loading triggers another rebuild
+            generation = self.generation.get()
+
+            keyword_names = dict(Keyword.objects.values_list('id', 'name'))
+            postings = dict((keyword_id, set()) for keyword_id in keyword_names)
+            cwe_keywords = {}
+            for cwe_id, keyword_id in CWE.keywords.through.objects.values_list('cwe_id', 'keyword_id'):
+                postings.setdefault(keyword_id, set()).add(cwe_id)
+                cwe_keywords.setdefault(cwe_id, set()).add(keyword_id)
+
+            self._keyword_names = keyword_names
+            self._keyword_ids = dict((name, keyword_id) for keyword_id, name in keyword_names.iteritems())
+            self._postings = postings
+            self._cwe_keywords = cwe_keywords
+            self._built_generation = generation
+            self._is_built = True
+
+    def ensure_fresh(self):
+        """
+        Build the index if it is not built yet or if another process has changed the keywords since
+        """
+        with self._lock:
+            if not self._is_built or self._built_generation != self.generation.get():
+                self.build()
+
+    def score(self, stemmed_words):
+        """
+        Count, for every CWE, the number of its keywords found in the given stemmed words
+        :param stemmed_words: A collection of distinct stemmed words
+        :return: A list of (CWE ID, match count) tuples sorted by the match count and then by the CWE ID
+        """
+        with self._lock:
+            self.ensure_fresh()
+
+            match_count = collections.Counter()
+            for word in stemmed_words:
+                keyword_id = self._keyword_ids.get(word)
+                if keyword_id is not None:
+                    match_count.update(self._postings[keyword_id])
+
+        return sorted(match_count.iteritems(), key=lambda x: (-x[1], x[0]))
+
+    def _update(self, apply_change):
+        """
+        Apply a change to the index, if it is built, and publish a new generation. If the generation
+        shows that another process has also changed the keywords, or can't show it as the increments of
+        the counter are not atomic, the index is rebuilt on the next use.
+        :param apply_change: A function applying the change to the index
+        """
+        with self._lock:
+            if self._is_built:
+                apply_change()
+            new_generation = self.generation.increment()
+            # Unless the increments are atomic, another process might have changed the keywords too
+            if self._is_built and self.generation.is_atomic and new_generation == self._built_generation + 1:
+                self._built_generation = new_generation
+            else:
+                self._is_built = False
+
+    def _link(self, cwe_id, keyword_id):
+        self._postings.setdefault(keyword_id, set()).add(cwe_id)
+        self._cwe_keywords.setdefault(cwe_id, set()).add(keyword_id)
+
+    def _unlink(self, cwe_id, keyword_id):
+        self._postings.get(keyword_id, set()).discard(cwe_id)
+        self._cwe_keywords.get(cwe_id, set()).discard(keyword_id)
+
+    def _load_keyword_names(self, keyword_ids):
+        # Keywords created with bulk_create() don't send post_save, so they might be unknown yet
+        from cwe.models import Keyword
+        unknown_ids = [keyword_id for keyword_id in keyword_ids if keyword_id not in self._keyword_names]
+        if unknown_ids:
+            for keyword_id, name in Keyword.objects.filter(pk__in=unknown_ids).values_list('id', 'name'):
+                self._set_keyword_name(keyword_id, name)
+
+    def _set_keyword_name(self, keyword_id, name):
+        old_name = self._keyword_names.get(keyword_id)
+        if old_name is not None and self._keyword_ids.get(old_name) == keyword_id:
+            del self._keyword_ids[old_name]
+        self._keyword_names[keyword_id] = name
+        self._keyword_ids[name] = keyword_id
+        self._postings.setdefault(keyword_id, set())
+
+    def keyword_saved(self, keyword_id, name):
+        """ Handle the creation or the renaming of a keyword """
+        self._update(lambda: self._set_keyword_name(keyword_id, name))
+
+    def keyword_deleted(self, keyword_id):
+        """ Handle the deletion of a keyword, which also deletes its relationships with the CWEs """
+        def apply_change():
+            for cwe_id in self._postings.pop(keyword_id, set()):
+                self._cwe_keywords.get(cwe_id, set()).discard(keyword_id)
+            name = self._keyword_names.pop(keyword_id, None)
+            if name is not None and self._keyword_ids.get(name) == keyword_id:
+                del self._keyword_ids[name]
+        self._update(apply_change)
+
+    def cwe_deleted(self, cwe_id):
+        """ Handle the deletion of a CWE, which also deletes its relationships with the keywords """
+        def apply_change():
+            for keyword_id in self._cwe_keywords.pop(cwe_id, set()):
+                self._postings.get(keyword_id, set()).discard(cwe_id)
+        self._update(apply_change)
+
+    def keywords_added(self, pairs):
+        """
+        Handle the addition of keywords to CWEs
+        :param pairs: A collection of (CWE ID, keyword ID) tuples
+        """
+        def apply_change():
+            self._load_keyword_names(set(keyword_id for cwe_id, keyword_id in pairs))
+            for cwe_id, keyword_id in pairs:
+                self._link(cwe_id, keyword_id)
+        self._update(apply_change)
+
+    def keywords_removed(self, pairs):
+        """
+        Handle the removal of keywords from CWEs
+        :param pairs: A collection of (CWE ID, keyword ID) tuples
+        """
+        def apply_change():
+            for cwe_id, keyword_id in pairs:
+                self._unlink(cwe_id, keyword_id)
+        self._update(apply_change)
+
+    def cwe_keywords_cleared(self, cwe_id):
+        """ Handle the removal of all the keywords of a CWE """
+        def apply_change():
+            for keyword_id in self._cwe_keywords.pop(cwe_id, set()):
+                self._postings.get(keyword_id, set()).discard(cwe_id)
+        self._update(apply_change)
+
+    def keyword_cwes_cleared(self, keyword_id):
+        """ Handle the removal of a keyword from all its CWEs """
+        def apply_change():
+            for cwe_id in self._postings.get(keyword_id, set()):
+                self._cwe_keywords.get(cwe_id, set()).discard(keyword_id)
+            self._postings[keyword_id] = set()
+        self._update(apply_change)
+
+
+class CWEKeywordIndexSearch(CWEKeywordSearch):
+    """
+    This CWE search algorithm produces the same match counts as CWEKeywordSearch, but it scores the
+    text against an in-memory keyword index instead of the database. Only the CWEs to be returned are
+    loaded from the database, with a single query.
+    """
+
+    def __init__(self, index=None):
+        super(CWEKeywordIndexSearch, self).__init__()
+        self.index = index if index is not None else cwe_keyword_index
+
+    def search_cwes(self, text, max_results=None):
+        """
+        This is the concrete implementation of the super class' abstract method
+        """
+        return self.search_cwes_many([text], max_results)[0]
+
+    def search_cwes_many(self, texts, max_results=None):
+        """
+        This is the concrete implementation of the super class' abstract method
+        """
+        id_count_lists = []
+        for text in texts:
+            # Validate text for None or empty string
+            if not text:
+                id_count_lists.append([])
+                continue
+
+            if not isinstance(text, basestring):
+                raise ValueError('Please pass a string in the text description.')
+
+            stemmed_list = self.stem_text(self.iter_filtered_words(text))
+            id_count_lists.append(self.index.score(stemmed_list)[:max_results])
+
+        return load_scored_cwes(id_count_lists)
+
+
+def load_scored_cwes(id_score_lists):
+    """
+    Replace the CWE IDs of the scored search results with the CWE objects, loading all of them with a
+    single query. The CWEs deleted after the index was built are dropped from the results.
+    :param id_score_lists: A list of lists of (CWE ID, score) tuples
+    :return: A list of lists of (CWE object, score) tuples
+    """
+    from cwe.models import CWE
+    cwe_ids = set(cwe_id for id_score_tuples in id_score_lists for cwe_id, score in id_score_tuples)
+    cwes = CWE.objects.in_bulk(list(cwe_ids)) if cwe_ids else {}
+    return [[(cwes[cwe_id], score) for cwe_id, score in id_score_tuples if cwe_id in cwes]
+            for id_score_tuples in id_score_lists]
+
+
+# The keyword index shared by all the CWEKeywordIndexSearch objects of the process
+cwe_keyword_index = CWEKeywordIndex()
+
 
 # Register a default CWESearchBase object with the service locator
 # Note: We are deliberately not handling the exception here, because it is very unlikely
 # that the exception will be raised if the correct algorithm is registered properly. If
 # not, unhandled exception will make it easier to find the problem.
-CWESearchLocator.register(CWEKeywordSearch(), 1)
\ No newline at end of file
+CWESearchLocator.register(CWEKeywordSearch(), 1)
+CWESearchLocator.register(CWEKeywordIndexSearch(), 2)
\ No newline at end of file
@@ -0,0 +1,188 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+import re
+import threading
+from .cwe_search import GenerationCounter, WORD_REGEX
+from .settings import CWE_SEARCH_INDEX_CHECK_INTERVAL
+
+
+# A search string which can only be a CWE code, e.g. '79', 'CWE-79' or 'cwe 79'
+CODE_REGEX = re.compile(r'^\s*(?:cwe[\s-]*)?(\d+)\s*$', re.IGNORECASE)
+
+
+class PrefixTrie(object):
+    """
+    This class is a compact prefix trie mapping string keys to document numbers. The nodes are stored
+    breadth first in parallel arrays, so that the children of a node are contiguous and sorted by their
+    character and can be found with a binary search. Every node holds the sorted numbers of all the
+    documents having a key starting with the node's prefix, so that a prefix is looked up in a time
+    proportional to its length.
+    """
+
+    def __init__(self, keys):
+        """
+        :param keys: An iterable of (key, document number) tuples
+        """
+        root = ({}, set())
+        for key, doc in keys:
+            node = root
+            node[1].add(doc)
+            for char in key:
+                node = node[0].setdefault(char, ({}, set()))
+                node[1].add(doc)
+
+        self._chars = array('u')  # Node -> last character of its prefix
+        self._first_child = array('i')  # Node -> index of its first child
+        self._child_count = array('i')  # Node -> number of its children
+        self._docs_start = array('i')  # Node -> index of its first document in _docs
+        self._docs_end = array('i')  # Node -> index after its last document in _docs
+        self._docs = array('i')
+
+        next_node = 1
+        queue = deque([(u'\0', root)])
+        while queue:
+            char, (children, docs) = queue.popleft()
+            self._chars.append(char)
+            self._first_child.append(next_node)
+            self._child_count.append(len(children))
+            next_node += len(children)
+            self._docs_start.append(len(self._docs))
+            self._docs.extend(sorted(docs))
+            self._docs_end.append(len(self._docs))
+            for child_char in sorted(children):
+                queue.append((child_char, children[child_char]))
+
+    def find(self, prefix):
+        """
+        :param prefix: A string
+        :return: The sorted numbers of the documents having a key starting with the prefix
+        """
+        node = 0
+        for char in prefix:
+            first = self._first_child[node]
+            last = first + self._child_count[node]
+            node = bisect_left(self._chars, char, first, last)
+            if node == last or self._chars[node] != char:
+                return array('i')
+        return self._docs[self._docs_start[node]:self._docs_end[node]]
+
+
+class CWETypeaheadIndex(object):
+    """
+    This class answers the typeahead queries of the CWE selection without hitting the database. It
+    keeps the CWEs sorted by their code along with a prefix trie of their codes and another one of the
+    lower-cased words of their names. The index is built on its first use and is rebuilt lazily on the
+    next use after any process saved or deleted a CWE.
+    """
+
+    def __init__(self, generation_key='cwe_typeahead_index_generation'):
+        self._lock = threading.RLock()
+        self.generation = GenerationCounter(generation_key, CWE_SEARCH_INDEX_CHECK_INTERVAL)
+        self._is_built = False
+        self._built_generation = None
+        self._cwes = []  # Document number -> (CWE ID, CWE code, CWE name), sorted by the code
+        self._codes = array('i')  # Document number -> CWE code
+        self._code_trie = PrefixTrie([])
+        self._name_trie = PrefixTrie([])
+
+    def invalidate(self):
+        """
+        Drop the content of the index so that it is rebuilt from the database on the next use
+        """
+        with self._lock:
+            self._is_built = False
+            self._built_generation = None
+            self._cwes = []
+            self._codes = array('i')
+            self._code_trie = PrefixTrie([])
+            self._name_trie = PrefixTrie([])
+
+    def changed(self):
+        """
+        Publish a change of the CWEs so that every process rebuilds its index
+        """
+        with self._lock:
+            self._is_built = False
+            self.generation.increment()
+
+    def build(self):
+        """
+        Load the codes and the names of all the CWEs from the database with a single query
+        """
+        from cwe.models import CWE
+
+        with self._lock:
+            # Read the generation first, so that a change made while loading triggers another rebuild
+            generation = self.generation.get()
+
+            cwes = list(CWE.objects.order_by('code').values_list('id', 'code', 'name'))
+            code_keys = []
+            name_keys = []
+            for doc, (cwe_id, code, name) in enumerate(cwes):
+                code_keys.append((unicode(code), doc))
+                for word in set(WORD_REGEX.findall(name.lower())):
+                    name_keys.append((word, doc))
+
+            self._cwes = cwes
+            self._codes = array('i', (code for cwe_id, code, name in cwes))
+            self._code_trie = PrefixTrie(code_keys)
+            self._name_trie = PrefixTrie(name_keys)
+            self._built_generation = generation
+            self._is_built = True
+
+    def ensure_fresh(self):
+        """
+        Build the index if it is not built yet or if another process has changed the CWEs since
+        """
+        with self._lock:
+            if not self._is_built or self._built_generation != self.generation.get():
+                self.build()
+
+    def search(self, query, offset, limit):
+        """
+        Find the CWEs for a typeahead query. Every word of the query has to start a word of the CWE
+        name: unlike the name lookup of the database, the words are not searched inside the words of the
+        names, e.g. 'jection' does not find 'SQL Injection'. When the query is a CWE code, the CWEs whose code starts with it are found too, and the
+        CWE with that very code comes first. The other CWEs are sorted by their code.
+        :param query: The search string. When it is None or has no word, all the CWEs are found.
+        :param offset: The number of CWEs found to skip
+        :param limit: The maximum number of CWEs to return
+        :return: A tuple of the total number of CWEs found and the list of the (CWE ID, CWE code,
+                 CWE name) tuples of the requested page
+        """
+        with self._lock:
+            self.ensure_fresh()
+            cwes = self._cwes
+            codes = self._codes
+            code_trie = self._code_trie
+            name_trie = self._name_trie
+
+        words = set(WORD_REGEX.findall(query.lower())) if query else set()
+        if not words:
+            return len(cwes), cwes[offset:offset + limit]
+
+        docs = None
+        for word in words:
+            word_docs = name_trie.find(word)
+            docs = set(word_docs) if docs is None else docs.intersection(word_docs)
+
+        exact_doc = None
+        code_match = CODE_REGEX.match(query)
+        if code_match:
+            code = code_match.group(1)
+            docs.update(code_trie.find(code.lstrip('0') or '0'))
+            exact_doc = bisect_left(codes, int(code))
+            if exact_doc == len(codes) or codes[exact_doc] != int(code):
+                exact_doc = None
+
+        docs = sorted(docs)
+        if exact_doc is not None:
+            docs.remove(exact_doc)
+            docs.insert(0, exact_doc)
+
+        return len(docs), [cwes[doc] for doc in docs[offset:offset + limit]]
+
+
+# The typeahead index shared by all the views of the process
+cwe_typeahead_index = CWETypeaheadIndex()
@@ -0,0 +1,227 @@
+from collections import OrderedDict
+import json
+import math
+import os
+import random
+import timeit
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from cwe.cwe_bm25_search import CWEBM25Search, cwe_bm25_index
+from cwe.cwe_fulltext_search import CWEFullTextSearch
+from cwe.cwe_search import CWESearchLocator, CWEKeywordSearch, CWEKeywordIndexSearch, cwe_keyword_index
+from cwe.models import CWE, Keyword
+
+
+DEFAULT_CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cwe_search_corpus.txt')
+
+# The CWE search algorithms which can be benchmarked, by name
+PROVIDERS = OrderedDict([
+    ('keyword', CWEKeywordSearch),
+    ('keyword_index', CWEKeywordIndexSearch),
+    ('bm25', CWEBM25Search),
+    ('fulltext', CWEFullTextSearch),
+])
+
+
+class Rollback(Exception):
+    """ Raised to roll back the synthetic catalogue at the end of the benchmark """
+    pass
+
+
+def percentile(sorted_values, percent):
+    """
+    Compute a percentile with the nearest-rank method
+    :param sorted_values: A non-empty sorted list of values
+    :param percent: The percentile to compute, between 0 and 100
+    :return: The value of the percentile
+    """
+    rank = int(math.ceil(percent / 100.0 * len(sorted_values)))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+class Command(BaseCommand):
+    help = ("Benchmark the CWE search algorithms. A synthetic catalogue of CWEs and keywords is loaded "
+            "in a transaction which is rolled back at the end, and a corpus of bug report texts is "
+            "searched with each algorithm. The latency percentiles, the number of database queries per "
+            "search and the overlap of the top results between the algorithms are written as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cwes', type=int, default=1000,
+                            help="Number of synthetic CWEs to load (default: 1000)")
+        parser.add_argument('--keywords', type=int, default=2000,
+                            help="Number of synthetic keywords to load (default: 2000)")
+        parser.add_argument('--keywords-per-cwe', type=int, default=5, dest='keywords_per_cwe',
+                            help="Number of keywords of each synthetic CWE (default: 5)")
+        parser.add_argument('--corpus', default=DEFAULT_CORPUS_PATH,
+                            help="File with one bug report text per line (default: the bundled corpus)")
+        parser.add_argument('--provider', action='append', dest='providers', choices=list(PROVIDERS),
+                            help="Search algorithm to benchmark, can be repeated (default: all of them)")
+        parser.add_argument('--repeat', type=int, default=3,
+                            help="Number of times the corpus is searched with each algorithm (default: 3)")
+        parser.add_argument('--top-k', type=int, default=10, dest='top_k',
+                            help="Number of results compared between the algorithms (default: 10)")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Seed of the synthetic catalogue generation (default: 0)")
+        parser.add_argument('--output',
+                            help="File to write the JSON results to (default: the standard output)")
+
+    def handle(self, *args, **options):
+        for name in ('cwes', 'keywords', 'keywords_per_cwe', 'repeat', 'top_k'):
+            if options[name] < 1:
+                raise CommandError("--%s should be a positive integer" % name.replace('_', '-'))
+
+        texts = self._load_corpus(options['corpus'])
+        provider_names = options['providers'] or list(PROVIDERS)
+
+        try:
+            with transaction.atomic():
+                catalogue = self._load_catalogue(options, texts)
+                results = self._benchmark(provider_names, texts, options['repeat'], options['top_k'])
+                raise Rollback()
+        except Rollback:
+            pass
+        finally:
+            # The in-memory indexes should not keep the synthetic catalogue
+            cwe_keyword_index.invalidate()
+            cwe_bm25_index.invalidate()
+
+        report = OrderedDict([
+            ('django_version', django.get_version()),
+            ('database_vendor', connections[CWE.objects.db].vendor),
+            ('registered_provider', type(CWESearchLocator.get_instance()).__name__),
+            ('catalogue', catalogue),
+            ('corpus', OrderedDict([('path', options['corpus']), ('texts', len(texts))])),
+            ('repeat', options['repeat']),
+            ('top_k', options['top_k']),
+            ('providers', results),
+        ])
+        output = json.dumps(report, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+            self.stdout.write("The benchmark results were written to %s" % options['output'])
+        else:
+            self.stdout.write(output)
+
+    def _load_corpus(self, path):
+        try:
+            with open(path) as corpus_file:
+                texts = [line.decode('utf-8').strip() for line in corpus_file]
+        except IOError as e:
+            raise CommandError("Cannot read the corpus: %s" % e)
+        texts = [text for text in texts if text and not text.startswith('#')]
+        if not texts:
+            raise CommandError("The corpus %s has no text" % path)
+        return texts
+
+    def _load_catalogue(self, options, texts):
+        """
+        Load the synthetic CWEs and keywords with bulk inserts. Their words are drawn from the corpus so
+        that the searches find them, mixed with made-up words.
+        """
+        rng = random.Random(options['seed'])
+        keyword_search = CWEKeywordSearch()
+
+        words = sorted(set(word.lower() for text in texts for word in keyword_search.iter_filtered_words(text)))
+        stems = sorted(set(keyword_search.stem_many(words)))
+        existing_keywords = set(Keyword.objects.values_list('name', flat=True))
+        keyword_names = [stem for stem in stems if stem not in existing_keywords and len(stem) <= 32]
+        rng.shuffle(keyword_names)
+        keyword_names = keyword_names[:options['keywords']]
+        number = 0
+        while len(keyword_names) < options['keywords']:
+            name = 'synthkw%d' % number
+            number += 1
+            if name not in existing_keywords:
+                keyword_names.append(name)
+
+        existing_cwes = CWE.objects.count()
+        Keyword.objects.bulk_create([Keyword(name=name) for name in keyword_names])
+        keyword_ids = list(Keyword.objects.filter(name__in=keyword_names).order_by('id').values_list('id', flat=True))
+
+        first_code = (CWE.objects.order_by('-code').values_list('code', flat=True).first() or 0) + 1
+        vocabulary = words + ['synth%d' % i for i in xrange(len(words))]
+        cwes = []
+        for code in xrange(first_code, first_code + options['cwes']):
+            name = ' '.join(rng.choice(vocabulary) for i in xrange(rng.randint(2, 6))).capitalize()
+            description = ' '.join(rng.choice(vocabulary) for i in xrange(rng.randint(10, 40)))
+            cwes.append(CWE(code=code, name=name[:128], description=description))
+        CWE.objects.bulk_create(cwes)
+        cwe_ids = list(CWE.objects.filter(code__gte=first_code).order_by('id').values_list('id', flat=True))
+
+        keywords_per_cwe = min(options['keywords_per_cwe'], len(keyword_ids))
+        CWE.keywords.through.objects.bulk_create([
+            CWE.keywords.through(cwe_id=cwe_id, keyword_id=keyword_id)
+            for cwe_id in cwe_ids
+            for keyword_id in rng.sample(keyword_ids, keywords_per_cwe)
+        ])
+
+        # The bulk inserts do not send the signals which keep the in-memory indexes up to date
+        cwe_keyword_index.invalidate()
+        cwe_bm25_index.invalidate()
+
+        return OrderedDict([
+            ('cwes', options['cwes']),
+            ('keywords', options['keywords']),
+            ('keywords_per_cwe', keywords_per_cwe),
+            ('existing_cwes', existing_cwes),
+            ('seed', options['seed']),
+        ])
+
+    def _benchmark(self, provider_names, texts, repeat, top_k):
+        connection = connections[CWE.objects.db]
+        results = OrderedDict()
+        top_codes = {}
+
+        for name in provider_names:
+            provider = PROVIDERS[name]()
+
+            # The first search builds the in-memory indexes, if any
+            warmup_start = timeit.default_timer()
+            provider.search_cwes(texts[0], max_results=top_k)
+            warmup_seconds = timeit.default_timer() - warmup_start
+
+            # Count the queries and record the top results once, outside of the timed searches
+            with CaptureQueriesContext(connection) as queries:
+                top_codes[name] = [[cwe.code for cwe, score in provider.search_cwes(text, max_results=top_k)]
+                                   for text in texts]
+
+            latencies = []
+            for i in xrange(repeat):
+                for text in texts:
+                    start = timeit.default_timer()
+                    provider.search_cwes(text, max_results=top_k)
+                    latencies.append((timeit.default_timer() - start) * 1000)
+            latencies.sort()
+
+            results[name] = OrderedDict([
+                ('class', PROVIDERS[name].__name__),
+                ('searches', len(latencies)),
+                ('warmup_seconds', round(warmup_seconds, 6)),
+                ('latency_ms', OrderedDict([
+                    ('mean', round(sum(latencies) / len(latencies), 4)),
+                    ('p50', round(percentile(latencies, 50), 4)),
+                    ('p95', round(percentile(latencies, 95), 4)),
+                    ('p99', round(percentile(latencies, 99), 4)),
+                ])),
+                ('queries_per_search', round(float(len(queries)) / len(texts), 4)),
+            ])
+
+        # The top-k overlap is the mean share of the top results two algorithms have in common
+        for name in provider_names:
+            overlaps = OrderedDict()
+            for other_name in provider_names:
+                if other_name == name:
+                    continue
+                shares = []
+                for codes, other_codes in zip(top_codes[name], top_codes[other_name]):
+                    if codes or other_codes:
+                        shares.append(float(len(set(codes) & set(other_codes))) /
+                                      max(len(codes), len(other_codes)))
+                overlaps[other_name] = round(sum(shares) / len(shares), 4) if shares else None
+            results[name]['top_k_overlap'] = overlaps
+
+        return results
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# The full-text search vector of the CWEs only exists on PostgreSQL. It weighs the words of the
+# name (A) above the ones of the keywords (B) and of the description (C). The triggers keep it up to
+# date when a CWE, its keyword relationships or a keyword name change.
+CREATE_SEARCH_VECTOR_SQL = """
+ALTER TABLE cwe_cwe ADD COLUMN search_vector tsvector;
+
+CREATE INDEX cwe_cwe_search_vector_gin ON cwe_cwe USING gin (search_vector);
+
+CREATE FUNCTION cwe_cwe_search_vector(integer, text, text) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', coalesce($2, '')), 'A') ||
+           setweight(to_tsvector('english', coalesce((
+               SELECT string_agg(k.name, ' ')
+               FROM cwe_keyword k INNER JOIN cwe_cwe_keywords ck ON ck.keyword_id = k.id
+               WHERE ck.cwe_id = $1), '')), 'B') ||
+           setweight(to_tsvector('english', coalesce($3, '')), 'C');
+$$ LANGUAGE sql STABLE;
+
+CREATE FUNCTION cwe_cwe_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := cwe_cwe_search_vector(NEW.id, NEW.name, NEW.description);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER cwe_cwe_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description ON cwe_cwe
+    FOR EACH ROW EXECUTE PROCEDURE cwe_cwe_search_vector_trigger();
+
+CREATE FUNCTION cwe_cwe_keywords_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE cwe_cwe SET search_vector = cwe_cwe_search_vector(id, name, description)
+        WHERE id = OLD.cwe_id;
+    ELSE
+        UPDATE cwe_cwe SET search_vector = cwe_cwe_search_vector(id, name, description)
+        WHERE id = NEW.cwe_id;
+    END IF;
+    IF TG_OP = 'UPDATE' AND OLD.cwe_id <> NEW.cwe_id THEN
+        UPDATE cwe_cwe SET search_vector = cwe_cwe_search_vector(id, name, description)
+        WHERE id = OLD.cwe_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER cwe_cwe_keywords_search_vector_update
+    AFTER INSERT OR UPDATE OR DELETE ON cwe_cwe_keywords
+    FOR EACH ROW EXECUTE PROCEDURE cwe_cwe_keywords_search_vector_trigger();
+
+CREATE FUNCTION cwe_keyword_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    UPDATE cwe_cwe SET search_vector = cwe_cwe_search_vector(id, name, description)
+    WHERE id IN (SELECT cwe_id FROM cwe_cwe_keywords WHERE keyword_id = NEW.id);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER cwe_keyword_search_vector_update
+    AFTER UPDATE OF name ON cwe_keyword
+    FOR EACH ROW EXECUTE PROCEDURE cwe_keyword_search_vector_trigger();
+
+UPDATE cwe_cwe SET search_vector = cwe_cwe_search_vector(id, name, description);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS cwe_keyword_search_vector_update ON cwe_keyword;
+DROP FUNCTION IF EXISTS cwe_keyword_search_vector_trigger();
+DROP TRIGGER IF EXISTS cwe_cwe_keywords_search_vector_update ON cwe_cwe_keywords;
+DROP FUNCTION IF EXISTS cwe_cwe_keywords_search_vector_trigger();
+DROP TRIGGER IF EXISTS cwe_cwe_search_vector_update ON cwe_cwe;
+DROP FUNCTION IF EXISTS cwe_cwe_search_vector_trigger();
+DROP FUNCTION IF EXISTS cwe_cwe_search_vector(integer, text, text);
+DROP INDEX IF EXISTS cwe_cwe_search_vector_gin;
+ALTER TABLE cwe_cwe DROP COLUMN IF EXISTS search_vector;
+"""
+
+
+def create_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEARCH_VECTOR_SQL)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_VECTOR_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cwe', '0009_auto_20150618_1632'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+# The trigram index lets PostgreSQL search the CWE names with ILIKE '%...%' without scanning the whole
+# table. It needs the pg_trgm extension, which is not shipped with every PostgreSQL server: without
+# it the index is not created and the CWE lookups fall back to the plain name search.
+CREATE_TRIGRAM_INDEX_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX cwe_cwe_name_trgm ON cwe_cwe USING gin (name gin_trgm_ops);
+"""
+
+DROP_TRIGRAM_INDEX_SQL = """
+DROP INDEX IF EXISTS cwe_cwe_name_trgm;
+"""
+
+
+def is_pg_trgm_available(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql' and is_pg_trgm_available(schema_editor):
+        schema_editor.execute(CREATE_TRIGRAM_INDEX_SQL)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRIGRAM_INDEX_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cwe', '0010_cwe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
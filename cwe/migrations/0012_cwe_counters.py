@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cwe', '0011_cwe_name_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cwe',
+            name='misuse_case_count',
+            field=models.IntegerField(default=0, verbose_name=b'Misuse cases', editable=False),
+        ),
+        migrations.AddField(
+            model_name='cwe',
+            name='published_misuse_case_count',
+            field=models.IntegerField(default=0, verbose_name=b'Published misuse cases', editable=False),
+        ),
+    ]
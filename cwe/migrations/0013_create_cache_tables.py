@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+# The in-memory CWE search indexes publish their changes through a cache shared by the worker processes,
+# which is the database cache in the project settings. Its table is not a model, so it is created here
+# rather than by a separate "manage.py createcachetable" step. The tables which exist are kept.
+def create_cache_tables(apps, schema_editor):
+    call_command('createcachetable', database=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cwe', '0012_cwe_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,16 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.db import IntegrityError
-from base.models import BaseModel
+from base.models import BaseModel, CounterFieldsMixin
+from base.transaction import on_commit
 from django.utils.encoding import force_text
 from django.utils.translation import ugettext as _
-from django.db.models.signals import pre_delete, pre_save
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from cwe_search import CWESearchLocator
+from cwe_search import CWESearchLocator, cwe_keyword_index
+from cwe_bm25_search import cwe_bm25_index
+from cwe_typeahead import cwe_typeahead_index
+import cwe_fulltext_search  # Register the full-text CWE search algorithm
 
 class Category(BaseModel):
     name = models.CharField(max_length=128, unique=True)
@@ -60,12 +64,46 @@ def pre_save_keyword(sender, instance, *args, **kwargs):
             else:
                 instance.name = stemmed_name
 
-class CWE(BaseModel):
+
+# The in-memory CWE indexes are changed, and the changes published to the other processes, only once the
+# transaction making them is committed. This way a rolled back change never reaches the indexes, and the
+# other processes never rebuild their indexes from data which is not committed yet.
+
+@receiver(post_save, sender=Keyword, dispatch_uid='keyword_post_save_signal')
+def post_save_keyword(sender, instance, created, using, **kwargs):
+    """ Add the keyword to the in-memory keyword index, or rename it there """
+    keyword_id, name = instance.id, instance.name
+
+    def change():
+        cwe_keyword_index.keyword_saved(keyword_id, name)
+        cwe_bm25_index.changed()
+    on_commit(change, using)
+
+
+@receiver(post_delete, sender=Keyword, dispatch_uid='keyword_post_delete_signal')
+def post_delete_keyword(sender, instance, using, **kwargs):
+    """ Remove the keyword and its CWE relationships from the in-memory keyword index """
+    keyword_id = instance.id
+
+    def change():
+        cwe_keyword_index.keyword_deleted(keyword_id)
+        cwe_bm25_index.changed()
+    on_commit(change, using)
+
+
+class CWE(CounterFieldsMixin, BaseModel):
+    COUNTER_FIELDS = ('misuse_case_count', 'published_misuse_case_count')
+
     code = models.IntegerField(unique=True)
     name = models.CharField(max_length=128, db_index=True)
     description = models.TextField(null=True, blank=True)
     categories = models.ManyToManyField(Category, related_name='cwes')
     keywords = models.ManyToManyField(Keyword, related_name='cwes', blank=True)
+    # The counters are maintained by the signal receivers of the MUO app
+    misuse_case_count = models.IntegerField(default=0, editable=False,
+                                            verbose_name="Misuse cases")
+    published_misuse_case_count = models.IntegerField(default=0, editable=False,
+                                                      verbose_name="Published misuse cases")
 
     class Meta:
         verbose_name = "CWE"
@@ -86,4 +124,59 @@ def pre_delete_cwe(sender, instance, using, **kwargs):
             _('The %(name)s "%(obj)s" cannot be deleted as there are misuse cases referring to it!') % {
                 'name': force_text(instance._meta.verbose_name),
                 'obj': force_text(instance.__unicode__()),
-            })
\ No newline at end of file
+            })
+
+
+@receiver(post_save, sender=CWE, dispatch_uid='cwe_post_save_signal')
+def post_save_cwe(sender, instance, created, using, **kwargs):
+    """
+    Rebuild the in-memory BM25 and typeahead indexes on their next use as the code, the name or the
+    description might have changed
+    """
+    def change():
+        cwe_bm25_index.changed()
+        cwe_typeahead_index.changed()
+    on_commit(change, using)
+
+
+@receiver(post_delete, sender=CWE, dispatch_uid='cwe_post_delete_signal')
+def post_delete_cwe(sender, instance, using, **kwargs):
+    """ Remove the CWE and its keyword relationships from the in-memory keyword index """
+    cwe_id = instance.id
+
+    def change():
+        cwe_keyword_index.cwe_deleted(cwe_id)
+        cwe_bm25_index.changed()
+        cwe_typeahead_index.changed()
+    on_commit(change, using)
+
+
+@receiver(m2m_changed, sender=CWE.keywords.through, dispatch_uid='cwe_keywords_m2m_changed_signal')
+def m2m_changed_cwe_keywords(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+    Apply the keywords added to or removed from the CWEs to the in-memory keyword index.
+    'instance' is a CWE and 'pk_set' has keyword IDs, unless the change is made from the keyword side.
+    """
+    if action in ('post_add', 'post_remove'):
+        if reverse:
+            pairs = [(cwe_id, instance.id) for cwe_id in pk_set]
+        else:
+            pairs = [(instance.id, keyword_id) for keyword_id in pk_set]
+
+        if action == 'post_add':
+            change_keyword_index = lambda: cwe_keyword_index.keywords_added(pairs)
+        else:
+            change_keyword_index = lambda: cwe_keyword_index.keywords_removed(pairs)
+    elif action == 'post_clear':
+        instance_id = instance.id
+        if reverse:
+            change_keyword_index = lambda: cwe_keyword_index.keyword_cwes_cleared(instance_id)
+        else:
+            change_keyword_index = lambda: cwe_keyword_index.cwe_keywords_cleared(instance_id)
+    else:
+        return
+
+    def change():
+        change_keyword_index()
+        cwe_bm25_index.changed()
+    on_commit(change, using)
@@ -0,0 +1,26 @@
+from django.conf import settings
+
+# The alias of the cache through which the in-memory CWE search indexes publish their generation
+# counters. In production this should be a cache shared by all the worker processes (e.g. memcached or
+# the database cache), so that every process notices the changes made by the others. With a cache local
+# to each process, such as the default LocMemCache, a process never notices the changes made by the
+# others, which is why the "cwe.W001" system check warns about it.
+CWE_SEARCH_INDEX_CACHE = getattr(settings, "CWE_SEARCH_INDEX_CACHE", "default")
+
+# The number of seconds during which a process trusts the last value it read of the generation counter
+# of an in-memory CWE search index, rather than reading it from CWE_SEARCH_INDEX_CACHE on every search.
+# The changes made by the other processes are noticed after at most this delay. The changes made by the
+# process itself are noticed immediately.
+CWE_SEARCH_INDEX_CHECK_INTERVAL = getattr(settings, "CWE_SEARCH_INDEX_CHECK_INTERVAL", 1)
+
+# The priority with which the BM25 CWE search algorithm registers with the CWESearchLocator.
+# It is not registered when the priority is None, so the keyword index search stays the default.
+CWE_SEARCH_BM25_PRIORITY = getattr(settings, "CWE_SEARCH_BM25_PRIORITY", None)
+
+# The maximum number of words whose stemmed form is kept in memory by the CWE search algorithms
+CWE_SEARCH_STEM_CACHE_SIZE = getattr(settings, "CWE_SEARCH_STEM_CACHE_SIZE", 10000)
+
+# The priority with which the PostgreSQL full-text CWE search algorithm registers with the
+# CWESearchLocator. It is not registered when the priority is None. On the other databases the
+# algorithm falls back to the keyword index search.
+CWE_SEARCH_FULLTEXT_PRIORITY = getattr(settings, "CWE_SEARCH_FULLTEXT_PRIORITY", None)
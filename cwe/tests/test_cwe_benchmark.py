@@ -0,0 +1,77 @@
+from collections import OrderedDict
+import json
+import os
+import tempfile
+from StringIO import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from cwe.management.commands.benchmark_cwe_search import percentile
+from cwe.models import CWE, Keyword
+
+
+class CWESearchBenchmarkTest(TestCase):
+    """
+    This class is the test suite to test the CWE search benchmark command
+    """
+
+    def _benchmark(self, *args):
+        stdout = StringIO()
+        call_command('benchmark_cwe_search', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def _benchmark_report(self, *args):
+        return json.loads(self._benchmark(*args), object_pairs_hook=OrderedDict)
+
+    def test_report(self):
+        """ Every benchmarked algorithm should be reported with its latency, queries and overlap """
+        report = self._benchmark_report('--cwes', '50', '--keywords', '80', '--repeat', '1', '--top-k', '100',
+                                        '--provider', 'keyword', '--provider', 'keyword_index')
+        self.assertEqual(report['top_k'], 100)
+        self.assertEqual(report['catalogue']['cwes'], 50)
+        self.assertEqual(report['catalogue']['keywords'], 80)
+        self.assertEqual(report['corpus']['texts'], 40)
+        self.assertEqual(list(report['providers']), ['keyword', 'keyword_index'])
+
+        for name, result in report['providers'].items():
+            self.assertEqual(result['searches'], 40)
+            latency = result['latency_ms']
+            self.assertTrue(latency['p50'] <= latency['p95'] <= latency['p99'])
+
+        # The keyword index search scores in memory and only loads the CWEs found
+        self.assertTrue(report['providers']['keyword_index']['queries_per_search'] <=
+                        report['providers']['keyword']['queries_per_search'])
+        # Both algorithms count the keywords found in the text, so they find the same CWEs
+        self.assertEqual(report['providers']['keyword']['top_k_overlap'], {'keyword_index': 1.0})
+
+    def test_catalogue_rolled_back(self):
+        """ The synthetic catalogue should not be left in the database """
+        self._benchmark('--cwes', '20', '--keywords', '20', '--repeat', '1', '--provider', 'keyword')
+        self.assertEqual(CWE.objects.count(), 0)
+        self.assertEqual(Keyword.objects.count(), 0)
+
+    def test_output_file(self):
+        """ The results should be written to the output file when one is given """
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            self._benchmark('--cwes', '10', '--keywords', '10', '--repeat', '1', '--provider', 'bm25',
+                            '--output', path)
+            with open(path) as output_file:
+                report = json.load(output_file)
+            self.assertEqual(list(report['providers']), ['bm25'])
+        finally:
+            os.remove(path)
+
+    def test_invalid_arguments(self):
+        """ A CommandError should be raised for invalid arguments """
+        self.assertRaises(CommandError, self._benchmark, '--cwes', '0')
+        self.assertRaises(CommandError, self._benchmark, '--corpus', '/nonexistent/corpus.txt')
+
+    def test_percentile(self):
+        """ The percentiles should be computed with the nearest-rank method """
+        values = range(1, 101)
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
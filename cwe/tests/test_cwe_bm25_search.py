@@ -0,0 +1,93 @@
+from django.test import TransactionTestCase
+from cwe.cwe_bm25_search import CWEBM25Search, cwe_bm25_index
+from cwe.models import CWE, Keyword
+
+
+class CWEBM25SearchTest(TransactionTestCase):
+    """
+    This class is the test suite to test the BM25 CWE search algorithm. The tests are not run in a
+    transaction, as the in-memory BM25 index is only rebuilt once the changes are committed.
+    """
+
+    def setUp(self):
+        # The in-memory BM25 index is not rolled back with the database after each test case
+        cwe_bm25_index.invalidate()
+        self.construct_test_database()
+        self.cwe_bm25_search = CWEBM25Search()
+
+    def construct_test_database(self):
+        inject = Keyword(name='inject')
+        inject.save()
+        sql = Keyword(name='sql')
+        sql.save()
+        upload = Keyword(name='upload')
+        upload.save()
+
+        cwe = CWE(code=89, name='SQL Injection',
+                  description='The software constructs an SQL command from externally-influenced input.')
+        cwe.save()
+        cwe.keywords.add(inject, sql)
+
+        cwe = CWE(code=94, name='Code Injection',
+                  description='The software constructs a code segment from externally-influenced input.')
+        cwe.save()
+        cwe.keywords.add(inject)
+
+        cwe = CWE(code=434, name='Unrestricted Upload of File with Dangerous Type',
+                  description='The software allows the upload of dangerous files.')
+        cwe.save()
+        cwe.keywords.add(upload)
+
+        cwe = CWE(code=79, name='Cross-site Scripting',
+                  description='The software does not neutralize user-controllable input placed in a web page.')
+        cwe.save()
+
+    def _search_codes(self, text, max_results=None):
+        return [cwe.code for cwe, score in self.cwe_bm25_search.search_cwes(text, max_results)]
+
+    def test_ranking(self):
+        """ The CWEs matching more and rarer terms should be ranked first """
+        text = "This module exploits a stacked SQL injection in order to add an administrator account."
+        self.assertEqual(self._search_codes(text), [89, 94])
+
+    def test_name_and_description_are_searched(self):
+        """ The CWEs without keywords should be found through their name and description """
+        self.assertEqual(self._search_codes("A cross-site scripting flaw in the web page."), [79])
+
+    def test_ties_broken_by_code(self):
+        """ The CWEs with the same score should be ordered by their code """
+        cwe = CWE(code=1, name='Code Injection',
+                  description='The software constructs a code segment from externally-influenced input.')
+        cwe.save()
+        cwe.keywords.add(Keyword.objects.get(name='inject'))
+        results = self.cwe_bm25_search.search_cwes("code")
+        self.assertEqual([cwe.code for cwe, score in results], [1, 94])
+        self.assertEqual(results[0][1], results[1][1])
+
+    def test_max_results(self):
+        """ Only the 'max_results' best CWEs should be returned """
+        text = "This module exploits a stacked SQL injection in order to add an administrator account."
+        self.assertEqual(self._search_codes(text, max_results=1), [89])
+
+    def test_search_with_single_query(self):
+        """ Once the index is built, only the returned CWEs should be loaded from the database """
+        text = "This module exploits a stacked SQL injection in order to add an administrator account."
+        expected = self.cwe_bm25_search.search_cwes(text)  # Build the index
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cwe_bm25_search.search_cwes(text), expected)
+
+    def test_index_rebuilt_after_change(self):
+        """ The index should reflect the CWEs changed after it was built """
+        self.assertEqual(self._search_codes("buffer overflow"), [])
+        cwe = CWE.objects.get(code=79)
+        cwe.description = 'A buffer overflow.'
+        cwe.save()
+        self.assertEqual(self._search_codes("buffer overflow"), [79])
+        cwe.delete()
+        self.assertEqual(self._search_codes("buffer overflow"), [])
+
+    def test_invalid_text(self):
+        """ Empty texts should return nothing and non-string texts should be rejected """
+        self.assertEqual(self.cwe_bm25_search.search_cwes(None), [])
+        self.assertEqual(self.cwe_bm25_search.search_cwes(""), [])
+        self.assertRaises(ValueError, self.cwe_bm25_search.search_cwes, 123)
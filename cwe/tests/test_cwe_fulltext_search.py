@@ -0,0 +1,104 @@
+from unittest import skipIf, skipUnless
+from django.db import connection
+from django.test import TestCase
+from cwe.cwe_fulltext_search import CWEFullTextSearch, to_or_tsquery
+from cwe.cwe_search import CWEKeywordIndexSearch, cwe_keyword_index
+from cwe.models import CWE, Keyword
+
+
+IS_POSTGRESQL = connection.vendor == 'postgresql'
+
+
+class TsqueryTest(TestCase):
+    """
+    This class is the test suite to test the forming of the tsqueries
+    """
+
+    def test_or_tsquery(self):
+        """ The words should be split on underscores, lowered and deduplicated """
+        self.assertEqual(to_or_tsquery(['SQL', 'stacked_sql', 'inject']), 'sql | stacked | inject')
+
+    def test_or_tsquery_without_words(self):
+        """ No tsquery should be formed when there is no word """
+        self.assertIsNone(to_or_tsquery([]))
+        self.assertIsNone(to_or_tsquery(['_']))
+
+
+class CWEFullTextSearchTest(TestCase):
+    """
+    This class is the test suite to test the full-text CWE search algorithm
+    """
+
+    def setUp(self):
+        # The in-memory keyword index used by the fallback is not rolled back with the database
+        cwe_keyword_index.invalidate()
+        self.construct_test_database()
+        self.cwe_fulltext_search = CWEFullTextSearch()
+
+    def construct_test_database(self):
+        inject = Keyword(name='inject')
+        inject.save()
+        sql = Keyword(name='sql')
+        sql.save()
+        upload = Keyword(name='upload')
+        upload.save()
+
+        cwe = CWE(code=89, name='SQL Injection',
+                  description='The software constructs an SQL command from externally-influenced input.')
+        cwe.save()
+        cwe.keywords.add(inject, sql)
+
+        cwe = CWE(code=94, name='Code Injection',
+                  description='The software constructs a code segment from externally-influenced input.')
+        cwe.save()
+        cwe.keywords.add(inject)
+
+        cwe = CWE(code=434, name='Unrestricted Upload of File with Dangerous Type',
+                  description='The software allows the upload of dangerous files.')
+        cwe.save()
+        cwe.keywords.add(upload)
+
+    def _search_codes(self, text, max_results=None):
+        return [cwe.code for cwe, score in self.cwe_fulltext_search.search_cwes(text, max_results)]
+
+    def test_empty_text(self):
+        """ No CWE should be found for None or an empty string """
+        self.assertEqual(self.cwe_fulltext_search.search_cwes(None), [])
+        self.assertEqual(self.cwe_fulltext_search.search_cwes(''), [])
+
+    def test_invalid_text(self):
+        """ A ValueError should be raised when the text is not a string """
+        self.assertRaises(ValueError, self.cwe_fulltext_search.search_cwes, 42)
+
+    @skipIf(IS_POSTGRESQL, "The search only falls back on the databases other than PostgreSQL")
+    def test_fallback(self):
+        """ The results of the fallback search algorithm should be returned """
+        texts = ["A stacked SQL injection", "An arbitrary file upload", None]
+        self.assertEqual(self.cwe_fulltext_search.search_cwes_many(texts, 2),
+                         CWEKeywordIndexSearch().search_cwes_many(texts, 2))
+
+    @skipUnless(IS_POSTGRESQL, "The full-text search vector only exists on PostgreSQL")
+    def test_ranking(self):
+        """ The CWEs matching more terms in the heavier fields should be ranked first """
+        self.assertEqual(self._search_codes("A stacked SQL injection"), [89, 94])
+        self.assertEqual(self._search_codes("A stacked SQL injection", 1), [89])
+
+    @skipUnless(IS_POSTGRESQL, "The full-text search vector only exists on PostgreSQL")
+    def test_search_vector_follows_changes(self):
+        """ The search vector should be updated when the CWEs, their keywords and the keywords change """
+        cwe = CWE.objects.get(code=434)
+        self.assertEqual(self._search_codes("A malicious archive"), [])
+
+        cwe.keywords.add(Keyword.objects.create(name='archiv'))
+        self.assertEqual(self._search_codes("A malicious archive"), [434])
+
+        Keyword.objects.filter(name='archiv').update(name='zip')
+        self.assertEqual(self._search_codes("A malicious archive"), [])
+        self.assertEqual(self._search_codes("A malicious zip"), [434])
+
+        cwe.keywords.clear()
+        self.assertEqual(self._search_codes("A malicious zip"), [])
+
+        cwe.name = 'Unrestricted Upload of Archive'
+        cwe.save()
+        self.assertEqual(self._search_codes("A malicious archive"), [434])
@@ -0,0 +1,69 @@
+from django.test import TestCase, RequestFactory
+from cwe.autocomplete_registry import CWEAutocomplete
+from cwe.cwe_lookup import lookup_cwes, lookup_cwes_by_name
+from cwe.models import CWE
+
+
+class CWELookupTest(TestCase):
+    """
+    This class is the test suite to test the CWE lookup service shared by the CWE search views
+    """
+
+    def setUp(self):
+        CWE(code=89, name='SQL Injection').save()
+        CWE(code=94, name='Code Injection').save()
+        CWE(code=434, name='Unrestricted Upload of File with Dangerous Type').save()
+        CWE(code=943, name='Improper Neutralization of Special Elements in Data Query Logic').save()
+        CWE(code=1000, name='Research Concepts 94').save()
+
+    def _codes(self, cwes):
+        return [cwe.code for cwe in cwes]
+
+    def test_no_search_string(self):
+        """ All the CWEs should be returned when there is no search string """
+        self.assertEqual(lookup_cwes(None).count(), 5)
+        self.assertEqual(lookup_cwes('').count(), 5)
+
+    def test_name(self):
+        """ The CWEs whose name contains the string should be found, whatever the case """
+        self.assertEqual(sorted(self._codes(lookup_cwes('injection'))), [89, 94])
+        self.assertEqual(self._codes(lookup_cwes('UPLOAD')), [434])
+        self.assertEqual(self._codes(lookup_cwes('overflow')), [])
+
+    def test_code_or_name(self):
+        """ The CWE with the code should be returned first, followed by the ones with the code in their name """
+        self.assertEqual(self._codes(lookup_cwes('94')), [94, 1000])
+
+    def test_code_prefix(self):
+        """ The CWEs whose code starts with the string should be found when asked for """
+        self.assertEqual(self._codes(lookup_cwes('94', match_code_prefix=True)), [94, 943, 1000])
+
+    def test_not_a_code(self):
+        """ The non-ASCII digits and the numbers too large for a code should only be searched in the names """
+        CWE(code=95, name=u'Injection \xb2').save()
+        self.assertEqual(self._codes(lookup_cwes(u'\xb2')), [95])
+        self.assertEqual(self._codes(lookup_cwes(u'\xb2', match_code_prefix=True)), [95])
+        self.assertEqual(self._codes(lookup_cwes('94' * 20)), [])
+        self.assertEqual(self._codes(lookup_cwes('94' * 20, match_code_prefix=True)), [])
+
+    def test_name_only(self):
+        """ The codes should not be searched when only the names are looked up """
+        self.assertEqual(self._codes(lookup_cwes_by_name('94')), [1000])
+
+    def test_queryset(self):
+        """ Only the CWEs of the given queryset should be searched """
+        self.assertEqual(self._codes(lookup_cwes('injection', CWE.objects.exclude(code=89))), [94])
+
+    def test_autocomplete(self):
+        """ The CWE autocomplete should find the CWEs through the lookup service """
+        request = RequestFactory().get('/', {'q': '94'})
+        autocomplete = CWEAutocomplete(request=request)
+        self.assertEqual(self._codes(autocomplete.choices_for_request()), [94, 943, 1000])
+
+    def test_autocomplete_not_a_code(self):
+        """ The CWE autocomplete should not fail on the strings which are not codes """
+        for q in (u'\xb2', '9' * 30):
+            request = RequestFactory().get('/', {'q': q})
+            autocomplete = CWEAutocomplete(request=request)
+            self.assertEqual(self._codes(autocomplete.choices_for_request()), [])
+
@@ -1,12 +1,20 @@
-from django.test import TestCase
-from cwe.cwe_search import CWESearchLocator, CWEKeywordSearch
+from django.test import TestCase, TransactionTestCase
+from cwe.cwe_search import CWESearchLocator, CWEKeywordSearch, CWEKeywordIndexSearch, StemCache, cwe_keyword_index
+from cwe.cwe_search import CWESearchBase, iter_words, GenerationCounter, STOP_WORDS
+from cwe.settings import CWE_SEARCH_INDEX_CACHE
+from nltk.stem.porter import PorterStemmer
+from mock import patch
 from cwe.models import *
+from django.db import IntegrityError, transaction
+from django.conf import settings
+from django.core.management import call_command
 
 # Create your tests here.
 
-class CWESearchTest(TestCase):
+class CWESearchTest(TransactionTestCase):
     """
-    This class is the test suite to test the methods of the CWESearchLocator class
+    This class is the test suite to test the methods of the CWESearchLocator class. The tests are not run
+    in a transaction, as the in-memory keyword index only follows the changes once they are committed.
     """
 
     def setUp(self):
@@ -14,6 +22,8 @@ class CWESearchTest(TestCase):
         :param text: None
         :return: None
         """
+        # The in-memory keyword index is not rolled back with the database after each test case
+        cwe_keyword_index.invalidate()
         self.construct_test_database()
         self.cwe_keyword_search_obj = CWESearchLocator.get_instance()
 
@@ -136,34 +146,41 @@ class CWESearchTest(TestCase):
         some different test case.
         """
 
-        # Note: Do not register with priority '1' because a default object of CWEKeywordSearch
-        # is already registered in the init module (Refer __init__.py).
+        # Note: Do not register with the priorities of the default objects that are already
+        # registered in the cwe_search module. Always register above the current highest priority.
+        highest_priority = CWESearchLocator.highest_priority
+        service_provider = CWESearchLocator.service_provider
 
-        # 'register' should successfully register an object of a concrete class of
-        # the CWESearchBase and return 'True'
-        cwe_keyword_search = CWEKeywordSearch()
-        self.assertEqual(CWESearchLocator.register(cwe_keyword_search, 2), True)
-
-        # 'get_cwe_search' should return the object registered with highest priority
-        self.assertEqual(CWESearchLocator.get_instance(), cwe_keyword_search)
-
-        # 'register' should successfully register an object of a concrete class of
-        # the CWESearchBase with the priority higher than that of the already registered
-        # object and return 'True'
-        cwe_keyword_search2 = CWEKeywordSearch()
-        self.assertEqual(CWESearchLocator.register(cwe_keyword_search2, 3), True)
-
-        # 'register' should not register an object of a concrete class of
-        # the CWESearchBase with the priority equal to the priority of the already
-        # registered object and return 'False'
-        cwe_keyword_search3 = CWEKeywordSearch()
-        self.assertEqual(CWESearchLocator.register(cwe_keyword_search3, 3), False)
-
-        # 'register' should not register an object of a concrete class of
-        # the CWESearchBase with the priority lower than the priority of the already
-        # registered object and return 'False'
-        cwe_keyword_search2 = CWEKeywordSearch()
-        self.assertEqual(CWESearchLocator.register(cwe_keyword_search2, 1), False)
+        try:
+            # 'register' should successfully register an object of a concrete class of
+            # the CWESearchBase and return 'True'
+            cwe_keyword_search = CWEKeywordSearch()
+            self.assertEqual(CWESearchLocator.register(cwe_keyword_search, highest_priority + 1), True)
+
+            # 'get_cwe_search' should return the object registered with highest priority
+            self.assertEqual(CWESearchLocator.get_instance(), cwe_keyword_search)
+
+            # 'register' should successfully register an object of a concrete class of
+            # the CWESearchBase with the priority higher than that of the already registered
+            # object and return 'True'
+            cwe_keyword_search2 = CWEKeywordSearch()
+            self.assertEqual(CWESearchLocator.register(cwe_keyword_search2, highest_priority + 2), True)
+
+            # 'register' should not register an object of a concrete class of
+            # the CWESearchBase with the priority equal to the priority of the already
+            # registered object and return 'False'
+            cwe_keyword_search3 = CWEKeywordSearch()
+            self.assertEqual(CWESearchLocator.register(cwe_keyword_search3, highest_priority + 2), False)
+
+            # 'register' should not register an object of a concrete class of
+            # the CWESearchBase with the priority lower than the priority of the already
+            # registered object and return 'False'
+            cwe_keyword_search2 = CWEKeywordSearch()
+            self.assertEqual(CWESearchLocator.register(cwe_keyword_search2, 1), False)
+        finally:
+            # Restore the default service provider for the other test cases
+            CWESearchLocator.highest_priority = highest_priority
+            CWESearchLocator.service_provider = service_provider
 
 
     def test_registration_with_service_locator_with_instance_not_of_type_CWESearchBase(self):
@@ -321,6 +338,27 @@ class CWESearchTest(TestCase):
 
 
 
+    def test_remove_stopwords_from_chunks(self):
+        """ This test case tests that a text given in chunks is tokenized like the whole text
+        :param text: None
+        :return: None
+        """
+        text = "The file upload_file.php contains no session or file validation!"
+        expected = self.cwe_keyword_search_obj.remove_stopwords(text)
+        chunks = [text[i:i + 5] for i in range(0, len(text), 5)]
+        self.assertEqual(list(self.cwe_keyword_search_obj.iter_filtered_words(iter(chunks))), expected)
+        self.assertEqual(list(iter_words(chunks)), list(iter_words(text)))
+        self.assertEqual(list(iter_words(["upload_", "file", ".php"])), ['upload_file', 'php'])
+
+    def test_stop_words_loaded_once(self):
+        """ This test case tests that the stop words are shared as a frozenset by all the instances
+        :param text: None
+        :return: None
+        """
+        self.assertIsInstance(STOP_WORDS, frozenset)
+        self.assertIn('the', STOP_WORDS)
+        self.assertIs(CWEKeywordSearch().stop_words, STOP_WORDS)
+
     def test_suggested_keywords_sorted_by_frequency(self):
         """ This test case tests the algorithm that it returns suggested keywords sorted by the frequency in the text
         :param text: None
@@ -333,3 +371,276 @@ class CWESearchTest(TestCase):
         keywords = self.cwe_keyword_search_obj.stem_text(filtered_words)
 
         self.assertEqual(keywords, expected)
+
+
+class CWEKeywordIndexSearchTest(CWESearchTest):
+    """
+    This class runs the CWESearchTest test suite against the CWEKeywordIndexSearch algorithm and
+    checks that it agrees with CWEKeywordSearch without querying the database for scoring.
+    """
+
+    def setUp(self):
+        cwe_keyword_index.invalidate()
+        self.construct_test_database()
+        self.cwe_keyword_search_obj = CWEKeywordIndexSearch()
+
+    def test_default_service_provider(self):
+        """ The index based algorithm should be registered with a higher priority than CWEKeywordSearch """
+        self.assertIsInstance(CWESearchLocator.get_instance(), CWEKeywordIndexSearch)
+
+    def test_same_match_counts_as_keyword_search(self):
+        """ Both algorithms should find the same CWEs with the same match counts """
+        text = "This module exploits a code injection in the XML parser to execute a remote SQL injection."
+        expected = sorted((cwe.code, count) for cwe, count in CWEKeywordSearch().search_cwes(text))
+        results = sorted((cwe.code, count) for cwe, count in self.cwe_keyword_search_obj.search_cwes(text))
+        self.assertEqual(results, expected)
+
+    def test_search_with_single_query(self):
+        """ Once the index is built, only the returned CWEs should be loaded from the database """
+        text = "This module exploits a code injection in the XML parser to execute a remote SQL injection."
+        expected = self.cwe_keyword_search_obj.search_cwes(text)  # Build the index
+        with self.assertNumQueries(1):
+            results = self.cwe_keyword_search_obj.search_cwes(text)
+        self.assertEqual(results, expected)
+        self.assertEqual([count for cwe, count in results], sorted([count for cwe, count in results], reverse=True))
+
+    def test_search_with_max_results(self):
+        """ Only the 'max_results' best matches should be returned """
+        text = "This module exploits a code injection in the XML parser to execute a remote SQL injection."
+        results = self.cwe_keyword_search_obj.search_cwes(text, max_results=2)
+        self.assertEqual(len(results), 2)
+
+    def _search_codes(self, text):
+        return sorted(cwe.code for cwe, count in self.cwe_keyword_search_obj.search_cwes(text))
+
+    def test_index_updated_on_keywords_added_and_removed(self):
+        """ The index should reflect the keywords added to or removed from a CWE after it was built """
+        text = "This module uploads a malicious file."
+        self.assertEqual(self._search_codes(text), [103])
+
+        cwe = CWE.objects.get(code=106)
+        cwe.keywords.add(Keyword.objects.get(name='upload'), Keyword.objects.get(name='file'))
+        self.assertEqual(self._search_codes(text), [103, 106])
+
+        # Adding from the keyword side should be handled as well
+        Keyword.objects.get(name='upload').cwes.add(CWE.objects.get(code=100))
+        self.assertEqual(self._search_codes(text), [100, 103, 106])
+
+        cwe.keywords.remove(Keyword.objects.get(name='file'))
+        cwe.keywords.remove(Keyword.objects.get(name='upload'))
+        self.assertEqual(self._search_codes(text), [100, 103])
+
+        Keyword.objects.get(name='upload').cwes.clear()
+        self.assertEqual(self._search_codes(text), [103])
+
+        CWE.objects.get(code=103).keywords.clear()
+        self.assertEqual(self._search_codes(text), [])
+
+    def test_index_updated_on_keyword_renamed_and_deleted(self):
+        """ The index should reflect the keywords renamed or deleted after it was built """
+        self.assertEqual(self._search_codes("sql"), [100])
+
+        keyword = Keyword.objects.get(name='sql')
+        keyword.name = 'sequel'
+        keyword.save()
+        self.assertEqual(self._search_codes("sql"), [])
+        self.assertEqual(self._search_codes("sequel"), [100])
+
+        Keyword.objects.get(name='sequel').delete()
+        self.assertEqual(self._search_codes("sequel"), [])
+
+        # A keyword created with bulk_create() doesn't send post_save, but can still be added to CWEs
+        Keyword.objects.bulk_create([Keyword(name='sql')])
+        CWE.objects.get(code=100).keywords.add(Keyword.objects.get(name='sql'))
+        self.assertEqual(self._search_codes("sql"), [100])
+
+    def test_index_updated_on_cwe_deleted(self):
+        """ The index should not return the CWEs deleted after it was built """
+        self.assertEqual(self._search_codes("upload"), [103])
+        CWE.objects.get(code=103).delete()
+        self.assertEqual(self._search_codes("upload"), [])
+
+    def test_index_not_rebuilt_after_local_change(self):
+        """ A change made by this process should be applied to the index without rebuilding it """
+        text = "This module uploads a malicious file."
+        # The increments of the counter must be atomic to tell that no other process changed the keywords
+        with self.settings(CACHES=dict(settings.CACHES, **{CWE_SEARCH_INDEX_CACHE: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})):
+            self.cwe_keyword_search_obj.search_cwes(text)  # Build the index
+            CWE.objects.get(code=106).keywords.add(Keyword.objects.get(name='upload'))
+            with self.assertNumQueries(1):
+                self.assertEqual(self._search_codes(text), [103, 106])
+
+    def test_index_rebuilt_after_local_change_without_atomic_counter(self):
+        """ Without atomic increments, another process might have changed the keywords at the same time """
+        text = "This module uploads a malicious file."
+        with self.settings(CACHES=dict(settings.CACHES, **{CWE_SEARCH_INDEX_CACHE: {
+                'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_index_cache'}})):
+            call_command('createcachetable', verbosity=0)
+            self.cwe_keyword_search_obj.search_cwes(text)  # Build the index
+            CWE.objects.get(code=106).keywords.add(Keyword.objects.get(name='upload'))
+            with self.assertNumQueries(3):
+                self.assertEqual(self._search_codes(text), [103, 106])
+
+    def test_index_unchanged_on_rollback(self):
+        """ A change rolled back should neither reach the index nor be published to the other processes """
+        text = "This module uploads a malicious file."
+        self.assertEqual(self._search_codes(text), [103])
+        generation = cwe_keyword_index.generation.get()
+        try:
+            with transaction.atomic():
+                CWE.objects.get(code=106).keywords.add(Keyword.objects.get(name='upload'))
+                raise IntegrityError()
+        except IntegrityError:
+            pass
+        self.assertEqual(cwe_keyword_index.generation.get(), generation)
+        self.assertEqual(self._search_codes(text), [103])
+
+    def test_change_published_after_commit(self):
+        """ A change should only be applied and published once its transaction is committed """
+        text = "This module uploads a malicious file."
+        self.assertEqual(self._search_codes(text), [103])
+        generation = cwe_keyword_index.generation.get()
+        with transaction.atomic():
+            CWE.objects.get(code=106).keywords.add(Keyword.objects.get(name='upload'))
+            with transaction.atomic():
+                CWE.objects.get(code=100).keywords.add(Keyword.objects.get(name='upload'))
+            self.assertEqual(cwe_keyword_index.generation.get(), generation)
+        self.assertNotEqual(cwe_keyword_index.generation.get(), generation)
+        self.assertEqual(self._search_codes(text), [100, 103, 106])
+
+    def test_change_dropped_on_savepoint_rollback(self):
+        """ A change rolled back with its savepoint should be dropped, but not the rest of the transaction """
+        text = "This module uploads a malicious file."
+        self.assertEqual(self._search_codes(text), [103])
+        with transaction.atomic():
+            CWE.objects.get(code=106).keywords.add(Keyword.objects.get(name='upload'))
+            try:
+                with transaction.atomic():
+                    CWE.objects.get(code=100).keywords.add(Keyword.objects.get(name='upload'))
+                    raise IntegrityError()
+            except IntegrityError:
+                pass
+        self.assertEqual(self._search_codes(text), [103, 106])
+
+    def test_index_rebuilt_after_change_by_another_process(self):
+        """ A change published by another process through the generation counter should rebuild the index """
+        text = "This module uploads a malicious file."
+        self.cwe_keyword_search_obj.search_cwes(text)  # Build the index
+        cwe_keyword_index.generation.increment()
+        with self.assertNumQueries(3):
+            self.cwe_keyword_search_obj.search_cwes(text)
+        with self.assertNumQueries(1):
+            self.cwe_keyword_search_obj.search_cwes(text)
+
+
+class MinimalCWESearch(CWESearchBase):
+    """
+    A search algorithm implementing only the abstract methods of CWESearchBase
+    """
+
+    def search_cwes(self, text, max_results=None):
+        return [(text, 1)][:max_results]
+
+    def remove_stopwords(self, text):
+        return text.split()
+
+    def stem_text(self, text):
+        return self.stem_many(text)
+
+
+class CWESearchBaseTest(TestCase):
+    """
+    This class is the test suite to test the default implementations of the CWESearchBase methods
+    """
+
+    def test_search_cwes_many(self):
+        """ The texts should be searched one by one, in the same order """
+        self.assertEqual(MinimalCWESearch().search_cwes_many(['a', 'b']), [[('a', 1)], [('b', 1)]])
+        self.assertEqual(MinimalCWESearch().search_cwes_many(['a'], max_results=0), [[]])
+
+    def test_stem_many(self):
+        """ The words should be stemmed one by one with the Porter stemmer, in the same order """
+        words = ['files', 'injection', 'files']
+        stemmer = PorterStemmer()
+        self.assertEqual(MinimalCWESearch().stem_many(words), [stemmer.stem(word) for word in words])
+
+
+class StemCacheTest(TestCase):
+    """
+    This class is the test suite to test the memoized Porter stemmer
+    """
+
+    WORDS = ['authentication', 'bypassing', 'injection', 'authentication', 'files', 'injection']
+
+    def test_same_stems_as_porter_stemmer(self):
+        """ The memoized stems should be the ones of the Porter stemmer, in the same order """
+        stemmer = PorterStemmer()
+        self.assertEqual(StemCache().stem_many(self.WORDS), [stemmer.stem(word) for word in self.WORDS])
+
+    def test_hits_and_misses(self):
+        """ Every distinct word should be stemmed once, and found in the cache after that """
+        stem_cache = StemCache()
+        stem_cache.stem_many(self.WORDS)
+        self.assertEqual((stem_cache.hits, stem_cache.misses), (2, 4))
+        self.assertEqual(stem_cache.stem('files'), 'file')
+        self.assertEqual((stem_cache.hits, stem_cache.misses), (3, 4))
+
+        stem_cache.clear()
+        self.assertEqual((len(stem_cache), stem_cache.hits, stem_cache.misses), (0, 0, 0))
+
+    def test_least_recently_used_word_evicted(self):
+        """ The cache should not grow beyond its maximum size and evict the least recently used words """
+        stem_cache = StemCache(max_size=2)
+        stem_cache.stem_many(['files', 'injection'])
+        stem_cache.stem('files')  # 'injection' is now the least recently used word
+        stem_cache.stem('bypassing')
+        self.assertEqual(len(stem_cache), 2)
+
+        misses = stem_cache.misses
+        stem_cache.stem('files')
+        self.assertEqual(stem_cache.misses, misses)
+        stem_cache.stem('injection')
+        self.assertEqual(stem_cache.misses, misses + 1)
+
+
+class GenerationCounterTest(TestCase):
+    """
+    This class is the test suite for the generation counters published through the cache
+    """
+
+    def test_value_trusted_during_check_interval(self):
+        """ The changes of the other processes should be noticed once the check interval has elapsed """
+        counter = GenerationCounter('test_generation', check_interval=1)
+        other_process_counter = GenerationCounter('test_generation')
+        with patch('cwe.cwe_search.time.time', return_value=1000.0):
+            generation = counter.get()
+            other_process_counter.increment()
+        with patch('cwe.cwe_search.time.time', return_value=1000.9):
+            self.assertEqual(counter.get(), generation)
+        with patch('cwe.cwe_search.time.time', return_value=1001.0):
+            self.assertNotEqual(counter.get(), generation)
+
+    def test_own_increment_seen_immediately(self):
+        """ The changes of this process should be noticed without waiting for the check interval """
+        counter = GenerationCounter('test_generation', check_interval=1)
+        generation = counter.get()
+        new_generation = counter.increment()
+        self.assertNotEqual(new_generation, generation)
+        self.assertEqual(counter.get(), new_generation)
+
+
+class SearchIndexCacheCheckTest(TestCase):
+    """
+    This class is the test suite for the system check of the cache of the CWE search index generations
+    """
+
+    def test_local_cache_warning(self):
+        """ A cache local to each process should be reported, but not a cache shared by the processes """
+        from cwe.checks import check_search_index_cache
+        with self.settings(CACHES={CWE_SEARCH_INDEX_CACHE: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([warning.id for warning in check_search_index_cache(None)], ['cwe.W001'])
+        with self.settings(CACHES={CWE_SEARCH_INDEX_CACHE: {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                                            'LOCATION': 'cache_table'}}):
+            self.assertEqual(check_search_index_cache(None), [])
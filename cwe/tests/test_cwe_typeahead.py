@@ -0,0 +1,107 @@
+import json
+from django.core.urlresolvers import reverse
+from django.test import TestCase, TransactionTestCase
+from cwe.cwe_typeahead import PrefixTrie, cwe_typeahead_index
+from cwe.models import CWE
+
+
+class PrefixTrieTest(TestCase):
+    """
+    This class is the test suite to test the array-backed prefix trie
+    """
+
+    def setUp(self):
+        self.trie = PrefixTrie([(u'injection', 0), (u'input', 1), (u'inject', 2), (u'sql', 0), (u'in', 3)])
+
+    def test_find(self):
+        """ The documents of all the keys starting with the prefix should be found, sorted """
+        self.assertEqual(list(self.trie.find(u'inj')), [0, 2])
+        self.assertEqual(list(self.trie.find(u'in')), [0, 1, 2, 3])
+        self.assertEqual(list(self.trie.find(u'injection')), [0])
+
+    def test_find_empty_prefix(self):
+        """ All the documents should be found for an empty prefix """
+        self.assertEqual(list(self.trie.find(u'')), [0, 1, 2, 3])
+
+    def test_find_missing(self):
+        """ No document should be found when no key starts with the prefix """
+        self.assertEqual(list(self.trie.find(u'injections')), [])
+        self.assertEqual(list(self.trie.find(u'x')), [])
+        self.assertEqual(list(PrefixTrie([]).find(u'a')), [])
+
+
+class CWETypeaheadIndexTest(TransactionTestCase):
+    """
+    This class is the test suite to test the in-memory CWE typeahead index. The tests are not run in a
+    transaction, as the index is only rebuilt once the changes are committed.
+    """
+
+    def setUp(self):
+        # The in-memory typeahead index is not rolled back with the database after each test case
+        cwe_typeahead_index.invalidate()
+        CWE(code=89, name='SQL Injection').save()
+        CWE(code=94, name='Code Injection').save()
+        CWE(code=943, name='Improper Neutralization of Special Elements in Data Query Logic').save()
+        CWE(code=1000, name='Research Concepts 94').save()
+        CWE(code=79, name='Cross-site Scripting').save()
+
+    def _search_codes(self, query, offset=0, limit=10):
+        count, cwes = cwe_typeahead_index.search(query, offset, limit)
+        return count, [code for cwe_id, code, name in cwes]
+
+    def test_no_query(self):
+        """ All the CWEs should be found, sorted by their code """
+        self.assertEqual(self._search_codes(None), (5, [79, 89, 94, 943, 1000]))
+        self.assertEqual(self._search_codes(' - '), (5, [79, 89, 94, 943, 1000]))
+
+    def test_name_words(self):
+        """ Every word of the query should start a word of the CWE name, whatever the case """
+        self.assertEqual(self._search_codes('inj'), (2, [89, 94]))
+        self.assertEqual(self._search_codes('INJECTION code'), (1, [94]))
+        self.assertEqual(self._search_codes('cross-site scr'), (1, [79]))
+        self.assertEqual(self._search_codes('overflow'), (0, []))
+
+    def test_name_words_not_substrings(self):
+        """ A word of the query should not be found inside the words of the CWE names """
+        self.assertEqual(self._search_codes('jection'), (0, []))
+        self.assertEqual(self._search_codes('ross'), (0, []))
+        self.assertEqual(self._search_codes('injection sql'), (1, [89]))
+
+    def test_code(self):
+        """ The CWE with the code should come first, followed by the other matches sorted by their code """
+        self.assertEqual(self._search_codes('94'), (3, [94, 943, 1000]))
+        self.assertEqual(self._search_codes('CWE-94'), (2, [94, 943]))
+        self.assertEqual(self._search_codes('9'), (3, [94, 943, 1000]))
+
+    def test_pagination(self):
+        """ The pages should be stable and the total count exact """
+        self.assertEqual(self._search_codes(None, 0, 2), (5, [79, 89]))
+        self.assertEqual(self._search_codes(None, 2, 2), (5, [94, 943]))
+        self.assertEqual(self._search_codes(None, 4, 2), (5, [1000]))
+        self.assertEqual(self._search_codes('94', 1, 1), (3, [943]))
+
+    def test_invalidated_by_signals(self):
+        """ The index should follow the CWEs saved and deleted """
+        self.assertEqual(self._search_codes('inj'), (2, [89, 94]))
+        CWE(code=90, name='LDAP Injection').save()
+        self.assertEqual(self._search_codes('inj'), (3, [89, 90, 94]))
+        cwe = CWE.objects.get(code=94)
+        cwe.name = 'Code Execution'
+        cwe.save()
+        self.assertEqual(self._search_codes('inj'), (2, [89, 90]))
+        CWE.objects.get(code=89).delete()
+        self.assertEqual(self._search_codes('inj'), (1, [90]))
+
+    def test_no_query_after_build(self):
+        """ The queries should not hit the database once the index is built """
+        cwe_typeahead_index.ensure_fresh()
+        self.assertNumQueries(0, cwe_typeahead_index.search, 'inj', 0, 10)
+
+    def test_get_cwes_view(self):
+        """ The CWE selection should be served from the index """
+        response = self.client.get(reverse('frontpage:get_cwes'), {'q': 'inj'},
+                                   HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        content = json.loads(response.content)
+        self.assertEqual(content['total_count'], 2)
+        self.assertEqual([item['text'] for item in content['items']],
+                         ['CWE-89: SQL Injection', 'CWE-94: Code Injection'])
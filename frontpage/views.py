@@ -7,6 +7,7 @@ from django.shortcuts import render, get_object_or_404
 from django.template.response import TemplateResponse
 from django.utils.safestring import mark_safe
 from cwe.models import CWE
+from cwe.cwe_typeahead import cwe_typeahead_index
 from muo.models import MisuseCase, UseCase, IssueReport
 from .settings import SELECT_CWE_PAGE_LIMIT
 
@@ -20,7 +21,9 @@ def index(request):
 
 def get_cwes(request):
     """
-    This view is called by muo search using ajax to get the list of CWEs for a given search query
+    This view is called by muo search using ajax to get the list of CWEs for a given search query.
+    A CWE is found when every word of the query starts a word of its name, or when the query is the
+    prefix of its code.
     """
     if not request.is_ajax():
         return HttpResponseForbidden()
@@ -29,18 +32,10 @@ def get_cwes(request):
     limit = SELECT_CWE_PAGE_LIMIT
     offset = (int(request.GET.get('page', 1)) - 1) * limit
 
-    if query:
-        if query.isdigit():
-            cwes = CWE.objects.filter(Q(code__exact=query) | Q(name__icontains=query))
-        else:
-            cwes = CWE.objects.filter(name__icontains=query)
-    else:
-        cwes = CWE.objects.all()
-
-    cwe_count = cwes.count()
-    cwes = cwes[offset : offset + limit]
-    results = [{'id': c.id,
-                'text': 'CWE-%s: %s' % (c.code, c.name)} for c in cwes]
+    # The CWEs are found in the in-memory typeahead index, without hitting the database
+    cwe_count, cwes = cwe_typeahead_index.search(query, offset, limit)
+    results = [{'id': cwe_id,
+                'text': 'CWE-%s: %s' % (code, name)} for cwe_id, code, name in cwes]
     return JsonResponse({'items': results, 'total_count': cwe_count})
 
 
@@ -61,7 +56,7 @@ def get_misusecases(request):
         misuse_cases = MisuseCase.objects.approved()
     else:
         #  Get the use cases for the selected CWE ids
-        misuse_cases = MisuseCase.objects.filter(cwes__in=selected_cwe_ids).approved()
+        misuse_cases = MisuseCase.objects.approved_for_cwes(cwe_ids=selected_cwe_ids)
 
     if search_term:
         misuse_cases = misuse_cases.filter(Q(name__icontains=search_term) | Q(misuse_case_description__icontains=search_term))
@@ -26,7 +26,7 @@ from base.admin import BaseAdmin
 class UseCaseAdmin(BaseAdmin):
     fields = ['name', 'misuse_case', 'use_case_description', 'osr', 'tags']
     readonly_fields = ['name']
-    list_display = ['name']
+    list_display = ['name', 'open_issue_report_count']
     search_fields = ['name', 'use_case_description', 'tags__name']
 
     def get_model_perms(self, request):
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from muo.models import PublishedMisuseCase, PublishedUseCase, refresh_published_catalogue
+
+
+class Command(BaseCommand):
+    help = ("Rebuild the published catalogue, the read model of the approved and published MUO containers, "
+            "from the MUO containers. It is otherwise kept up to date when the MUO containers are saved, but "
+            "not when they are changed with bulk updates.")
+
+    def handle(self, *args, **options):
+        refresh_published_catalogue()
+        self.stdout.write("The published catalogue has %d misuse case rows and %d use case rows" %
+                          (PublishedMisuseCase.objects.count(), PublishedUseCase.objects.count()))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from muo.models import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = ("Repair the counter fields of the CWEs, the misuse cases and the use cases, which are maintained "
+            "by the signal receivers, after bulk updates which bypass them. It should be run while the "
+            "catalogue is not being edited.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', dest='dry_run', default=False,
+                            help="Only report the wrong counters, without repairing them")
+
+    def handle(self, *args, **options):
+        for model, field, ids in reconcile_counters(dry_run=options['dry_run']):
+            if not ids:
+                message = "all the counters are correct"
+            elif options['dry_run']:
+                message = "%d wrong counters" % len(ids)
+            else:
+                message = "%d wrong counters were repaired" % len(ids)
+            self.stdout.write("%s.%s: %s" % (model.__name__, field, message))
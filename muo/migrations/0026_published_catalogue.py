@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.db.models.deletion
+
+
+def build_published_catalogue(apps, schema_editor):
+    """ Fill the published catalogue with the approved and published MUO containers """
+    MUOContainer = apps.get_model('muo', 'MUOContainer')
+    MisuseCase = apps.get_model('muo', 'MisuseCase')
+    UseCase = apps.get_model('muo', 'UseCase')
+    PublishedMisuseCase = apps.get_model('muo', 'PublishedMisuseCase')
+    PublishedUseCase = apps.get_model('muo', 'PublishedUseCase')
+
+    misuse_case_ids = dict(MUOContainer.objects.filter(status='approved', is_published=True)
+                                               .exclude(misuse_case=None)
+                                               .values_list('id', 'misuse_case_id'))
+    cwes = {}
+    for misuse_case_id, cwe_id, cwe_code in (MisuseCase.cwes.through.objects
+                                             .filter(misusecase_id__in=set(misuse_case_ids.values()))
+                                             .values_list('misusecase_id', 'cwe_id', 'cwe__code')):
+        cwes.setdefault(misuse_case_id, []).append((cwe_id, cwe_code))
+
+    PublishedMisuseCase.objects.bulk_create([
+        PublishedMisuseCase(muo_container_id=muo_container_id, misuse_case_id=misuse_case_id,
+                            cwe_id=cwe_id, cwe_code=cwe_code)
+        for muo_container_id, misuse_case_id in misuse_case_ids.items()
+        for cwe_id, cwe_code in cwes.get(misuse_case_id, [(None, None)])
+    ], batch_size=500)
+    PublishedUseCase.objects.bulk_create([
+        PublishedUseCase(use_case_id=use_case_id, muo_container_id=muo_container_id, misuse_case_id=misuse_case_id)
+        for use_case_id, muo_container_id, misuse_case_id in (UseCase.objects
+                                                              .filter(muo_container_id__in=list(misuse_case_ids))
+                                                              .values_list('id', 'muo_container_id', 'misuse_case_id'))
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cwe', '0011_cwe_name_trigram_index'),
+        ('muo', '0025_muocontainer_is_published'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublishedMisuseCase',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('cwe_code', models.IntegerField(null=True, db_index=True)),
+                ('cwe', models.ForeignKey(related_name='+', to='cwe.CWE', null=True)),
+                ('misuse_case', models.ForeignKey(related_name='+', to='muo.MisuseCase')),
+                ('muo_container', models.ForeignKey(related_name='+', to='muo.MUOContainer')),
+            ],
+            options={
+                'verbose_name': 'Published Misuse Case',
+                'verbose_name_plural': 'Published Misuse Cases',
+            },
+        ),
+        migrations.CreateModel(
+            name='PublishedUseCase',
+            fields=[
+                ('use_case', models.OneToOneField(related_name='published_entry', primary_key=True, serialize=False, to='muo.UseCase')),
+                ('misuse_case', models.ForeignKey(related_name='+', on_delete=django.db.models.deletion.SET_NULL, to='muo.MisuseCase', null=True)),
+                ('muo_container', models.ForeignKey(related_name='+', to='muo.MUOContainer')),
+            ],
+            options={
+                'verbose_name': 'Published Use Case',
+                'verbose_name_plural': 'Published Use Cases',
+            },
+        ),
+        migrations.RunPython(build_published_catalogue, migrations.RunPython.noop),
+    ]
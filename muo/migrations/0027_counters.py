@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.db.models import Count
+
+
+def initialize_counters(apps, schema_editor):
+    """ Set the counters of the CWEs, the misuse cases and the use cases from the existing objects """
+    CWE = apps.get_model('cwe', 'CWE')
+    MisuseCase = apps.get_model('muo', 'MisuseCase')
+    MUOContainer = apps.get_model('muo', 'MUOContainer')
+    UseCase = apps.get_model('muo', 'UseCase')
+    IssueReport = apps.get_model('muo', 'IssueReport')
+    PublishedMisuseCase = apps.get_model('muo', 'PublishedMisuseCase')
+
+    counters = [
+        (CWE, 'misuse_case_count',
+         MisuseCase.cwes.through.objects.values_list('cwe_id').annotate(Count('misusecase_id'))),
+        (CWE, 'published_misuse_case_count',
+         PublishedMisuseCase.objects.exclude(cwe=None).values_list('cwe_id')
+                                    .annotate(Count('misuse_case_id', distinct=True))),
+        (MisuseCase, 'muo_container_count',
+         MUOContainer.objects.exclude(misuse_case=None).values_list('misuse_case_id').annotate(Count('id'))),
+        (UseCase, 'open_issue_report_count',
+         IssueReport.objects.filter(status__in=('open', 'investigating', 'reopened'))
+                            .values_list('usecase_id').annotate(Count('id'))),
+    ]
+    for model, field, values in counters:
+        ids_by_value = {}
+        for pk, value in values.order_by():
+            ids_by_value.setdefault(value, []).append(pk)
+        for value, ids in ids_by_value.items():
+            for start in range(0, len(ids), 500):
+                model.objects.filter(id__in=ids[start:start + 500]).update(**{field: value})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cwe', '0012_cwe_counters'),
+        ('muo', '0026_published_catalogue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='misusecase',
+            name='muo_container_count',
+            field=models.IntegerField(default=0, verbose_name=b'MUO containers', editable=False),
+        ),
+        migrations.AddField(
+            model_name='usecase',
+            name='open_issue_report_count',
+            field=models.IntegerField(default=0, verbose_name=b'Open issue reports', editable=False),
+        ),
+        migrations.RunPython(initialize_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+# The partial indexes only have the rows of the MUO containers which the most frequent status filters of
+# MUOQuerySet look for: the custom drafts, which the REST API joins from the misuse cases and the use cases
+# of the current user, and the approved and published MUO containers, from which the published catalogue
+# is built. They stay small whatever the number of MUO containers in the other statuses. Only PostgreSQL
+# supports them among the databases of the project.
+CREATE_PARTIAL_INDEXES_SQL = """
+CREATE INDEX muo_muocontainer_custom_draft ON muo_muocontainer (misuse_case_id, created_by_id)
+    WHERE is_custom AND status = 'draft';
+CREATE INDEX muo_muocontainer_approved ON muo_muocontainer (misuse_case_id)
+    WHERE status = 'approved' AND is_published;
+"""
+
+DROP_PARTIAL_INDEXES_SQL = """
+DROP INDEX IF EXISTS muo_muocontainer_custom_draft;
+DROP INDEX IF EXISTS muo_muocontainer_approved;
+"""
+
+
+def create_partial_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_PARTIAL_INDEXES_SQL)
+
+
+def drop_partial_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_PARTIAL_INDEXES_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('muo', '0027_counters'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='muocontainer',
+            index_together=set([('created_by', 'status'), ('status', 'is_published')]),
+        ),
+        migrations.RunPython(create_partial_indexes, drop_partial_indexes),
+    ]
@@ -1,15 +1,17 @@
+from collections import Counter
 from django.contrib.contenttypes.models import ContentType
 from django.core import urlresolvers
-from django.db import models, transaction
+from django.db import connections, models, router, transaction
 from django.conf import settings
 from cwe.models import CWE
-from base.models import BaseModel
+from base.models import BaseModel, CounterFieldsMixin
+from base.transaction import on_commit
 from django.core.exceptions import ValidationError
-from django.db.models.signals import post_delete, pre_delete, pre_save, post_save
+from django.db.models.signals import m2m_changed, post_delete, pre_delete, pre_save, post_save
 from django.dispatch import receiver
 from signals import *
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Q, Case, Count, F, Max, Value, When
 from django.contrib.auth.models import  User
 
 STATUS = [('draft', 'Draft'),
@@ -26,6 +28,9 @@ ISSUE_STATUS = [('open', 'Open'),
                 ('reopened','Re-opened'),
                  ('resolved', 'Resolved')]
 
+# The statuses of the issue reports which are counted as open by UseCase.open_issue_report_count
+OPEN_ISSUE_STATUSES = ('open', 'investigating', 'reopened')
+
 MISUSE_CASE_TYPE_CHOICES = [('existing', 'Existing'), ('new', 'New')]
 
 OSR_PATTERN_CHOICES = [('ubiquitous', 'Ubiquitous'),
@@ -34,6 +39,71 @@ OSR_PATTERN_CHOICES = [('ubiquitous', 'Ubiquitous'),
                        ('state-driven', 'State-Driven')]
 
 
+# The fields of the misuse cases and the use cases which are provided when creating custom MUOs
+MISUSE_CASE_FIELDS = ('misuse_case_description', 'misuse_case_primary_actor', 'misuse_case_secondary_actor',
+                      'misuse_case_precondition', 'misuse_case_flow_of_events', 'misuse_case_postcondition',
+                      'misuse_case_assumption', 'misuse_case_source')
+
+USE_CASE_FIELDS = ('use_case_description', 'use_case_primary_actor', 'use_case_secondary_actor',
+                   'use_case_precondition', 'use_case_flow_of_events', 'use_case_postcondition',
+                   'use_case_assumption', 'use_case_source', 'osr_pattern_type', 'osr')
+
+
+def _allocate_ids(model, count, using=None):
+    """
+    Reserve the IDs of new objects from the sequence of the table of their model, so that the values which
+    depend on the IDs can be set before the objects are inserted. The sequences are only read on PostgreSQL,
+    and they never give the same ID twice, even to concurrent transactions.
+    :param model: The model of the objects
+    :param count: The number of IDs to reserve
+    :param using: The alias of the database, or None for the database the objects are written to
+    :return: (LIST) The IDs in increasing order, or None if they cannot be reserved on this database
+    """
+    connection = connections[using or router.db_for_write(model)]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                       [model._meta.db_table, model._meta.pk.column, count])
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+class NamedByIdMixin(object):
+    """
+    This mixin sets the 'name' field of the new objects from their ID, in the format of NAME_FORMAT, with a
+    single write. On PostgreSQL, the ID is reserved from the sequence before the object is inserted with
+    its final name. On the other databases, the name is set by the post_save signal receivers with a
+    narrow update, see _set_name_after_insert().
+    """
+
+    NAME_FORMAT = None  # The format of the name, filled with the ID of the object
+
+    def save(self, *args, **kwargs):
+        if self.pk is None and not kwargs.get('force_update'):
+            ids = _allocate_ids(type(self), 1, kwargs.get('using'))
+            if ids is not None:
+                self.pk = ids[0]
+                self.name = self.NAME_FORMAT.format(self.pk)
+                # The object has an ID, but it is new
+                kwargs['force_insert'] = True
+        super(NamedByIdMixin, self).save(*args, **kwargs)
+
+
+def _set_name_after_insert(sender, instance, created):
+    """
+    Set the name of an object created without a name, when its ID could not be reserved before the insert.
+    Only the name is updated, and the save signals are not sent again.
+    :param sender: The model of the object
+    :param instance: The object
+    :param created: Whether the object was just inserted
+    """
+    if created:
+        name = sender.NAME_FORMAT.format(instance.id)
+        if instance.name != name:
+            instance.name = name
+            sender.objects.filter(pk=instance.pk).update(name=name)
+
+
 # Tags are not used for now
 class Tag(BaseModel):
     name = models.CharField(max_length=32, unique=True)
@@ -54,13 +124,24 @@ class MUOQuerySet(models.QuerySet):
 
 
     def approved(self):
-        # Returns the queryset for all the approved MUO Containers
+        # Returns the queryset for all the approved MUO Containers. The misuse cases and the use cases
+        # are read from the published catalogue, which has one row per published object.
         if self.model == MUOContainer:
             return self.filter(status='approved', is_published=True)
         elif self.model == MisuseCase:
-            return self.filter(muocontainer__status='approved', muocontainer__is_published=True)
+            return self.filter(id__in=PublishedMisuseCase.objects.values('misuse_case_id'))
         elif self.model == UseCase:
-            return self.filter(muo_container__status='approved', muo_container__is_published=True)
+            return self.filter(published_entry__isnull=False)
+
+    def approved_for_cwes(self, cwe_ids=None, cwe_codes=None):
+        # Returns the queryset for the misuse cases of the approved MUO Containers which are related to
+        # the given CWEs, read from the published catalogue without joining the CWEs
+        entries = PublishedMisuseCase.objects.all()
+        if cwe_ids is not None:
+            entries = entries.filter(cwe_id__in=cwe_ids)
+        if cwe_codes is not None:
+            entries = entries.filter(cwe_code__in=cwe_codes)
+        return self.filter(id__in=entries.values('misuse_case_id'))
 
 
     def rejected(self):
@@ -128,6 +209,9 @@ class MUOManager(models.Manager):
     def approved(self):
         return self.get_queryset().approved()
 
+    def approved_for_cwes(self, cwe_ids=None, cwe_codes=None):
+        return self.get_queryset().approved_for_cwes(cwe_ids=cwe_ids, cwe_codes=cwe_codes)
+
     def draft(self):
         return self.get_queryset().draft()
 
@@ -141,7 +225,10 @@ class MUOManager(models.Manager):
         return self.get_queryset().custom()
 
 
-class MisuseCase(BaseModel):
+class MisuseCase(NamedByIdMixin, CounterFieldsMixin, BaseModel):
+    NAME_FORMAT = "MU-{0:05d}"
+    COUNTER_FIELDS = ('muo_container_count',)
+
     cwes = models.ManyToManyField(CWE, related_name='misuse_cases')
     tags = models.ManyToManyField(Tag, blank=True)
     name = models.CharField(max_length=16, null=True, blank=True, db_index=True, default="/")
@@ -153,6 +240,8 @@ class MisuseCase(BaseModel):
     misuse_case_postcondition = models.TextField(null=True, blank=True, verbose_name="Post-condition")
     misuse_case_assumption = models.TextField(null=True, blank=True, verbose_name="Assumption")
     misuse_case_source = models.TextField(null=True, blank=True, verbose_name="Source")
+    # The number of MUO containers referring to the misuse case, maintained by the signal receivers
+    muo_container_count = models.IntegerField(default=0, editable=False, verbose_name="MUO containers")
 
     objects = MUOManager()  # Replace the default manager with the MUOManager
 
@@ -166,13 +255,13 @@ class MisuseCase(BaseModel):
 
 @receiver(post_save, sender=MisuseCase, dispatch_uid='misusecase_post_save_signal')
 def post_save_misusecase(sender, instance, created, using, **kwargs):
-    """ Set the value of the field 'name' after creating the object """
-    if created:
-        instance.name = "MU-{0:05d}".format(instance.id)
-        instance.save()
+    """ Set the value of the field 'name' after creating the object, if it was not set before """
+    _set_name_after_insert(sender, instance, created)
 
 
-class MUOContainer(BaseModel):
+class MUOContainer(NamedByIdMixin, BaseModel):
+    NAME_FORMAT = "MUO-{0:05d}"
+
     name = models.CharField(max_length=16, null=True, blank=True, db_index=True, default="/")
     cwes = models.ManyToManyField(CWE, related_name='muo_container')
 
@@ -206,6 +295,12 @@ class MUOContainer(BaseModel):
     class Meta:
         verbose_name = "MUO Container"
         verbose_name_plural = "MUO Containers"
+        # The indexes of the status filters of MUOQuerySet. The partial indexes of the custom drafts and of
+        # the approved MUO containers are only created on PostgreSQL, see the migration 0028.
+        index_together = [
+            ('status', 'is_published'),
+            ('created_by', 'status'),
+        ]
         # additional permissions
         permissions = (
             ('can_approve', 'Can approve MUO container'),
@@ -309,6 +404,71 @@ class MUOContainer(BaseModel):
                                created_at=timezone.now())
             use_case.save()
 
+    @staticmethod
+    def create_custom_muos(muos, created_by):
+        '''
+        This is a static method that creates many custom MUOs at once, with the same objects and relationships
+        as create_custom_muo(). All the objects are inserted with bulk inserts in a single transaction, so the
+        number of queries does not depend on the number of MUOs. The post_save signals are not sent, so the
+        names of the objects are set afterwards with one update query per model.
+        :param muos: (LIST of Tuples) A (cwe_ids, misusecase, usecase) tuple for each MUO, with the same
+                     arguments as for create_custom_muo()
+        :param created_by: (USER)
+        :return: (LIST of MUOContainer) The MUO containers, in the order of the MUOs
+        '''
+        cwe_codes = set(cwe_id for cwe_ids, misusecase, usecase in muos for cwe_id in cwe_ids)
+        cwe_objects = dict((cwe.code, cwe) for cwe in CWE.objects.filter(code__in=cwe_codes))
+
+        if len(cwe_objects) != len(cwe_codes):
+            raise ValueError("Looks like there are CWE IDs, which are not valid")
+
+        get_value = MUOContainer.get_value_for_key_in_dict
+        created_at = timezone.now()
+
+        with transaction.atomic():
+            misuse_cases = _bulk_create_with_ids(MisuseCase, [
+                MisuseCase(created_by=created_by,
+                           created_at=created_at,
+                           muo_container_count=1,
+                           **dict((field, get_value(misusecase, field)) for field in MISUSE_CASE_FIELDS))
+                for cwe_ids, misusecase, usecase in muos
+            ])
+            MisuseCase.cwes.through.objects.bulk_create([
+                MisuseCase.cwes.through(misusecase_id=misuse_case.id, cwe_id=cwe_objects[cwe_id].id)
+                for misuse_case, (cwe_ids, misusecase, usecase) in zip(misuse_cases, muos)
+                for cwe_id in set(cwe_ids)
+            ])
+            # The bulk inserts do not send the signals which maintain the counters
+            misuse_case_counts = Counter(cwe_objects[cwe_id].id for cwe_ids, misusecase, usecase in muos
+                                         for cwe_id in set(cwe_ids))
+            _add_to_counters(CWE, 'misuse_case_count', misuse_case_counts)
+
+            muo_containers = _bulk_create_with_ids(MUOContainer, [
+                MUOContainer(is_custom=True,
+                             is_published=False,
+                             status='draft',
+                             misuse_case=misuse_case,
+                             created_by=created_by,
+                             created_at=created_at)
+                for misuse_case in misuse_cases
+            ])
+            MUOContainer.cwes.through.objects.bulk_create([
+                MUOContainer.cwes.through(muocontainer_id=muo_container.id, cwe_id=cwe_objects[cwe_id].id)
+                for muo_container, (cwe_ids, misusecase, usecase) in zip(muo_containers, muos)
+                for cwe_id in set(cwe_ids)
+            ])
+
+            use_cases = _bulk_create_with_ids(UseCase, [
+                UseCase(muo_container=muo_container,
+                        misuse_case=misuse_case,
+                        created_by=created_by,
+                        created_at=created_at,
+                        **dict((field, get_value(usecase, field)) for field in USE_CASE_FIELDS))
+                for misuse_case, muo_container, (cwe_ids, misusecase, usecase) in zip(misuse_cases, muo_containers, muos)
+            ])
+
+        return muo_containers
+
 
     def __unicode__(self):
         return self.name
@@ -320,42 +480,42 @@ class MUOContainer(BaseModel):
         is allowed only if the current status is 'in_review'. If the current status is not
         'in_review', it raises the ValueError with appropriate message. In case of a new misuse case
         is written, it also creates the MisuseCase object and then relate it to the CWEs and the
-        MUOContainer.
+        MUOContainer. All the changes are made in a single transaction, and the signal is only sent
+        once it is committed, i.e. once the outermost transaction it is part of is committed.
         :param reviewer: User object that approved the MUO
         :raise ValueError: if status not in 'in-review'
         """
         if self.status == 'in_review':
-            if self.misuse_case is None:
-                # misuse_case is None that means the author has written a new misuse case.
-                # A new misuse case object needs to be created and related with the current
-                # MUOContainer and CWEs
-                misuse_case = MisuseCase(misuse_case_description=self.misuse_case_description,
-                                         misuse_case_primary_actor=self.misuse_case_primary_actor,
-                                         misuse_case_secondary_actor=self.misuse_case_secondary_actor,
-                                         misuse_case_precondition=self.misuse_case_precondition,
-                                         misuse_case_flow_of_events=self.misuse_case_flow_of_events,
-                                         misuse_case_postcondition=self.misuse_case_postcondition,
-                                         misuse_case_assumption=self.misuse_case_assumption,
-                                         misuse_case_source=self.misuse_case_source,
-                                         created_by=self.created_by,
-                                         created_at=self.created_at)
-                misuse_case.save()
-                misuse_case.cwes.add(*list(self.cwes.all()))
-                self.misuse_case = misuse_case
-                self.misuse_case_type = 'existing'
-
-            # Create the relationship between the misuse case of the muo container with all the
-            # use cases of the container
-            for usecase in self.usecase_set.all():
-                usecase.misuse_case = self.misuse_case
-                usecase.save()
-
-            self.status = 'approved'
-            self.is_published = True
-            self.reviewed_by = reviewer
-            self.save()
+            with transaction.atomic():
+                if self.misuse_case is None:
+                    # misuse_case is None that means the author has written a new misuse case.
+                    # A new misuse case object needs to be created and related with the current
+                    # MUOContainer and CWEs
+                    misuse_case = MisuseCase(misuse_case_description=self.misuse_case_description,
+                                             misuse_case_primary_actor=self.misuse_case_primary_actor,
+                                             misuse_case_secondary_actor=self.misuse_case_secondary_actor,
+                                             misuse_case_precondition=self.misuse_case_precondition,
+                                             misuse_case_flow_of_events=self.misuse_case_flow_of_events,
+                                             misuse_case_postcondition=self.misuse_case_postcondition,
+                                             misuse_case_assumption=self.misuse_case_assumption,
+                                             misuse_case_source=self.misuse_case_source,
+                                             created_by=self.created_by,
+                                             created_at=self.created_at)
+                    misuse_case.save()
+                    misuse_case.cwes.add(*list(self.cwes.all()))
+                    self.misuse_case = misuse_case
+                    self.misuse_case_type = 'existing'
+
+                # Create the relationship between the misuse case of the muo container with all the
+                # use cases of the container
+                self._relink_use_cases(self.misuse_case, reviewer)
+
+                self.status = 'approved'
+                self.is_published = True
+                self.reviewed_by = reviewer
+                self.save()
             # Send email
-            muo_accepted.send(sender=self, instance=self)
+            on_commit(lambda: muo_accepted.send(sender=self, instance=self))
         else:
             raise ValueError("In order to approve an MUO, it should be in 'in-review' state")
 
@@ -365,28 +525,41 @@ class MUOContainer(BaseModel):
         the relationship between all the use cases of the muo container and the misuse case.
         This change is allowed only if the current status is 'in_review' or 'approved'.
         If the current status is not 'in-review' or 'approved', it raises the ValueError
-        with appropriate message.
+        with appropriate message. All the changes are made in a single transaction, and the signal
+        is only sent once it is committed, i.e. once the outermost transaction it is part of is committed.
         :param reject_reason: Message that contain the rejection reason provided by the reviewer
         :param reviewer: User object that approved the MUO
         :raise ValueError: if status not in 'in-review'
         """
         if self.status == 'in_review' or self.status == 'approved':
-            # Remove the relationship between the misuse case of the muo container with all the
-            # use cases of the container
-            for usecase in self.usecase_set.all():
-                usecase.misuse_case = None
-                usecase.save()
-
-            self.status = 'rejected'
-            self.is_published = False
-            self.reject_reason = reject_reason
-            self.reviewed_by = reviewer
-            self.save()
+            with transaction.atomic():
+                # Remove the relationship between the misuse case of the muo container with all the
+                # use cases of the container
+                self._relink_use_cases(None, reviewer)
+
+                self.status = 'rejected'
+                self.is_published = False
+                self.reject_reason = reject_reason
+                self.reviewed_by = reviewer
+                self.save()
             # Send email
-            muo_rejected.send(sender=self, instance=self)
+            on_commit(lambda: muo_rejected.send(sender=self, instance=self))
         else:
             raise ValueError("In order to approve an MUO, it should be in 'in-review' state")
 
+    def _relink_use_cases(self, misuse_case, reviewer):
+        """
+        Relate all the use cases of the muo container to a misuse case with a single update query, instead
+        of saving them one by one. The update does not send the save signals, so the modification time and
+        the modifier, which are otherwise set on save, are set by the query.
+        :param misuse_case: The misuse case of the use cases, or None to remove their relationship
+        :param reviewer: User object that changes the status of the MUO, which is the modifier when given
+        """
+        changes = {'misuse_case': misuse_case, 'modified_at': timezone.now()}
+        if reviewer is not None:
+            changes['modified_by'] = reviewer
+        self.usecase_set.update(**changes)
+
     def action_submit(self):
         # This method change the status of the MUOContainer object to 'in_review'. This change
         # is allowed only if the current status is 'draft'. If the current status is not
@@ -440,13 +613,86 @@ class MUOContainer(BaseModel):
         '''
         if self.status == 'approved':
             if self.is_published != should_publish:
-                self.is_published = should_publish
-                self.save()
+                # The published catalogue is refreshed in the same transaction
+                with transaction.atomic():
+                    self.is_published = should_publish
+                    self.save()
         else:
             raise ValueError("MUO can only be published/unpublished if it is in approved state.")
 
 
 
+def _bulk_create_with_ids(model, objects):
+    """
+    Insert objects with bulk inserts, set their IDs, which the bulk inserts don't return, and their names.
+    When the IDs can be reserved before the insert, the objects are inserted with their IDs and names.
+    Otherwise the objects, which all have the same creator and creation time, are read back among the
+    ones with an ID greater than the largest ID before the insert, in the order of their IDs, which is the
+    order in which they were inserted, and their names are then updated. If the IDs read back are not the
+    contiguous IDs of as many objects, e.g. because the inserts of another transaction were interleaved,
+    the bulk insert is rolled back and the objects are inserted one by one instead.
+    :param model: The model of the objects, which uses NamedByIdMixin
+    :param objects: (LIST) The objects, which all have the same 'created_by' and 'created_at'
+    :return: (LIST) The objects
+    """
+    if not objects:
+        return objects
+    ids = _allocate_ids(model, len(objects))
+    if ids is not None:
+        for obj, pk in zip(objects, ids):
+            obj.id = obj.pk = pk
+            obj.name = model.NAME_FORMAT.format(pk)
+        model.objects.bulk_create(objects)
+        return objects
+
+    with transaction.atomic():
+        max_id = model.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        sid = transaction.savepoint()
+        model.objects.bulk_create(objects)
+        ids = list(model.objects.filter(id__gt=max_id, created_by=objects[0].created_by,
+                                        created_at=objects[0].created_at)
+                                .order_by('id').values_list('id', flat=True))
+        if len(ids) == len(objects) and ids[-1] - ids[0] == len(ids) - 1:
+            transaction.savepoint_commit(sid)
+        else:
+            transaction.savepoint_rollback(sid)
+            ids = [_insert_with_id(model, obj) for obj in objects]
+        for obj, pk in zip(objects, ids):
+            obj.id = obj.pk = pk
+        _assign_names(model, model.NAME_FORMAT, objects)
+    return objects
+
+
+def _insert_with_id(model, obj):
+    """
+    Insert an object with a single query which returns its ID. Like the bulk inserts, and unlike save(), it
+    does not send the save signals.
+    :param model: The model of the object
+    :param obj: The new object
+    :return: The ID of the object
+    """
+    fields = [field for field in model._meta.local_concrete_fields if not isinstance(field, models.AutoField)]
+    return model._base_manager._insert([obj], fields=fields, return_id=True, using=router.db_for_write(model))
+
+
+def _assign_names(model, name_format, objects, chunk_size=250):
+    """
+    Set the 'name' field of objects created with bulk inserts, as the post_save signal receivers do for the
+    objects created one by one, with a single update query per chunk of objects.
+    :param model: The model of the objects
+    :param name_format: The format of the name, filled with the ID of the object
+    :param objects: (LIST) The objects
+    :param chunk_size: The maximum number of objects updated by a query, which keeps the number of query
+                       parameters under the limit of SQLite
+    """
+    for start in xrange(0, len(objects), chunk_size):
+        chunk = objects[start:start + chunk_size]
+        for obj in chunk:
+            obj.name = name_format.format(obj.id)
+        model.objects.filter(id__in=[obj.id for obj in chunk]).update(
+            name=Case(*[When(id=obj.id, then=Value(obj.name)) for obj in chunk], output_field=models.CharField()))
+
+
 @receiver(pre_save, sender=MUOContainer, dispatch_uid='muo_container_pre_save_signal')
 def pre_save_muo_container(sender, instance, *args, **kwargs):
     if instance.misuse_case_type == 'existing' and instance.misuse_case is not None:
@@ -465,10 +711,8 @@ def pre_save_muo_container(sender, instance, *args, **kwargs):
 
 @receiver(post_save, sender=MUOContainer, dispatch_uid='muo_container_post_save_signal')
 def post_save_muo_container(sender, instance, created, using, **kwargs):
-    """ Set the value of the field 'name' after creating the object """
-    if created:
-        instance.name = "MUO-{0:05d}".format(instance.id)
-        instance.save()
+    """ Set the value of the field 'name' after creating the object, if it was not set before """
+    _set_name_after_insert(sender, instance, created)
 
 
 @receiver(pre_delete, sender=MUOContainer, dispatch_uid='muo_container_delete_signal')
@@ -487,9 +731,13 @@ def post_delete_muo_container(sender, instance, using, **kwargs):
     Registering for the post_delete signal, so that after MUOContainer deletion, we can delete the related
     Misuse Case also if it is not related to any other MUOContainer
     """
-    if instance.misuse_case is not None:
-        if instance.misuse_case.muocontainer_set.count() == 0:
-            instance.misuse_case.delete()
+    if instance.misuse_case_id is not None:
+        _add_to_counters(MisuseCase, 'muo_container_count', {instance.misuse_case_id: -1})
+        # The counter is only displayed, so whether the misuse case is orphaned is decided from the
+        # MUO containers themselves. The misuse case is deleted with its signals, which update the
+        # counters of its CWEs.
+        if not MUOContainer.objects.filter(misuse_case_id=instance.misuse_case_id).exists():
+            MisuseCase.objects.filter(id=instance.misuse_case_id).delete()
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def post_save_deactivate_user(sender, instance, created=False, **kwargs):
@@ -500,7 +748,10 @@ def post_save_deactivate_user(sender, instance, created=False, **kwargs):
     if not instance.is_active:
         MUOContainer.objects.filter(created_by=instance, status__in=['draft', 'rejected', 'in_review']).delete()
 
-class UseCase(BaseModel):
+class UseCase(NamedByIdMixin, CounterFieldsMixin, BaseModel):
+    NAME_FORMAT = "UC-{0:05d}"
+    COUNTER_FIELDS = ('open_issue_report_count',)
+
     name = models.CharField(max_length=16, null=True, blank=True, db_index=True, default="/")
     misuse_case = models.ForeignKey(MisuseCase, null=True, blank=True)
     muo_container = models.ForeignKey(MUOContainer)
@@ -521,6 +772,8 @@ class UseCase(BaseModel):
                                         default='ubiquitous',
                                         verbose_name='Overlooked security requirements pattern type')
     osr = models.TextField(null=True, blank=True, verbose_name="Overlooked security requirements")
+    # The number of issue reports of the use case which are not resolved, maintained by the signal receivers
+    open_issue_report_count = models.IntegerField(default=0, editable=False, verbose_name="Open issue reports")
 
     objects = MUOManager()  # Replace the default manager with the MUOManager
 
@@ -538,13 +791,13 @@ class UseCase(BaseModel):
 
 @receiver(post_save, sender=UseCase, dispatch_uid='usecase_post_save_signal')
 def post_save_usecase(sender, instance, created, using, **kwargs):
-    """ Set the value of the field 'name' after creating the object """
-    if created:
-        instance.name = "UC-{0:05d}".format(instance.id)
-        instance.save()
+    """ Set the value of the field 'name' after creating the object, if it was not set before """
+    _set_name_after_insert(sender, instance, created)
+
 
+class IssueReport(NamedByIdMixin, BaseModel):
+    NAME_FORMAT = "Issue-{0:05d}"
 
-class IssueReport(BaseModel):
     name = models.CharField(max_length=16, null=True, blank=True, db_index=True, default="/")
     description = models.TextField(null=True, blank=True)
     type = models.CharField(choices=ISSUE_TYPES, max_length=64)
@@ -621,8 +874,327 @@ class IssueReport(BaseModel):
 
 @receiver(post_save, sender=IssueReport, dispatch_uid='issue_report_post_save_signal')
 def post_save_issue_report(sender, instance, created, using, **kwargs):
-    """ Set the value of the field 'name' after creating the object """
+    """ Set the value of the field 'name' after creating the object, if it was not set before """
+    _set_name_after_insert(sender, instance, created)
+
+
+class PublishedMisuseCase(models.Model):
+    """
+    The published catalogue is a read model of the approved and published MUO containers, which spares the
+    reads of the approved content from joining the MUO containers and the CWEs. It is refreshed by the signal
+    receivers below whenever a MUO container is saved, so the approve, reject and publish actions refresh it
+    in their transaction. This table has one row per CWE of the misuse case of each published MUO container,
+    or a single row without CWE if the misuse case has no CWE.
+    """
+    muo_container = models.ForeignKey(MUOContainer, on_delete=models.CASCADE, related_name='+')
+    misuse_case = models.ForeignKey(MisuseCase, on_delete=models.CASCADE, related_name='+')
+    cwe = models.ForeignKey(CWE, on_delete=models.CASCADE, null=True, related_name='+')
+    cwe_code = models.IntegerField(null=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Published Misuse Case"
+        verbose_name_plural = "Published Misuse Cases"
+
+
+class PublishedUseCase(models.Model):
+    """
+    The use cases of the published catalogue, see PublishedMisuseCase. This table has one row per use case
+    of each published MUO container.
+    """
+    use_case = models.OneToOneField(UseCase, on_delete=models.CASCADE, primary_key=True,
+                                    related_name='published_entry')
+    muo_container = models.ForeignKey(MUOContainer, on_delete=models.CASCADE, related_name='+')
+    misuse_case = models.ForeignKey(MisuseCase, on_delete=models.SET_NULL, null=True, related_name='+')
+
+    class Meta:
+        verbose_name = "Published Use Case"
+        verbose_name_plural = "Published Use Cases"
+
+
+def refresh_published_catalogue(muo_container_ids=None):
+    """
+    Rebuild the rows of the published catalogue of some MUO containers from their current state, in a single
+    transaction and with a constant number of queries.
+    :param muo_container_ids: The IDs of the MUO containers, or None to rebuild the whole catalogue
+    """
+    published_entries = PublishedMisuseCase.objects.all()
+    published_use_cases = PublishedUseCase.objects.all()
+    muo_containers = MUOContainer.objects.approved().exclude(misuse_case=None)
+    if muo_container_ids is not None:
+        muo_container_ids = list(muo_container_ids)
+        published_entries = published_entries.filter(muo_container_id__in=muo_container_ids)
+        published_use_cases = published_use_cases.filter(muo_container_id__in=muo_container_ids)
+        muo_containers = muo_containers.filter(id__in=muo_container_ids)
+
+    with transaction.atomic():
+        misuse_case_ids = dict(muo_containers.values_list('id', 'misuse_case_id'))
+
+        # The misuse cases whose published CWEs might change, to update the counters of the CWEs
+        changed_misuse_case_ids = None
+        if muo_container_ids is not None:
+            changed_misuse_case_ids = set(published_entries.values_list('misuse_case_id', flat=True))
+            changed_misuse_case_ids.update(misuse_case_ids.itervalues())
+        previous_cwes = _get_published_cwes(changed_misuse_case_ids)
+
+        published_entries.delete()
+        published_use_cases.delete()
+        _create_published_entries(misuse_case_ids)
+
+        published_misuse_case_counts = Counter(cwe_id for misuse_case_id, cwe_id in
+                                               _get_published_cwes(changed_misuse_case_ids))
+        published_misuse_case_counts.subtract(cwe_id for misuse_case_id, cwe_id in previous_cwes)
+        _add_to_counters(CWE, 'published_misuse_case_count', published_misuse_case_counts)
+
+
+def _get_published_cwes(misuse_case_ids=None):
+    """
+    Get the CWEs of the misuse cases in the published catalogue
+    :param misuse_case_ids: The IDs of the misuse cases, or None for all of them
+    :return: (SET) The (misuse case ID, CWE ID) pairs
+    """
+    published_entries = PublishedMisuseCase.objects.exclude(cwe=None)
+    if misuse_case_ids is not None:
+        published_entries = published_entries.filter(misuse_case_id__in=list(misuse_case_ids))
+    return set(published_entries.values_list('misuse_case_id', 'cwe_id'))
+
+
+def _create_published_entries(misuse_case_ids):
+    """
+    Insert the rows of the published catalogue of some MUO containers
+    :param misuse_case_ids: (DICT) The ID of the misuse case of each MUO container, by MUO container ID
+    """
+    if not misuse_case_ids:
+        return
+
+    cwes = {}
+    for misuse_case_id, cwe_id, cwe_code in (MisuseCase.cwes.through.objects
+                                             .filter(misusecase_id__in=set(misuse_case_ids.values()))
+                                             .values_list('misusecase_id', 'cwe_id', 'cwe__code')):
+        cwes.setdefault(misuse_case_id, []).append((cwe_id, cwe_code))
+
+    PublishedMisuseCase.objects.bulk_create([
+        PublishedMisuseCase(muo_container_id=muo_container_id, misuse_case_id=misuse_case_id,
+                            cwe_id=cwe_id, cwe_code=cwe_code)
+        for muo_container_id, misuse_case_id in misuse_case_ids.iteritems()
+        for cwe_id, cwe_code in cwes.get(misuse_case_id, [(None, None)])
+    ])
+    PublishedUseCase.objects.bulk_create([
+        PublishedUseCase(use_case_id=use_case_id, muo_container_id=muo_container_id,
+                         misuse_case_id=misuse_case_id)
+        for use_case_id, muo_container_id, misuse_case_id in (UseCase.objects
+                                                              .filter(muo_container_id__in=list(misuse_case_ids))
+                                                              .values_list('id', 'muo_container_id', 'misuse_case_id'))
+    ])
+
+
+@receiver(post_save, sender=MUOContainer, dispatch_uid='muo_container_published_catalogue_signal')
+def post_save_muo_container_published_catalogue(sender, instance, created, **kwargs):
+    """
+    Refresh the published catalogue of the MUO container when it might have been added to, removed from or
+    changed in it, i.e. when it is or was published, and its status, publication or misuse case changed.
+    The stored values are remembered by pre_save_muo_container_counters, and are missing for the objects
+    loaded from fixtures, whose catalogue is always refreshed.
+    """
+    is_published = instance.status == 'approved' and instance.is_published
     if created:
-        instance.name = "Issue-{0:05d}".format(instance.id)
-        instance.save()
+        # A new MUO container has no row to remove
+        if is_published:
+            refresh_published_catalogue([instance.id])
+        return
+    stored_values = getattr(instance, '_stored_values', None)
+    if stored_values is not None:
+        was_published = stored_values['status'] == 'approved' and stored_values['is_published']
+        changed = (stored_values['status'] != instance.status or
+                   stored_values['is_published'] != instance.is_published or
+                   stored_values['misuse_case'] != instance.misuse_case_id)
+        if not changed or not (was_published or is_published):
+            return
+    refresh_published_catalogue([instance.id])
+
+
+@receiver(post_save, sender=UseCase, dispatch_uid='usecase_published_catalogue_signal')
+def post_save_usecase_published_catalogue(sender, instance, created, **kwargs):
+    """ Refresh the published catalogue when a use case of a published MUO container is saved """
+    if MUOContainer.objects.filter(id=instance.muo_container_id).approved().exists():
+        refresh_published_catalogue([instance.muo_container_id])
+
+
+@receiver(m2m_changed, sender=MisuseCase.cwes.through, dispatch_uid='misusecase_cwes_published_catalogue_signal')
+def m2m_changed_misusecase_cwes_published_catalogue(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Refresh the published catalogue of the published MUO containers whose misuse case has gained or lost CWEs.
+    'instance' is a misuse case and 'pk_set' has CWE IDs, unless the change is made from the CWE side.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        muo_containers = MUOContainer.objects.filter(misuse_case_id=instance.pk)
+    elif action == 'post_clear':
+        muo_containers = MUOContainer.objects.filter(
+            id__in=PublishedMisuseCase.objects.filter(cwe_id=instance.pk).values('muo_container_id'))
+    else:
+        muo_containers = MUOContainer.objects.filter(misuse_case_id__in=pk_set)
+    muo_container_ids = list(muo_containers.approved().values_list('id', flat=True))
+    if muo_container_ids:
+        refresh_published_catalogue(muo_container_ids)
+
+
+@receiver(post_save, sender=CWE, dispatch_uid='cwe_published_catalogue_signal')
+def post_save_cwe_published_catalogue(sender, instance, created, **kwargs):
+    """ Keep the CWE codes of the published catalogue up to date """
+    if not created:
+        PublishedMisuseCase.objects.filter(cwe_id=instance.pk).update(cwe_code=instance.code)
+
+
+def _add_to_counters(model, field, deltas, chunk_size=500):
+    """
+    Add values to a counter field of objects with F-expression updates, with one update query per value and
+    chunk of objects, so that the concurrent updates of a counter do not overwrite each other.
+    :param model: The model of the objects, which uses CounterFieldsMixin
+    :param field: The name of the counter field
+    :param deltas: (DICT) The value to add to the counter of each object, by object ID
+    :param chunk_size: The maximum number of objects updated by a query
+    """
+    ids_by_delta = {}
+    for pk, delta in deltas.iteritems():
+        if pk is not None and delta:
+            ids_by_delta.setdefault(delta, []).append(pk)
+    for delta, ids in ids_by_delta.iteritems():
+        for start in xrange(0, len(ids), chunk_size):
+            model.objects.filter(id__in=ids[start:start + chunk_size]).update(**{field: F(field) + delta})
+
+
+def _remember_stored_values(sender, instance, fields):
+    """
+    Remember the stored values of some fields of an object which is about to be saved, for the post_save
+    signal receivers which update the counters depending on these fields.
+    :param sender: The model of the object
+    :param instance: The object
+    :param fields: (LIST) The names of the fields
+    """
+    instance._stored_values = None
+    if not instance._state.adding:
+        instance._stored_values = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(pre_save, sender=MUOContainer, dispatch_uid='muo_container_counters_pre_save_signal')
+def pre_save_muo_container_counters(sender, instance, raw, **kwargs):
+    """
+    Remember the misuse case of the MUO container, and its status and publication for the published
+    catalogue. The objects loaded from fixtures have their counters.
+    """
+    if raw:
+        instance._stored_values = None
+    else:
+        _remember_stored_values(sender, instance, ['misuse_case', 'status', 'is_published'])
+
+
+@receiver(post_save, sender=MUOContainer, dispatch_uid='muo_container_counters_post_save_signal')
+def post_save_muo_container_counters(sender, instance, raw, **kwargs):
+    """ Count the MUO container in the counter of its misuse case, which might have changed """
+    if raw:
+        return
+    # The stored values are kept for post_save_muo_container_published_catalogue
+    stored_values = getattr(instance, '_stored_values', None) or {}
+    previous_misuse_case_id = stored_values.get('misuse_case')
+    if previous_misuse_case_id != instance.misuse_case_id:
+        _add_to_counters(MisuseCase, 'muo_container_count',
+                         {previous_misuse_case_id: -1, instance.misuse_case_id: 1})
+
+
+@receiver(pre_delete, sender=MisuseCase, dispatch_uid='misusecase_counters_pre_delete_signal')
+def pre_delete_misusecase_counters(sender, instance, **kwargs):
+    """ The relationships with the CWEs are deleted with the misuse case, without the m2m_changed signal """
+    _add_to_counters(CWE, 'misuse_case_count', dict.fromkeys(instance.cwes.values_list('id', flat=True), -1))
+
 
+@receiver(m2m_changed, sender=MisuseCase.cwes.through, dispatch_uid='misusecase_cwes_counters_signal')
+def m2m_changed_misusecase_cwes_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Count the misuse cases of the CWEs. The relationships are counted after they are added, and before they
+    are removed, as the IDs passed to remove() might not all be related.
+    'instance' is a misuse case and 'pk_set' has CWE IDs, unless the change is made from the CWE side.
+    """
+    if action == 'post_add':
+        if reverse:
+            _add_to_counters(CWE, 'misuse_case_count', {instance.pk: len(pk_set)})
+        else:
+            _add_to_counters(CWE, 'misuse_case_count', dict.fromkeys(pk_set, 1))
+    elif action in ('pre_remove', 'pre_clear'):
+        if reverse:
+            relations = sender.objects.filter(cwe_id=instance.pk)
+            if action == 'pre_remove':
+                relations = relations.filter(misusecase_id__in=pk_set)
+            _add_to_counters(CWE, 'misuse_case_count', {instance.pk: -relations.count()})
+        else:
+            relations = sender.objects.filter(misusecase_id=instance.pk)
+            if action == 'pre_remove':
+                relations = relations.filter(cwe_id__in=pk_set)
+            _add_to_counters(CWE, 'misuse_case_count', dict.fromkeys(relations.values_list('cwe_id', flat=True), -1))
+
+
+@receiver(pre_save, sender=IssueReport, dispatch_uid='issue_report_counters_pre_save_signal')
+def pre_save_issue_report_counters(sender, instance, raw, **kwargs):
+    """ Remember the status and the use case of the issue report. The objects loaded from fixtures have their counters. """
+    if not raw:
+        _remember_stored_values(sender, instance, ['status', 'usecase'])
+
+
+@receiver(post_save, sender=IssueReport, dispatch_uid='issue_report_counters_post_save_signal')
+def post_save_issue_report_counters(sender, instance, raw, **kwargs):
+    """ Count the issue report in the counter of its use case, as its status or its use case might have changed """
+    if raw:
+        return
+    stored_values = instance.__dict__.pop('_stored_values', None)
+    deltas = Counter()
+    if stored_values is not None and stored_values['status'] in OPEN_ISSUE_STATUSES:
+        deltas[stored_values['usecase']] -= 1
+    if instance.status in OPEN_ISSUE_STATUSES:
+        deltas[instance.usecase_id] += 1
+    _add_to_counters(UseCase, 'open_issue_report_count', deltas)
+
+
+@receiver(post_delete, sender=IssueReport, dispatch_uid='issue_report_counters_post_delete_signal')
+def post_delete_issue_report_counters(sender, instance, **kwargs):
+    """ Remove the issue report from the counter of its use case """
+    if instance.status in OPEN_ISSUE_STATUSES:
+        _add_to_counters(UseCase, 'open_issue_report_count', {instance.usecase_id: -1})
+
+
+def reconcile_counters(dry_run=False, chunk_size=500):
+    """
+    Repair the drift of the counter fields, e.g. after bulk updates or raw SQL which bypass the signal
+    receivers. Each counter is computed with a single aggregate query, and only the objects whose counter is
+    wrong are updated. The counters changed by concurrent edits of the catalogue might not be repaired.
+    :param dry_run: Whether the wrong counters should only be found, and not repaired
+    :param chunk_size: The maximum number of objects updated by a query
+    :return: (LIST) A (model, counter field, IDs of the objects whose counter was wrong) tuple per counter
+    """
+    counters = [
+        (CWE, 'misuse_case_count',
+         MisuseCase.cwes.through.objects.values_list('cwe_id').annotate(Count('misusecase_id'))),
+        (CWE, 'published_misuse_case_count',
+         PublishedMisuseCase.objects.exclude(cwe=None).values_list('cwe_id')
+                                    .annotate(Count('misuse_case_id', distinct=True))),
+        (MisuseCase, 'muo_container_count',
+         MUOContainer.objects.exclude(misuse_case=None).values_list('misuse_case_id').annotate(Count('id'))),
+        (UseCase, 'open_issue_report_count',
+         IssueReport.objects.filter(status__in=OPEN_ISSUE_STATUSES).values_list('usecase_id').annotate(Count('id'))),
+    ]
+
+    results = []
+    with transaction.atomic():
+        for model, field, actual_values in counters:
+            actual_values = dict(actual_values.order_by())
+            ids_by_value = {}
+            for pk, value in model.objects.values_list('id', field).iterator():
+                actual_value = actual_values.get(pk, 0)
+                if value != actual_value:
+                    ids_by_value.setdefault(actual_value, []).append(pk)
+
+            if not dry_run:
+                for value, ids in ids_by_value.iteritems():
+                    for start in xrange(0, len(ids), chunk_size):
+                        model.objects.filter(id__in=ids[start:start + chunk_size]).update(**{field: value})
+            results.append((model, field, sorted(pk for ids in ids_by_value.itervalues() for pk in ids)))
+    return results
@@ -1,5 +1,8 @@
 from django.test import TestCase
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from mock import patch
 from muo.models import MUOContainer, MisuseCase, UseCase
 from django.contrib.auth.models import User
 
@@ -377,4 +380,60 @@ class TestMUOContainer(TestCase):
         muo_container.action_reject(self.reject_msg)  # the relationship between the misuse case and all the use cases should get removed.
         self.assertEqual(muo_container.status, 'rejected')
         self.assertEqual(muo_container.misuse_case.usecase_set.count(), 0)
-        self.assertEqual(muo_container.usecase_set.count(), 2)
\ No newline at end of file
+        self.assertEqual(muo_container.usecase_set.count(), 2)
+
+
+    def test_use_cases_relinked_with_constant_queries(self):
+        '''
+        on 'action_approve' and 'action_reject', all the use cases of the container should be related to or
+        removed from the misuse case with a constant number of queries, whatever their number
+        '''
+
+        muo_container = self.get_muo_container('in_review')
+        muo_container.misuse_case  # Load the misuse case, which is not part of the transition
+        with CaptureQueriesContext(connection) as few_use_cases_approve_queries:
+            muo_container.action_approve()
+        with CaptureQueriesContext(connection) as few_use_cases_reject_queries:
+            muo_container.action_reject(self.reject_msg)
+
+        for i in range(10):
+            UseCase(muo_container=muo_container).save()
+        muo_container = self.get_muo_container('in_review')
+        muo_container.misuse_case
+        with CaptureQueriesContext(connection) as many_use_cases_approve_queries:
+            muo_container.action_approve()
+        self.assertEqual(muo_container.misuse_case.usecase_set.count(), 11)
+        with CaptureQueriesContext(connection) as many_use_cases_reject_queries:
+            muo_container.action_reject(self.reject_msg)
+        self.assertEqual(muo_container.usecase_set.filter(misuse_case__isnull=True).count(), 11)
+
+        self.assertEqual(len(many_use_cases_approve_queries), len(few_use_cases_approve_queries))
+        self.assertEqual(len(many_use_cases_reject_queries), len(few_use_cases_reject_queries))
+
+
+    def test_use_cases_modification_on_action_approve(self):
+        '''
+        on 'action_approve', the modification time and the modifier of the use cases should be updated
+        '''
+
+        muo_container = self.get_muo_container('in_review')
+        modified_at = muo_container.usecase_set.get().modified_at
+        muo_container.action_approve(reviewer=self.reviewer)
+        use_case = muo_container.usecase_set.get()
+        self.assertEqual(use_case.misuse_case, muo_container.misuse_case)
+        self.assertEqual(use_case.modified_by, self.reviewer)
+        self.assertTrue(use_case.modified_at > modified_at)
+
+
+    @patch('muo.signals.muo_accepted.send')
+    def test_action_approve_rolled_back_on_error(self, mock):
+        '''
+        if 'action_approve' fails, none of its changes should be saved and the signal should not be sent
+        '''
+
+        muo_container = self.get_muo_container('in_review')
+        with patch.object(MUOContainer, 'save', side_effect=IntegrityError):
+            self.assertRaises(IntegrityError, muo_container.action_approve)
+        self.assertEqual(MUOContainer.objects.get(pk=self.current_id).status, 'in_review')
+        self.assertEqual(UseCase.objects.filter(misuse_case__isnull=False).count(), 0)
+        self.assertFalse(mock.called)
@@ -0,0 +1,168 @@
+from StringIO import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from cwe.models import CWE
+from muo.models import MUOContainer, MisuseCase, UseCase, IssueReport, reconcile_counters
+
+
+class TestCounters(TestCase):
+    """
+    This class is the test suite for the counter fields of the CWEs, the misuse cases and the use cases, which
+    are maintained by the signal receivers
+    """
+
+    def setUp(self):
+        self.cwe1 = CWE.objects.create(code=1, name='CWE-1')
+        self.cwe2 = CWE.objects.create(code=2, name='CWE-2')
+        self.misuse_case = MisuseCase.objects.create()
+        self.misuse_case.cwes.add(self.cwe1, self.cwe2)
+        self.muo_container = MUOContainer.objects.create(misuse_case=self.misuse_case, status='in_review')
+        self.use_case = UseCase.objects.create(muo_container=self.muo_container)
+
+    def _counters(self, model, field):
+        return dict(model.objects.values_list('id', field))
+
+    def _cwe_counters(self, field='misuse_case_count'):
+        return [CWE.objects.get(id=self.cwe1.id).__dict__[field], CWE.objects.get(id=self.cwe2.id).__dict__[field]]
+
+    def _assert_reconciled(self):
+        """ The counters maintained by the signal receivers should be the same as the ones computed """
+        for model, field, ids in reconcile_counters(dry_run=True):
+            self.assertEqual(ids, [], "%s.%s is wrong for %s" % (model.__name__, field, ids))
+
+    def test_misuse_case_count(self):
+        """ The misuse cases of a CWE should be counted when the relationships change on either side """
+        self.assertEqual(self._cwe_counters(), [1, 1])
+        other_misuse_case = MisuseCase.objects.create()
+        other_misuse_case.cwes.add(self.cwe1)
+        self.assertEqual(self._cwe_counters(), [2, 1])
+        # Adding an existing relationship or removing a missing one doesn't change the counters
+        other_misuse_case.cwes.add(self.cwe1)
+        other_misuse_case.cwes.remove(self.cwe2)
+        self.assertEqual(self._cwe_counters(), [2, 1])
+        self.misuse_case.cwes.remove(self.cwe1)
+        self.assertEqual(self._cwe_counters(), [1, 1])
+        self.cwe2.misuse_cases.add(other_misuse_case)
+        self.assertEqual(self._cwe_counters(), [1, 2])
+        self.cwe2.misuse_cases.remove(self.misuse_case, other_misuse_case)
+        self.assertEqual(self._cwe_counters(), [1, 0])
+        self.cwe1.misuse_cases.clear()
+        self.assertEqual(self._cwe_counters(), [0, 0])
+        self.misuse_case.cwes.add(self.cwe1, self.cwe2)
+        self.misuse_case.cwes.clear()
+        self.assertEqual(self._cwe_counters(), [0, 0])
+        self._assert_reconciled()
+
+    def test_misuse_case_count_misuse_case_deleted(self):
+        """ Deleting a misuse case should remove it from the counters of its CWEs """
+        misuse_case = MisuseCase.objects.create()
+        misuse_case.cwes.add(self.cwe1)
+        misuse_case.delete()
+        self.assertEqual(self._cwe_counters(), [1, 1])
+        self._assert_reconciled()
+
+    def test_stale_counters_not_saved(self):
+        """ Saving an object loaded before its counter was updated should not overwrite the counter """
+        cwe = CWE.objects.get(id=self.cwe1.id)
+        MisuseCase.objects.create().cwes.add(self.cwe1)
+        cwe.name = 'Renamed'
+        cwe.save()
+        self.assertEqual(CWE.objects.get(id=self.cwe1.id).name, 'Renamed')
+        self.assertEqual(self._cwe_counters(), [2, 1])
+
+    def test_published_misuse_case_count(self):
+        """ The published misuse cases of a CWE should be counted once, whatever their MUO containers """
+        self.assertEqual(self._cwe_counters('published_misuse_case_count'), [0, 0])
+        self.muo_container.action_approve()
+        self.assertEqual(self._cwe_counters('published_misuse_case_count'), [1, 1])
+        # Another published MUO container with the same misuse case
+        MUOContainer.objects.create(misuse_case=self.misuse_case, status='approved', is_published=True)
+        self.assertEqual(self._cwe_counters('published_misuse_case_count'), [1, 1])
+        self.misuse_case.cwes.remove(self.cwe2)
+        self.assertEqual(self._cwe_counters('published_misuse_case_count'), [1, 0])
+        self.muo_container.action_set_publish(False)
+        self.assertEqual(self._cwe_counters('published_misuse_case_count'), [1, 0])
+        MUOContainer.objects.filter(status='approved', is_published=True).get().action_set_publish(False)
+        self.assertEqual(self._cwe_counters('published_misuse_case_count'), [0, 0])
+        self._assert_reconciled()
+
+    def test_muo_container_count(self):
+        """ The MUO containers of a misuse case should be counted, and it should be deleted with the last one """
+        other_misuse_case = MisuseCase.objects.create()
+        muo_container = MUOContainer.objects.create(misuse_case=self.misuse_case, status='draft')
+        self.assertEqual(self._counters(MisuseCase, 'muo_container_count'),
+                         {self.misuse_case.id: 2, other_misuse_case.id: 0})
+        muo_container.misuse_case = other_misuse_case
+        muo_container.save()
+        self.assertEqual(self._counters(MisuseCase, 'muo_container_count'),
+                         {self.misuse_case.id: 1, other_misuse_case.id: 1})
+        self._assert_reconciled()
+
+        muo_container.delete()
+        self.assertEqual(self._counters(MisuseCase, 'muo_container_count'), {self.misuse_case.id: 1})
+        self.assertEqual(self._cwe_counters(), [1, 1])
+        self._assert_reconciled()
+
+    def test_drifted_muo_container_count(self):
+        """ A misuse case still used by an MUO container should not be deleted, whatever its counter """
+        muo_container = MUOContainer.objects.create(misuse_case=self.misuse_case, status='draft')
+        MisuseCase.objects.filter(id=self.misuse_case.id).update(muo_container_count=1)
+        muo_container.delete()
+        self.assertTrue(MisuseCase.objects.filter(id=self.misuse_case.id).exists())
+
+        # Nor should a misuse case whose counter is too high be kept once its last MUO container is deleted
+        MisuseCase.objects.filter(id=self.misuse_case.id).update(muo_container_count=5)
+        self.muo_container.delete()
+        self.assertFalse(MisuseCase.objects.filter(id=self.misuse_case.id).exists())
+
+    def test_open_issue_report_count(self):
+        """ The issue reports of a use case should be counted until they are resolved """
+        reviewer = User.objects.create(username='reviewer')
+        issue_report = IssueReport.objects.create(type='spam', usecase=self.use_case)
+        IssueReport.objects.create(type='spam', usecase=self.use_case)
+        self.assertEqual(UseCase.objects.get(id=self.use_case.id).open_issue_report_count, 2)
+        issue_report.action_investigate(reviewer)
+        self.assertEqual(UseCase.objects.get(id=self.use_case.id).open_issue_report_count, 2)
+        issue_report.action_resolve("resolved", reviewer)
+        self.assertEqual(UseCase.objects.get(id=self.use_case.id).open_issue_report_count, 1)
+        issue_report.action_reopen(reviewer)
+        self.assertEqual(UseCase.objects.get(id=self.use_case.id).open_issue_report_count, 2)
+
+        # Moving an issue report to another use case
+        other_use_case = UseCase.objects.create(muo_container=self.muo_container)
+        issue_report.usecase = other_use_case
+        issue_report.save()
+        self.assertEqual(self._counters(UseCase, 'open_issue_report_count'),
+                         {self.use_case.id: 1, other_use_case.id: 1})
+
+        issue_report.delete()
+        self.assertEqual(self._counters(UseCase, 'open_issue_report_count'),
+                         {self.use_case.id: 1, other_use_case.id: 0})
+        self._assert_reconciled()
+
+    def test_create_custom_muos(self):
+        """ The MUOs created with bulk inserts should be counted """
+        user = User.objects.create(username='user')
+        MUOContainer.create_custom_muos([([1], {}, {}), ([1, 2], {}, {})], user)
+        self.assertEqual(self._cwe_counters(), [3, 2])
+        self._assert_reconciled()
+
+    def test_reconcile_counters_command(self):
+        """ The command should repair the counters which were changed without the signal receivers """
+        CWE.objects.filter(id=self.cwe1.id).update(misuse_case_count=5)
+        UseCase.objects.update(open_issue_report_count=3)
+
+        output = StringIO()
+        call_command('reconcile_counters', dry_run=True, stdout=output)
+        self.assertIn("CWE.misuse_case_count: 1 wrong counters", output.getvalue())
+        self.assertIn("UseCase.open_issue_report_count: 1 wrong counters", output.getvalue())
+        self.assertEqual(self._cwe_counters(), [5, 1])
+
+        output = StringIO()
+        call_command('reconcile_counters', stdout=output)
+        self.assertIn("CWE.misuse_case_count: 1 wrong counters were repaired", output.getvalue())
+        self.assertIn("MisuseCase.muo_container_count: all the counters are correct", output.getvalue())
+        self.assertEqual(self._cwe_counters(), [1, 1])
+        self.assertEqual(UseCase.objects.get(id=self.use_case.id).open_issue_report_count, 0)
+        self._assert_reconciled()
@@ -1,8 +1,10 @@
+from unittest import skipIf
 from django.test import TestCase
+from mock import patch
 from cwe.models import CWE
 from muo.models import MUOContainer, MisuseCase, UseCase
 from django.contrib.auth.models import User
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 
 
 class TestCustomMUO(TestCase):
@@ -144,4 +146,62 @@ class TestCustomMUO(TestCase):
         misuse_case = {'misuse_case_description': 'This is a misuse case'}
         use_case = {'use_case_description': 'This is an use case'}
 
-        self.assertRaises(ValueError, MUOContainer.create_custom_muo, cwes, misuse_case, use_case, self.user)
\ No newline at end of file
+        self.assertRaises(ValueError, MUOContainer.create_custom_muo, cwes, misuse_case, use_case, self.user)
+    def test_create_custom_muos_with_valid_arguments(self):
+        '''
+        'create_custom_muos' should create the same objects as 'create_custom_muo' for every MUO, with their names
+        '''
+        muos = [([1], {'misuse_case_description': 'Misuse case 1'}, {'use_case_description': 'Use case 1'}),
+                ([1, 2], {'misuse_case_description': 'Misuse case 2'}, {'osr': 'OSR 2'})]
+
+        muo_containers = MUOContainer.create_custom_muos(muos, self.user)
+
+        self.assertEqual(len(muo_containers), 2)
+        for muo_container, (cwes, misuse_case, use_case) in zip(muo_containers, muos):
+            muo_container = MUOContainer.objects.get(id=muo_container.id)
+            self.assertEqual(muo_container.name, "MUO-{0:05d}".format(muo_container.id))
+            self.assertEqual(muo_container.status, 'draft')
+            self.assertEqual(muo_container.is_custom, True)
+            self.assertEqual(sorted(cwe.code for cwe in muo_container.cwes.all()), cwes)
+            self.assertEqual(muo_container.misuse_case.name, "MU-{0:05d}".format(muo_container.misuse_case.id))
+            self.assertEqual(muo_container.misuse_case.misuse_case_description, misuse_case['misuse_case_description'])
+            self.assertEqual(muo_container.misuse_case.cwes.count(), len(cwes))
+            self.assertEqual(muo_container.usecase_set.get().name, "UC-{0:05d}".format(muo_container.usecase_set.get().id))
+            self.assertEqual(muo_container.usecase_set.get().misuse_case, muo_container.misuse_case)
+            self.assertEqual(muo_container.usecase_set.get().osr, use_case.get('osr', ''))
+
+    @skipIf(connection.vendor == 'postgresql', "The IDs are reserved before the bulk inserts on PostgreSQL")
+    def test_create_custom_muos_with_interleaved_inserts(self):
+        '''
+        'create_custom_muos' should insert the objects one by one when the objects read back after a bulk insert
+        are not only its own, e.g. when the inserts of another transaction were interleaved with it
+        '''
+        bulk_create = MisuseCase.objects.bulk_create
+
+        def interleaved_bulk_create(objects):
+            for obj in objects:
+                bulk_create([obj, MisuseCase(created_by=obj.created_by, created_at=obj.created_at)])
+
+        muos = [([1], {'misuse_case_description': 'Misuse case 1'}, {}),
+                ([2], {'misuse_case_description': 'Misuse case 2'}, {})]
+        with patch.object(MisuseCase.objects, 'bulk_create', side_effect=interleaved_bulk_create):
+            muo_containers = MUOContainer.create_custom_muos(muos, self.user)
+
+        misuse_cases = [MisuseCase.objects.get(id=muo_container.misuse_case.id) for muo_container in muo_containers]
+        self.assertEqual([misuse_case.misuse_case_description for misuse_case in misuse_cases],
+                         ['Misuse case 1', 'Misuse case 2'])
+        self.assertEqual([misuse_case.name for misuse_case in misuse_cases],
+                         ["MU-{0:05d}".format(misuse_case.id) for misuse_case in misuse_cases])
+        self.assertEqual([sorted(cwe.code for cwe in misuse_case.cwes.all()) for misuse_case in misuse_cases],
+                         [[1], [2]])
+        # The objects of the rolled back bulk insert are not kept
+        self.assertEqual(MisuseCase.objects.filter(created_by=self.user).count(), 2)
+
+    def test_create_custom_muos_with_non_existent_cwe(self):
+        '''
+        create_custom_muos should raise ValueError and create nothing when a CWE ID doesn't exist in the database
+        '''
+        muos = [([1], {}, {}), ([1, 100], {}, {})]
+
+        self.assertRaises(ValueError, MUOContainer.create_custom_muos, muos, self.user)
+        self.assertEqual(MUOContainer.objects.filter(created_by=self.user).count(), 0)
@@ -0,0 +1,85 @@
+from unittest import skipUnless
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from muo.models import MUOContainer, MisuseCase, UseCase
+
+
+IS_POSTGRESQL = connection.vendor == 'postgresql'
+
+
+class TestMUOContainerIndexes(TestCase):
+    """
+    This class is the test suite for the indexes of the status filters of MUOQuerySet
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+
+    def _explain(self, queryset):
+        """
+        Get the query plan of a queryset, with the sequential scans disabled so that the plan uses an index
+        whenever there is one matching the query, whatever the size of the test tables
+        """
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("EXPLAIN " + sql, params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def _assert_no_sequential_scan(self, queryset):
+        plan = self._explain(queryset)
+        self.assertNotIn("Seq Scan", plan, plan)
+        return plan
+
+    def _get_indexes(self):
+        """
+        Get the indexes of the MUO container table, as read by the introspection of the database
+        :return: A dictionary of the names of the indexes to their lists of columns
+        """
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, MUOContainer._meta.db_table)
+        return dict((name, constraint['columns']) for name, constraint in constraints.items() if constraint['index'])
+
+    def test_composite_indexes(self):
+        """ The composite indexes should exist on all the databases """
+        indexes = self._get_indexes().values()
+        self.assertIn(['status', 'is_published'], indexes)
+        self.assertIn(['created_by_id', 'status'], indexes)
+        # Every index of the model should have been created by the migrations
+        for fields in MUOContainer._meta.index_together:
+            columns = [MUOContainer._meta.get_field(field).column for field in fields]
+            self.assertIn(columns, indexes)
+
+    def test_partial_indexes_created(self):
+        """ The partial indexes should only exist on PostgreSQL, which is the only database supporting them """
+        indexes = self._get_indexes()
+        for name in ['muo_muocontainer_custom_draft', 'muo_muocontainer_approved']:
+            self.assertEqual(name in indexes, IS_POSTGRESQL)
+
+    @skipUnless(IS_POSTGRESQL, "The partial indexes only exist on PostgreSQL")
+    def test_partial_indexes(self):
+        """ The partial indexes should be used by the queries of the custom drafts and the approved containers """
+        plan = self._assert_no_sequential_scan(MUOContainer.objects.filter(misuse_case_id=1).custom().draft())
+        self.assertIn("muo_muocontainer_custom_draft", plan)
+        plan = self._assert_no_sequential_scan(MUOContainer.objects.filter(misuse_case_id=1).approved())
+        self.assertIn("muo_muocontainer_approved", plan)
+
+    @skipUnless(IS_POSTGRESQL, "EXPLAIN is only checked on PostgreSQL")
+    def test_muo_container_query_plans(self):
+        """ The status filters of the MUO containers should not scan the whole table """
+        self._assert_no_sequential_scan(MUOContainer.objects.approved())
+        self._assert_no_sequential_scan(MUOContainer.objects.filter(created_by=self.user).custom().draft())
+        # The MUO containers deleted when a user is deactivated
+        self._assert_no_sequential_scan(MUOContainer.objects.filter(created_by=self.user,
+                                                                    status__in=['draft', 'rejected', 'in_review']))
+        # The MUO containers listed in the admin to the users who can't view all of them
+        self._assert_no_sequential_scan(MUOContainer.objects.filter(Q(created_by=self.user) | Q(status='approved')))
+
+    @skipUnless(IS_POSTGRESQL, "EXPLAIN is only checked on PostgreSQL")
+    def test_custom_draft_query_plans(self):
+        """ The custom drafts of a user, as read by the REST API, should not scan the whole tables """
+        self._assert_no_sequential_scan(MisuseCase.objects.filter(created_by=self.user).custom().draft())
+        self._assert_no_sequential_scan(UseCase.objects.filter(misuse_case_id__in=[1, 2])
+                                                       .filter(created_by=self.user).custom().draft())
@@ -0,0 +1,75 @@
+import re
+from unittest import skipIf, skipUnless
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from muo.models import MUOContainer, MisuseCase, UseCase, IssueReport
+
+
+IS_POSTGRESQL = connection.vendor == 'postgresql'
+
+
+class TestNamedById(TestCase):
+    """
+    This class is the test suite to test the names of the misuse cases, MUO containers, use cases and issue
+    reports, which are set from their IDs when they are created
+    """
+
+    def _statements(self, queries):
+        # The SQL of the queries may be prefixed, e.g. by the debug cursor of SQLite
+        return [re.search(r'\b(SELECT|INSERT|UPDATE|DELETE)\b', query['sql']).group(1) for query in queries]
+
+    def _create_objects(self):
+        misuse_case = MisuseCase.objects.create()
+        muo_container = MUOContainer.objects.create(misuse_case=misuse_case)
+        use_case = UseCase.objects.create(muo_container=muo_container)
+        issue_report = IssueReport.objects.create(description="this is the issue", type="spam", usecase=use_case)
+        return misuse_case, muo_container, use_case, issue_report
+
+    def test_names(self):
+        """ Every object should get the name formed from its ID, both in memory and in the database """
+        for obj, name_format in zip(self._create_objects(), ["MU-{0:05d}", "MUO-{0:05d}", "UC-{0:05d}",
+                                                             "Issue-{0:05d}"]):
+            self.assertEqual(obj.name, name_format.format(obj.id))
+            self.assertEqual(type(obj).objects.get(pk=obj.pk).name, obj.name)
+
+    def test_saved_once(self):
+        """ The save signals should be sent only once per created object """
+        saved = []
+
+        def on_post_save(sender, instance, created, **kwargs):
+            saved.append((sender, created))
+
+        post_save.connect(on_post_save)
+        try:
+            self._create_objects()
+        finally:
+            post_save.disconnect(on_post_save)
+        self.assertEqual(saved, [(MisuseCase, True), (MUOContainer, True), (UseCase, True), (IssueReport, True)])
+
+    def test_existing_name_kept(self):
+        """ Saving an existing object should not change its name """
+        misuse_case = MisuseCase.objects.create()
+        name = misuse_case.name
+        misuse_case.misuse_case_description = "Changed"
+        misuse_case.save()
+        self.assertEqual(MisuseCase.objects.get(pk=misuse_case.pk).name, name)
+
+    @skipUnless(IS_POSTGRESQL, "The IDs are only reserved before the insert on PostgreSQL")
+    def test_single_write(self):
+        """ On PostgreSQL, the object should be inserted with its name, without any update """
+        with CaptureQueriesContext(connection) as queries:
+            misuse_case = MisuseCase.objects.create()
+        self.assertEqual(self._statements(queries), ['SELECT', 'INSERT'])
+        self.assertEqual(MisuseCase.objects.get(pk=misuse_case.pk).name, "MU-{0:05d}".format(misuse_case.id))
+
+    @skipIf(IS_POSTGRESQL, "The name is only updated after the insert on the databases other than PostgreSQL")
+    def test_name_only_update(self):
+        """ On the other databases, only the name should be updated after the insert """
+        with CaptureQueriesContext(connection) as queries:
+            misuse_case = MisuseCase.objects.create()
+        self.assertEqual(self._statements(queries), ['INSERT', 'UPDATE'])
+        self.assertIn('SET "name" = ', queries[1]['sql'])
+        self.assertNotIn('"modified_at"', queries[1]['sql'])
+        self.assertEqual(MisuseCase.objects.get(pk=misuse_case.pk).name, "MU-{0:05d}".format(misuse_case.id))
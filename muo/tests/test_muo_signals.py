@@ -1,11 +1,16 @@
-from django.test import TestCase
+from django.db import IntegrityError, transaction
+from django.test import TransactionTestCase
 from mock import patch
 from muo.models import MUOContainer, MisuseCase, UseCase
 from cwe.models import CWE
 from django.contrib.auth.models import User
 
 
-class MUOSignalsTest(TestCase):
+class MUOSignalsTest(TransactionTestCase):
+    """
+    The MUO accepted and rejected signals are only sent once the transaction is committed, so the tests
+    are not run in a transaction.
+    """
 
     def setUp(self):
         test_user = User(username='test_user')
@@ -48,6 +53,34 @@ class MUOSignalsTest(TestCase):
         # Check that the signal was called only once.
         self.assertEqual(mock.call_count, 1)
 
+    # This is to test to check that no signal is sent when the transaction of the action is rolled back
+    @patch('muo.signals.muo_accepted.send')
+    @patch('muo.signals.muo_rejected.send')
+    def test_muo_signals_not_triggered_on_rollback(self, rejected_mock, accepted_mock):
+        for action in (lambda: self.muo_container.action_approve(self.user),
+                       lambda: self.muo_container.action_reject("reason", self.user)):
+            self.muo_container.status = 'in_review'
+            try:
+                with transaction.atomic():
+                    action()
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+        # Check that the signals were not called.
+        self.assertFalse(accepted_mock.called)
+        self.assertFalse(rejected_mock.called)
+
+    # This is to test to check that the signal is only sent once the outer transaction is committed
+    @patch('muo.signals.muo_accepted.send')
+    def test_muo_accepted_signal_triggered_on_commit(self, mock):
+        self.muo_container.status = 'in_review'
+        with transaction.atomic():
+            self.muo_container.action_approve(self.user)
+            # Check that the signal was not called yet.
+            self.assertFalse(mock.called)
+        # Check that the signal was called only once.
+        self.assertEqual(mock.call_count, 1)
+
     # # This is to test to check if signals are generated when muo is voted up
     # @patch('muo.signals.muo_voted_up.send')
     # def test_muo_votedup_signal_triggered(self, mock):
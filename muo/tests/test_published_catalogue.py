@@ -0,0 +1,150 @@
+from StringIO import StringIO
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase
+from mock import patch
+from cwe.models import CWE
+from muo.models import MUOContainer, MisuseCase, UseCase, PublishedMisuseCase, PublishedUseCase
+
+
+class TestPublishedCatalogue(TestCase):
+    """
+    This class is the test suite for the published catalogue, the read model of the approved and published
+    MUO containers
+    """
+
+    def setUp(self):
+        self.cwe1 = CWE.objects.create(code=1, name='CWE-1')
+        self.cwe2 = CWE.objects.create(code=2, name='CWE-2')
+        misuse_case = MisuseCase.objects.create()
+        misuse_case.cwes.add(self.cwe1, self.cwe2)
+        self.muo_container = MUOContainer.objects.create(misuse_case=misuse_case, status='in_review')
+        self.use_case = UseCase.objects.create(muo_container=self.muo_container)
+
+    def _approve(self):
+        self.muo_container.action_approve()
+        return self.muo_container.misuse_case
+
+    def _published_cwe_codes(self):
+        return sorted(PublishedMisuseCase.objects.values_list('cwe_code', flat=True))
+
+    def _assert_same_as_containers(self):
+        """ The catalogue should have the same objects as the approved and published MUO containers """
+        self.assertEqual(
+            set(MisuseCase.objects.approved().values_list('id', flat=True)),
+            set(MisuseCase.objects.filter(muocontainer__status='approved', muocontainer__is_published=True)
+                                  .values_list('id', flat=True)))
+        self.assertEqual(
+            set(UseCase.objects.approved().values_list('id', flat=True)),
+            set(UseCase.objects.filter(muo_container__status='approved', muo_container__is_published=True)
+                               .values_list('id', flat=True)))
+
+    def test_empty_before_approval(self):
+        """ The MUO containers which are not approved should not be in the catalogue """
+        self.assertEqual(PublishedMisuseCase.objects.count(), 0)
+        self.assertEqual(PublishedUseCase.objects.count(), 0)
+        self.assertEqual(MisuseCase.objects.approved().count(), 0)
+
+    def test_approve(self):
+        """ Approving should add the misuse case, with its CWE codes, and the use cases """
+        misuse_case = self._approve()
+        self.assertEqual(self._published_cwe_codes(), [1, 2])
+        self.assertEqual(list(MisuseCase.objects.approved()), [misuse_case])
+        self.assertEqual(list(MisuseCase.objects.approved_for_cwes(cwe_codes=[2, 3])), [misuse_case])
+        self.assertEqual(list(MisuseCase.objects.approved_for_cwes(cwe_ids=[self.cwe1.id])), [misuse_case])
+        self.assertEqual(list(UseCase.objects.approved()), [self.use_case])
+        self.assertEqual(PublishedUseCase.objects.get().misuse_case, misuse_case)
+        self._assert_same_as_containers()
+
+    def test_reject(self):
+        """ Rejecting should remove the MUO container from the catalogue """
+        self._approve()
+        self.muo_container.action_reject("reason")
+        self.assertEqual(PublishedMisuseCase.objects.count(), 0)
+        self.assertEqual(PublishedUseCase.objects.count(), 0)
+        self._assert_same_as_containers()
+
+    def test_unpublish_publish(self):
+        """ Unpublishing should remove the MUO container from the catalogue, and publishing should add it back """
+        self._approve()
+        self.muo_container.action_set_publish(False)
+        self.assertEqual(MisuseCase.objects.approved().count(), 0)
+        self._assert_same_as_containers()
+        self.muo_container.action_set_publish(True)
+        self.assertEqual(self._published_cwe_codes(), [1, 2])
+        self._assert_same_as_containers()
+
+    def test_misuse_case_without_cwe(self):
+        """ A published misuse case without CWE should still be in the catalogue """
+        self.muo_container.misuse_case.cwes.clear()
+        misuse_case = self._approve()
+        self.assertEqual(self._published_cwe_codes(), [None])
+        self.assertEqual(list(MisuseCase.objects.approved()), [misuse_case])
+        self.assertEqual(MisuseCase.objects.approved_for_cwes(cwe_codes=[1]).count(), 0)
+
+    def test_cwes_changed(self):
+        """ The CWE codes should follow the changes of the CWEs of a published misuse case """
+        misuse_case = self._approve()
+        misuse_case.cwes.remove(self.cwe1)
+        self.assertEqual(self._published_cwe_codes(), [2])
+        # From the CWE side
+        self.cwe1.misuse_cases.add(misuse_case)
+        self.assertEqual(self._published_cwe_codes(), [1, 2])
+        self.cwe2.misuse_cases.clear()
+        self.assertEqual(self._published_cwe_codes(), [1])
+        # The code of a CWE is changed
+        self.cwe1.code = 11
+        self.cwe1.save()
+        self.assertEqual(self._published_cwe_codes(), [11])
+
+    def test_refreshed_only_when_changed(self):
+        """ The catalogue should only be refreshed when a published MUO container might enter or leave it """
+        with patch('muo.models.refresh_published_catalogue') as mock:
+            # Editing or changing the status of a MUO container which is not published
+            self.muo_container.save()
+            self.muo_container.status = 'draft'
+            self.muo_container.save()
+            self.assertFalse(mock.called)
+        self.muo_container.status = 'in_review'
+        self.muo_container.save()
+        self._approve()
+        with patch('muo.models.refresh_published_catalogue') as mock:
+            # Editing a published MUO container
+            MUOContainer.objects.get(id=self.muo_container.id).save()
+            self.assertFalse(mock.called)
+            self.muo_container.is_published = False
+            self.muo_container.save()
+            mock.assert_called_once_with([self.muo_container.id])
+
+    def test_use_case_added(self):
+        """ A use case added to a published MUO container should be in the catalogue """
+        self._approve()
+        use_case = UseCase.objects.create(muo_container=self.muo_container)
+        self.assertEqual(set(UseCase.objects.approved()), set([self.use_case, use_case]))
+        use_case.delete()
+        self.assertEqual(list(UseCase.objects.approved()), [self.use_case])
+
+    def test_deleted(self):
+        """ Deleting a MUO container should remove it from the catalogue """
+        self._approve()
+        self.muo_container.action_reject("reason")
+        self.muo_container.delete()
+        self.assertEqual(PublishedMisuseCase.objects.count(), 0)
+        self._assert_same_as_containers()
+
+    @patch.object(MUOContainer, 'save', side_effect=IntegrityError)
+    def test_rolled_back_with_action(self, mock):
+        """ The catalogue should not change when the approval fails """
+        self.assertRaises(IntegrityError, self.muo_container.action_approve)
+        self.assertEqual(PublishedMisuseCase.objects.count(), 0)
+        self.assertEqual(PublishedUseCase.objects.count(), 0)
+
+    def test_rebuild_command(self):
+        """ The command should rebuild the catalogue from the MUO containers """
+        self._approve()
+        PublishedMisuseCase.objects.all().delete()
+        PublishedUseCase.objects.all().delete()
+        call_command('rebuild_published_catalogue', stdout=StringIO())
+        self.assertEqual(self._published_cwe_codes(), [1, 2])
+        self.assertEqual(PublishedUseCase.objects.count(), 1)
+        self._assert_same_as_containers()
@@ -1,5 +1,5 @@
 from django.contrib.contenttypes.models import ContentType
-from django.test import TestCase
+from django.test import TransactionTestCase
 import time
 from muo.models import MUOContainer, MisuseCase, UseCase
 from django.contrib.auth.models import User, Permission
@@ -10,11 +10,13 @@ from muo_mailer import constants
 These test cases are to test the mailing functionality
 
 """
-class TestMUOMailer(TestCase):
+class TestMUOMailer(TransactionTestCase):
     """
     This class is the test suite for the MUOContainer model class. It contains
     test cases for the custom methods in the MUOContainer model which are not
-    related to the custom MUOs.
+    related to the custom MUOs. The MUO accepted and rejected signals, which send
+    the emails, are only sent once the transaction is committed, so the tests are
+    not run in a transaction.
     """
 
     def setUp(self):
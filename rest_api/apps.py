@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class RestAPIConfig(AppConfig):
+    name = 'rest_api'
+    verbose_name = "REST API"
+
+    def ready(self):
+        # Registering the system checks of the app
+        import rest_api.checks
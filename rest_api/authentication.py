@@ -0,0 +1,120 @@
+from collections import OrderedDict
+import threading
+import time
+from rest_framework.authentication import TokenAuthentication
+from cwe.cwe_search import GenerationCounter
+from .settings import TOKEN_CACHE_CHECK_INTERVAL
+from .settings import TOKEN_CACHE_MAX_SIZE
+from .settings import TOKEN_CACHE_TTL
+
+
+class TokenCache(object):
+    """
+    @brief: A bounded in-process cache of the users of the token keys. An entry expires after a fixed
+        time to live, and the least recently used entry is evicted when the cache is full. Once the
+        revocation of a token or the deactivation of a user is committed, a counter published through
+        the Django cache is incremented, which empties the cache of every process, so a revoked token is
+        not accepted again once the processes have read the counter. Nothing is cached when the counter is published through a cache local to
+        each process, as the other processes would then keep accepting the revoked tokens.
+    """
+
+    def __init__(self, max_size, ttl, generation_key='rest_api_token_cache_generation', check_interval=0):
+        """
+        @brief: Create an empty cache.
+        @param: [in] max_size: The maximum number of entries.
+        @param: [in] ttl: The time to live of an entry, in seconds. Nothing is cached when it is 0.
+        @param: [in] generation_key: The key of the generation counter in the Django cache.
+        @param: [in] check_interval: The number of seconds during which the last value read of the counter
+            is trusted.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = GenerationCounter(generation_key, check_interval)
+        self._entries = OrderedDict()   # key -> (user, token, expiration time), least recently used first
+        self._generation = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """
+        @brief: Whether the entries are cached.
+        @return: True if the time to live and the size are positive, and the counter is shared by the processes.
+        """
+        return self.ttl > 0 and self.max_size > 0 and self.generation.is_shared
+
+    def _synchronize(self, generation):
+        # Forget all the entries once another process has revoked a token or deactivated a user
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key):
+        """
+        @brief: Get the cached user and token of a token key.
+        @param: [in] key: The token key.
+        @return: A tuple (user, token), or None if the key is not cached or its entry has expired.
+        """
+        if not self.enabled:
+            return None
+        generation = self.generation.get()
+        with self._lock:
+            self._synchronize(generation)
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[2] <= time.time():
+                return None
+            # Move the entry to the end, as the most recently used one
+            self._entries[key] = entry
+            return entry[0], entry[1]
+
+    def set(self, key, user, token, generation):
+        """
+        @brief: Cache the user and the token of a token key.
+        @param: [in] key: The token key.
+        @param: [in] user: The user of the token.
+        @param: [in] token: The token.
+        @param: [in] generation: The value of the generation counter read before the token was read
+            from the database. The entry is not cached if a token was revoked in the meantime.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != self.generation.get():
+                return
+            self._synchronize(generation)
+            self._entries.pop(key, None)
+            self._entries[key] = (user, token, time.time() + self.ttl)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """
+        @brief: Forget all the entries in every process. It should only be called once the change which
+            revokes the tokens is committed, otherwise another process could cache them again in between.
+        """
+        self.generation.increment()
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+
+
+token_cache = TokenCache(TOKEN_CACHE_MAX_SIZE, TOKEN_CACHE_TTL, check_interval=TOKEN_CACHE_CHECK_INTERVAL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    @brief: The token authentication which reads the token and its user from the database only once per
+        time to live, instead of once per request.
+    """
+
+    def authenticate_credentials(self, key):
+        if not token_cache.enabled:
+            return super(CachedTokenAuthentication, self).authenticate_credentials(key)
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Read the generation before the database, so that a concurrent revocation is not missed
+        generation = token_cache.generation.get()
+        user, token = super(CachedTokenAuthentication, self).authenticate_credentials(key)
+        token_cache.set(key, user, token, generation)
+        return user, token
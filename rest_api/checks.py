@@ -0,0 +1,18 @@
+from django.core import checks
+from rest_api.authentication import token_cache
+
+
+@checks.register()
+def check_token_cache(app_configs, **kwargs):
+    """
+    @brief: Refuse to cache the authentication tokens when the revocations are published through a cache
+        local to each process, as the other processes would then keep accepting the revoked tokens.
+    """
+    if token_cache.ttl <= 0 or token_cache.generation.is_shared:
+        return []
+    return [checks.Error(
+        "TOKEN_CACHE_TTL is set, but the token revocations are published through a cache local to each process.",
+        hint="Set CWE_SEARCH_INDEX_CACHE to a cache shared by all the worker processes, e.g. memcached, "
+             "or set TOKEN_CACHE_TTL to 0.",
+        id='rest_api.E001',
+    )]
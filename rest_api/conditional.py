@@ -0,0 +1,86 @@
+from calendar import timegm
+import hashlib
+from django.db.models.query import QuerySet, ValuesListQuerySet
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class QuerysetValidators(object):
+    """
+    @brief: The validators of a response built from querysets: an ETag computed from the IDs and the
+        modification times of the objects of each queryset, and a Last-Modified time. Adding, removing,
+        replacing or modifying an object of a queryset changes the ETag, so a response can be validated
+        without serializing the objects. The parameters of the request and the media type of the response
+        are part of the ETag too, so the representations of different pages or formats never match.
+    """
+
+    def __init__(self, request, querysets, values=()):
+        """
+        @brief: Compute the validators. Every queryset is read with a single query of its IDs and
+            modification times, so the querysets should be limited to the objects of the response.
+        @param: [in] request: The HTTP request, after the content negotiation.
+        @param: [in] querysets: The querysets the response is built from. A queryset of values lists is
+            read as it is, e.g. to validate the relationships between the objects of the response. A list
+            of objects already read, e.g. a page read with a cursor, is used without any query.
+        @param: [in] values: The other values the response is built from, e.g. the total count of a page.
+        """
+        digest = hashlib.md5()
+        digest.update("%s;" % getattr(request, 'accepted_media_type', None))
+        for name, param_values in sorted(request.GET.lists()):
+            digest.update("%r=%r;" % (name, param_values))
+        for value in values:
+            digest.update("%r;" % (value,))
+
+        modification_times = []
+        for queryset in querysets:
+            if isinstance(queryset, ValuesListQuerySet):
+                rows = list(queryset)
+            else:
+                if isinstance(queryset, QuerySet):
+                    # A sliced queryset can't be ordered any more, and the order of its page matters anyway
+                    if queryset.query.can_filter():
+                        queryset = queryset.order_by('id')
+                    rows = list(queryset.values_list('id', 'modified_at'))
+                else:
+                    rows = [(obj.pk, obj.modified_at) for obj in queryset]
+                modification_times.extend(modified_at for pk, modified_at in rows if modified_at is not None)
+            digest.update("%r;" % (rows,))
+
+        self.last_modified = max(modification_times) if modification_times else None
+        self.etag = quote_etag(digest.hexdigest())
+
+    def match(self, request):
+        """
+        @brief: Check whether the client already has the current representation, i.e. whether one of the
+            ETags of its If-None-Match header is the current ETag. The If-Modified-Since header is not
+            used because the deletion of an object does not change the latest modification time.
+        @param: [in] request: The HTTP request.
+        @return: True if the response would not be modified, False otherwise.
+        """
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if not if_none_match:
+            return False
+        etags = parse_etags(if_none_match)
+        return '*' in etags or self.etag.strip('"') in etags
+
+    def not_modified_response(self):
+        """
+        @brief: Form the response telling the client that its representation is up to date.
+        @return: rest_framework.response.Response
+        """
+        return self.set_headers(Response(status=status.HTTP_304_NOT_MODIFIED))
+
+    def set_headers(self, response):
+        """
+        @brief: Add the validators to a response. The response depends on the authenticated user, so
+            it should only be stored by the cache of the client.
+        @param: [in] response: The response.
+        @return: The response.
+        """
+        response['ETag'] = self.etag
+        if self.last_modified is not None:
+            response['Last-Modified'] = http_date(timegm(self.last_modified.utctimetuple()))
+        patch_cache_control(response, private=True)
+        return response
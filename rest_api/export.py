@@ -0,0 +1,99 @@
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from cwe.models import CWE
+from muo.models import MisuseCase
+from muo.models import UseCase
+from rest_api.serializers import CWESerializer
+from rest_api.serializers import MisuseCaseSerializer
+from rest_api.serializers import UseCaseSerializer
+
+
+# The type of each exported record, written in its 'type' field
+RECORD_TYPE_CWE = "cwe"
+RECORD_TYPE_MISUSE_CASE = "misuse_case"
+RECORD_TYPE_USE_CASE = "use_case"
+
+# The fields of the exported records. They are the fields returned by the other REST API functions,
+# along with the modification time and the relationships.
+CWE_FIELDS = CWESerializer.Meta.fields + ('modified_at',)
+MISUSE_CASE_FIELDS = MisuseCaseSerializer.Meta.fields + ('modified_at',)
+USE_CASE_FIELDS = UseCaseSerializer.Meta.fields + ('misuse_case', 'modified_at')
+
+
+def iter_values_in_chunks(queryset, fields, chunk_size):
+    """
+    @brief: Iterate over the values of the objects of a queryset, reading them in chunks ordered by ID.
+        Each chunk is read with a separate query which starts after the last ID of the previous chunk,
+        so that the memory used does not depend on the size of the queryset, even on the databases
+        whose driver loads all the rows of a query at once.
+    @param: [in] queryset: The queryset of the objects.
+    @param: [in] fields: The names of the fields to read.
+    @param: [in] chunk_size: The maximum number of objects read with a single query.
+    @return: A generator of lists of dictionaries, one list per chunk.
+    """
+    queryset = queryset.order_by('id').values(*fields)
+    last_id = None
+    while True:
+        chunk_queryset = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        chunk = list(chunk_queryset[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1]['id']
+
+
+def iter_catalogue_records(modified_since=None, chunk_size=500):
+    """
+    @brief: Iterate over the records of the approved catalogue: the CWEs, then the approved misuse cases
+        with the codes of their CWEs, and then the approved use cases, which include the overlooked
+        security requirements.
+    @param: [in] modified_since: When not None, only the objects modified since this time are exported.
+        Note that the deleted objects are never exported.
+    @param: [in] chunk_size: The maximum number of objects read with a single query.
+    @return: A generator of dictionaries, one per record.
+    """
+    cwes = CWE.objects.all()
+    misuse_cases = MisuseCase.objects.approved().distinct()
+    use_cases = UseCase.objects.approved()
+    if modified_since is not None:
+        cwes = cwes.filter(modified_at__gte=modified_since)
+        misuse_cases = misuse_cases.filter(modified_at__gte=modified_since)
+        use_cases = use_cases.filter(modified_at__gte=modified_since)
+
+    for chunk in iter_values_in_chunks(cwes, CWE_FIELDS, chunk_size):
+        for values in chunk:
+            values['type'] = RECORD_TYPE_CWE
+            yield values
+
+    for chunk in iter_values_in_chunks(misuse_cases, MISUSE_CASE_FIELDS, chunk_size):
+        # Get the CWE codes of all the misuse cases of the chunk with a single query
+        cwe_codes = dict((values['id'], []) for values in chunk)
+        cwe_relations = (MisuseCase.cwes.through.objects
+                         .filter(misusecase_id__in=list(cwe_codes))
+                         .order_by('cwe__code')
+                         .values_list('misusecase_id', 'cwe__code'))
+        for misuse_case_id, cwe_code in cwe_relations:
+            cwe_codes[misuse_case_id].append(cwe_code)
+
+        for values in chunk:
+            values['type'] = RECORD_TYPE_MISUSE_CASE
+            values['cwes'] = cwe_codes[values['id']]
+            yield values
+
+    for chunk in iter_values_in_chunks(use_cases, USE_CASE_FIELDS, chunk_size):
+        for values in chunk:
+            values['type'] = RECORD_TYPE_USE_CASE
+            yield values
+
+
+def iter_ndjson(records):
+    """
+    @brief: Encode records as newline-delimited JSON.
+    @param: [in] records: An iterable of dictionaries.
+    @return: A generator of strings, one line per record.
+    """
+    encoder = DjangoJSONEncoder(separators=(',', ':'), sort_keys=True)
+    for record in records:
+        yield encoder.encode(record) + '\n'
@@ -0,0 +1,148 @@
+from collections import OrderedDict
+import json
+import timeit
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from cwe.models import CWE
+from muo.models import MisuseCase, MUOContainer, UseCase
+from rest_api.serializers import CWESerializer, MisuseCaseSerializer, UseCaseSerializer
+from rest_api.serializers import cwe_values_serializer, misuse_case_values_serializer, use_case_values_serializer
+
+
+# The serializers which can be benchmarked against their fast path, by name
+SERIALIZERS = OrderedDict([
+    ('cwe', (CWESerializer, cwe_values_serializer)),
+    ('misuse_case', (MisuseCaseSerializer, misuse_case_values_serializer)),
+    ('use_case', (UseCaseSerializer, use_case_values_serializer)),
+])
+
+
+class Rollback(Exception):
+    """ Raised to roll back the synthetic rows at the end of the benchmark """
+    pass
+
+
+class Command(BaseCommand):
+    help = ("Benchmark the fast path of the REST API serializers, which builds the representations from the "
+            "values of the fields, against the model serializers. Synthetic rows are loaded in a transaction "
+            "which is rolled back at the end, and each serializer reads and serializes all of them. The "
+            "times per 1,000 rows, the speedup and whether both outputs are identical are written as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000,
+                            help="Number of synthetic rows of each model (default: 1000)")
+        parser.add_argument('--serializer', action='append', dest='serializers', choices=list(SERIALIZERS),
+                            help="Serializer to benchmark, can be repeated (default: all of them)")
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Number of times the rows are serialized with each path (default: 5)")
+        parser.add_argument('--output',
+                            help="File to write the JSON results to (default: the standard output)")
+
+    def handle(self, *args, **options):
+        for name in ('rows', 'repeat'):
+            if options[name] < 1:
+                raise CommandError("--%s should be a positive integer" % name)
+
+        serializer_names = options['serializers'] or list(SERIALIZERS)
+
+        try:
+            with transaction.atomic():
+                querysets = self._load_rows(options['rows'])
+                results = self._benchmark(serializer_names, querysets, options['repeat'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+        report = OrderedDict([
+            ('django_version', django.get_version()),
+            ('database_vendor', connections[CWE.objects.db].vendor),
+            ('rows', options['rows']),
+            ('repeat', options['repeat']),
+            ('serializers', results),
+        ])
+        output = json.dumps(report, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+            self.stdout.write("The benchmark results were written to %s" % options['output'])
+        else:
+            self.stdout.write(output)
+
+    def _load_rows(self, rows):
+        """
+        Load the synthetic CWEs, misuse cases and use cases with bulk inserts, and return the querysets
+        which read them back.
+        """
+        last_cwe_id = CWE.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        first_code = (CWE.objects.order_by('-code').values_list('code', flat=True).first() or 0) + 1
+        CWE.objects.bulk_create([CWE(code=code, name="Synthetic CWE %d" % code)
+                                 for code in xrange(first_code, first_code + rows)])
+
+        last_misuse_case_id = MisuseCase.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        MisuseCase.objects.bulk_create([
+            MisuseCase(misuse_case_description="Synthetic misuse case %d" % i,
+                       misuse_case_primary_actor="Attacker",
+                       misuse_case_flow_of_events="1. The attacker does step %d" % i,
+                       misuse_case_source="Synthetic")
+            for i in xrange(rows)
+        ])
+
+        # The use cases belong to a single MUO container, which is enough for the serializers
+        misuse_case = MisuseCase.objects.filter(id__gt=last_misuse_case_id).order_by('id').first()
+        muo_container = MUOContainer(misuse_case=misuse_case, is_custom=True, status='draft')
+        muo_container.save()
+        last_use_case_id = UseCase.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        UseCase.objects.bulk_create([
+            UseCase(misuse_case=misuse_case, muo_container=muo_container,
+                    use_case_description="Synthetic use case %d" % i,
+                    use_case_primary_actor="User",
+                    use_case_flow_of_events="1. The user does step %d" % i,
+                    osr="The system shall check step %d" % i)
+            for i in xrange(rows)
+        ])
+
+        return {
+            'cwe': CWE.objects.filter(id__gt=last_cwe_id).order_by('id'),
+            'misuse_case': MisuseCase.objects.filter(id__gt=last_misuse_case_id).order_by('id'),
+            'use_case': UseCase.objects.filter(id__gt=last_use_case_id).order_by('id'),
+        }
+
+    def _time_per_thousand_rows(self, serialize, repeat, rows):
+        """
+        Time the reading and the serialization of the rows, and return the best and the mean times in
+        milliseconds per 1,000 rows.
+        """
+        times = []
+        for i in xrange(repeat):
+            start = timeit.default_timer()
+            serialize()
+            times.append((timeit.default_timer() - start) * 1000 * 1000 / rows)
+        return OrderedDict([('best', round(min(times), 4)), ('mean', round(sum(times) / len(times), 4))])
+
+    def _benchmark(self, serializer_names, querysets, repeat):
+        results = OrderedDict()
+        for name in serializer_names:
+            serializer_class, values_serializer = SERIALIZERS[name]
+            queryset = querysets[name]
+            rows = queryset.count()
+
+            # Every evaluation of the queryset reads the rows again, as a request would
+            serializer_output = serializer_class(queryset.all(), many=True).data
+            values_output = values_serializer.serialize(queryset.all())
+
+            serializer_ms = self._time_per_thousand_rows(
+                lambda: serializer_class(queryset.all(), many=True).data, repeat, rows)
+            values_ms = self._time_per_thousand_rows(
+                lambda: values_serializer.serialize(queryset.all()), repeat, rows)
+
+            results[name] = OrderedDict([
+                ('class', serializer_class.__name__),
+                ('rows', rows),
+                ('identical_output', json.dumps(serializer_output) == json.dumps(values_output)),
+                ('serializer_ms_per_1000_rows', serializer_ms),
+                ('values_ms_per_1000_rows', values_ms),
+                ('speedup', round(serializer_ms['best'] / values_ms['best'], 2) if values_ms['best'] else None),
+            ])
+        return results
@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from rest_framework.authtoken.models import Token
+from base.transaction import on_commit
+from rest_api.authentication import token_cache
 from register_approval.signals import register_approved, register_rejected
 
 
@@ -17,4 +21,21 @@ def delete_auth_token(sender, instance, **kwargs):
     """
     delete the token once the user is rejected.
     """
-    Token.objects.filter(user=instance.user).delete()
\ No newline at end of file
+    Token.objects.filter(user=instance.user).delete()
+
+
+@receiver(post_delete, sender=Token, dispatch_uid='rest_api_token_post_delete_signal')
+def post_delete_token(sender, instance, using=None, **kwargs):
+    """
+    Forget the cached tokens once the deletion of a token, e.g. when it is regenerated, is committed.
+    """
+    on_commit(token_cache.invalidate, using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid='rest_api_user_post_save_signal')
+def post_save_user(sender, instance, created=False, using=None, **kwargs):
+    """
+    Forget the cached tokens once the deactivation of a user is committed.
+    """
+    if not created and not instance.is_active:
+        on_commit(token_cache.invalidate, using)
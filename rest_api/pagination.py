@@ -0,0 +1,65 @@
+import base64
+import binascii
+import json
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """ Raised when a cursor token cannot be decoded """
+    pass
+
+
+def encode_cursor(code, pk, total_count):
+    """
+    @brief: Form the opaque token of a cursor.
+    @param: [in] code: The CWE code of the last object of the page.
+    @param: [in] pk: The ID of the last object of the page.
+    @param: [in] total_count: The total count computed on the first page, carried along the pages.
+    @return: The cursor token, safe to be put in a URL.
+    """
+    return base64.urlsafe_b64encode(json.dumps([code, pk, total_count], separators=(',', ':'))).rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    @brief: Read the position and the total count from the opaque token of a cursor.
+    @param: [in] token: The cursor token.
+    @return: A tuple (code, pk, total_count).
+    @raise: InvalidCursor if the token was not formed by encode_cursor().
+    """
+    try:
+        token = str(token)
+        code, pk, total_count = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (UnicodeError, TypeError, ValueError, binascii.Error):
+        raise InvalidCursor(token)
+    for value in (code, pk, total_count):
+        if not isinstance(value, (int, long)) or isinstance(value, bool):
+            raise InvalidCursor(token)
+    return code, pk, total_count
+
+
+def paginate_by_cursor(queryset, cursor, limit):
+    """
+    @brief: Get a page of CWE objects ordered by (code, id), starting after the position of a cursor.
+        Each page is read with a single indexed range query, whatever its depth. The total count is
+        only computed for the first page and is then carried by the cursor tokens.
+    @param: [in] queryset: The queryset of the CWE objects to page through.
+    @param: [in] cursor: The token of the cursor, or an empty string for the first page.
+    @param: [in] limit: The maximum number of objects in the page.
+    @return: A tuple (list of the objects of the page, token of the next cursor or None, total count).
+    @raise: InvalidCursor if the cursor token is invalid.
+    """
+    queryset = queryset.order_by('code', 'id')
+    if cursor:
+        code, pk, total_count = decode_cursor(cursor)
+        queryset = queryset.filter(Q(code__gt=code) | Q(code=code, id__gt=pk))
+    else:
+        total_count = queryset.count()
+
+    # Read one more object to know whether there is a next page
+    objects = list(queryset[:limit + 1]) if limit > 0 else []
+    next_cursor = None
+    if len(objects) > limit:
+        objects = objects[:limit]
+        next_cursor = encode_cursor(objects[-1].code, objects[-1].id, total_count)
+    return objects, next_cursor, total_count
@@ -0,0 +1,41 @@
+import msgpack
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+
+
+# The media type of MessagePack, which the clients put in their Accept or Content-Type header
+MESSAGEPACK_MEDIA_TYPE = 'application/msgpack'
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    @brief: Render the response data as MessagePack, which is more compact and faster to encode than JSON.
+        The values which MessagePack does not support, e.g. the dates, are encoded as in JSON.
+    """
+
+    media_type = MESSAGEPACK_MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # The byte strings are text in Python 2, so they are packed as strings rather than binary data
+        return msgpack.packb(data, default=DjangoJSONEncoder().default)
+
+
+class MessagePackParser(BaseParser):
+    """
+    @brief: Parse the MessagePack request data.
+    """
+
+    media_type = MESSAGEPACK_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), encoding='utf-8')
+        except Exception as e:
+            raise ParseError('MessagePack parse error - %s' % e)
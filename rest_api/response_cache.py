@@ -0,0 +1,112 @@
+import hashlib
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from cwe.cwe_bm25_search import cwe_bm25_index
+from cwe.cwe_search import cwe_keyword_index
+from cwe.cwe_typeahead import cwe_typeahead_index
+from .settings import RESPONSE_CACHE
+from .settings import RESPONSE_CACHE_POLICIES
+
+
+def stemmed_token_set(cwe_search, text):
+    """
+    @brief: Normalize a text into the sorted list of its distinct stemmed words, which is all the CWE
+        search algorithms use from it. The texts that only differ by their case, their stop words, the
+        order of their words or their inflections have the same stemmed token set.
+    @param: [in] cwe_search: The CWE search algorithm.
+    @param: [in] text: The text.
+    @return: A sorted list of stemmed words.
+    """
+    if not text:
+        return []
+    return sorted(set(cwe_search.stem_text(cwe_search.remove_stopwords(text))))
+
+
+def provider_identity(cwe_search):
+    """
+    @brief: Identify the CWE search algorithm the results come from.
+    @param: [in] cwe_search: The CWE search algorithm.
+    @return: The qualified name of its class.
+    """
+    return type(cwe_search).__module__ + '.' + type(cwe_search).__name__
+
+
+class ResponseCache(object):
+    """
+    @brief: A cache of the data of the responses of a REST API function, stored in a Django cache so that
+        it can be shared by all the worker processes. The keys include the generation counters of the
+        in-memory CWE indexes, which are incremented on every write to the CWEs or the keywords, so the
+        entries computed before a write are never read again and simply expire.
+    """
+
+    def __init__(self, endpoint, alias=RESPONSE_CACHE, policies=RESPONSE_CACHE_POLICIES):
+        """
+        @brief: Create the cache of a REST API function.
+        @param: [in] endpoint: The name of the function, which selects its policy.
+        @param: [in] alias: The alias of the Django cache the entries are stored in.
+        @param: [in] policies: A dictionary mapping the function names to a dictionary with the 'timeout'
+            of the entries in seconds, 0 disabling the cache, and the 'max_entry_size', i.e. the length
+            of the JSON of the largest entry which is cached.
+        """
+        policy = policies.get(endpoint, {})
+        self.endpoint = endpoint
+        self.alias = alias
+        self.timeout = policy.get('timeout', 0)
+        self.max_entry_size = policy.get('max_entry_size')
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    @property
+    def enabled(self):
+        return bool(self.timeout)
+
+    @staticmethod
+    def version():
+        """
+        @brief: Get the version of the CWEs and the keywords the responses are computed from.
+        @return: A string which changes after every write to the CWEs or the keywords.
+        """
+        return "%s.%s.%s" % (cwe_keyword_index.generation.get(), cwe_bm25_index.generation.get(),
+                             cwe_typeahead_index.generation.get())
+
+    def make_key(self, version, *parts):
+        """
+        @brief: Form the key of an entry.
+        @param: [in] version: The version returned by version(), read before computing the entry.
+        @param: [in] parts: The values the entry depends on, which can be serialized as JSON.
+        @return: The key.
+        """
+        digest = hashlib.md5(json.dumps([version] + list(parts), separators=(',', ':'))).hexdigest()
+        return "rest_api_response:%s:%s" % (self.endpoint, digest)
+
+    def get_many(self, keys):
+        """
+        @brief: Get the entries of several keys with a single round trip to the cache.
+        @param: [in] keys: The keys.
+        @return: A dictionary mapping the keys found in the cache to their entries.
+        """
+        if not self.enabled or not keys:
+            return {}
+        return self.cache.get_many(keys)
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set_many(self, data_dict):
+        """
+        @brief: Store several entries, except those which are larger than the maximum entry size.
+        @param: [in] data_dict: A dictionary mapping the keys to the entries.
+        """
+        if not self.enabled:
+            return
+        if self.max_entry_size is not None:
+            data_dict = dict((key, data) for key, data in data_dict.iteritems()
+                             if len(json.dumps(data, cls=DjangoJSONEncoder)) <= self.max_entry_size)
+        if data_dict:
+            self.cache.set_many(data_dict, timeout=self.timeout)
+
+    def set(self, key, data):
+        self.set_many({key: data})
@@ -1,9 +1,39 @@
+from collections import OrderedDict
+from itertools import izip
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models.query import QuerySet
 from rest_framework import serializers
 from cwe.models import CWE
 from muo.models import MisuseCase
 from muo.models import UseCase
 
 
+class FieldProjectionMixin(object):
+    """
+    @brief: Let the clients ask for a subset of the fields of a serializer, e.g. "fields=id,name", so that
+        only these fields are read from the database and returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        @param: [in] fields: The names of the fields to return, or None to return all of them.
+        """
+        fields = kwargs.pop('fields', None)
+        super(FieldProjectionMixin, self).__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    @classmethod
+    def get_invalid_fields(cls, fields):
+        """
+        @brief: Find the names which are not fields of the serializer.
+        @param: [in] fields: The names of the fields asked for.
+        @return: The list of the invalid names, in the given order.
+        """
+        return [field_name for field_name in fields if field_name not in cls.Meta.fields]
+
+
 class CWESerializer(serializers.ModelSerializer):
     class Meta:
         # Associate this serializer with CWE
@@ -15,7 +45,7 @@ class CWESerializer(serializers.ModelSerializer):
                   )
 
 
-class MisuseCaseSerializer(serializers.ModelSerializer):
+class MisuseCaseSerializer(FieldProjectionMixin, serializers.ModelSerializer):
     class Meta:
         # Associate this serializer with MisuseCase
         model = MisuseCase
@@ -33,7 +63,7 @@ class MisuseCaseSerializer(serializers.ModelSerializer):
                   )
 
 
-class UseCaseSerializer(serializers.ModelSerializer):
+class UseCaseSerializer(FieldProjectionMixin, serializers.ModelSerializer):
     class Meta:
         # Associate this serializer with UseCase
         model = UseCase
@@ -50,4 +80,85 @@ class UseCaseSerializer(serializers.ModelSerializer):
                   'use_case_source',
                   'osr_pattern_type',
                   'osr',    # The description of overlooked security requirement
-                  )
\ No newline at end of file
+                  )
+
+
+class MisuseCaseBundleSerializer(MisuseCaseSerializer):
+    # The use cases are prefetched by the view in the 'bundle_use_cases' attribute
+    use_cases = UseCaseSerializer(source='bundle_use_cases', many=True, read_only=True)
+
+    class Meta(MisuseCaseSerializer.Meta):
+        fields = MisuseCaseSerializer.Meta.fields + ('use_cases',)
+
+
+class CWEBundleSerializer(CWESerializer):
+    # The misuse cases are prefetched by the view in the 'bundle_misuse_cases' attribute
+    misuse_cases = MisuseCaseBundleSerializer(source='bundle_misuse_cases', many=True, read_only=True)
+
+    class Meta(CWESerializer.Meta):
+        fields = CWESerializer.Meta.fields + ('misuse_cases',)
+
+
+class ValuesSerializer(object):
+    """
+    @brief: A read-only fast path of a model serializer for the list responses. The representations are
+        built as plain dictionaries straight from the values of the fields, without instantiating the
+        serializer and its fields for every object. The output is the same as the one of the serializer,
+        so it only supports the serializers whose fields are plain model fields.
+    """
+
+    # The serializer fields whose representation is the value of the model field. Their subclasses may
+    # change the representation, so they are not supported.
+    SUPPORTED_FIELD_CLASSES = (serializers.IntegerField, serializers.CharField, serializers.ChoiceField)
+
+    def __init__(self, serializer_class):
+        """
+        @param: [in] serializer_class: The model serializer whose output is reproduced.
+        """
+        self.serializer_class = serializer_class
+        self.field_names = tuple(serializer_class.Meta.fields)
+        self._checked = False
+
+    def _check_fields(self):
+        # The fields of the serializer can only be built once the models are loaded
+        if self._checked:
+            return
+        for field_name, field in self.serializer_class().fields.items():
+            if type(field) not in self.SUPPORTED_FIELD_CLASSES or field.source != field_name:
+                raise ImproperlyConfigured("The field '%s' of %s is not a plain model field" %
+                                           (field_name, self.serializer_class.__name__))
+        self._checked = True
+
+    def get_field_names(self, fields=None):
+        """
+        @brief: Get the names of the returned fields, in the order of the serializer.
+        @param: [in] fields: The names of the fields to return, or None to return all of them.
+        @return: A tuple of field names.
+        """
+        if fields is None:
+            return self.field_names
+        return tuple(field_name for field_name in self.field_names if field_name in fields)
+
+    def serialize(self, data, fields=None):
+        """
+        @brief: Form the representations of many objects, as serializer_class(data, many=True).data would.
+        @param: [in] data: A queryset, whose values are then read with a single query without building
+            the model instances, or an iterable of model instances or of dictionaries of values.
+        @param: [in] fields: The names of the fields to return, or None to return all of them.
+        @return: A list of ordered dictionaries.
+        @raise: ImproperlyConfigured if a field of the serializer is not a plain model field.
+        """
+        self._check_fields()
+        field_names = self.get_field_names(fields)
+        if isinstance(data, QuerySet):
+            return [OrderedDict(izip(field_names, row)) for row in data.values_list(*field_names)]
+        return [OrderedDict((field_name, item[field_name]) for field_name in field_names)
+                if isinstance(item, dict) else
+                OrderedDict((field_name, getattr(item, field_name)) for field_name in field_names)
+                for item in data]
+
+
+# The fast paths of the serializers of the hot list responses
+cwe_values_serializer = ValuesSerializer(CWESerializer)
+misuse_case_values_serializer = ValuesSerializer(MisuseCaseSerializer)
+use_case_values_serializer = ValuesSerializer(UseCaseSerializer)
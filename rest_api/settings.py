@@ -2,3 +2,36 @@ from django.conf import settings
 
 # Specify how many CWEs are returned when suggesting CWEs according to given report content.
 SUGGESTED_CWE_MAX_RETURN = getattr(settings, "SUGGESTED_CWE_MAX_RETURN", 10)
+
+# Specify how many texts can be sent at most in a single request for suggesting CWEs in batch.
+SUGGESTED_CWE_BATCH_MAX_TEXTS = getattr(settings, "SUGGESTED_CWE_BATCH_MAX_TEXTS", 1000)
+
+# Specify how many objects are read from the database with a single query when exporting the catalogue.
+CATALOGUE_EXPORT_CHUNK_SIZE = getattr(settings, "CATALOGUE_EXPORT_CHUNK_SIZE", 500)
+
+# Specify for how many seconds the user of an authentication token is cached (0 disables the cache), and
+# how many tokens are cached at most in each process. The cache of every process is emptied whenever a token
+# is revoked or a user is deactivated, which is published through CWE_SEARCH_INDEX_CACHE: the tokens are
+# only cached when it is a cache shared by all the worker processes (e.g. memcached or the database cache).
+TOKEN_CACHE_TTL = getattr(settings, "TOKEN_CACHE_TTL", 0)
+TOKEN_CACHE_MAX_SIZE = getattr(settings, "TOKEN_CACHE_MAX_SIZE", 1000)
+
+# Specify for how many seconds a process trusts the last value it read of the counter of the token
+# revocations, rather than reading it from CWE_SEARCH_INDEX_CACHE on every request. The other processes
+# stop accepting a revoked token after at most this delay.
+TOKEN_CACHE_CHECK_INTERVAL = getattr(settings, "TOKEN_CACHE_CHECK_INTERVAL", 1)
+
+# Specify the alias of the cache in which the responses of the suggestion and lookup functions are cached.
+# In production this should be a cache shared by all the worker processes (e.g. memcached or the database cache).
+RESPONSE_CACHE = getattr(settings, "RESPONSE_CACHE", "default")
+
+# Specify, for each cached function, for how many seconds its responses are cached (0 disables the cache)
+# and the length of the JSON of the largest response which is cached.
+RESPONSE_CACHE_POLICIES = getattr(settings, "RESPONSE_CACHE_POLICIES", {
+    'text_related': {'timeout': 300, 'max_entry_size': 64 * 1024},
+    'text_related_batch': {'timeout': 300, 'max_entry_size': 64 * 1024},
+    'search_str': {'timeout': 60, 'max_entry_size': 64 * 1024},
+})
+
+# Specify how many custom MUOs can be sent at most in a single request for saving custom MUOs in batch.
+CUSTOM_MUO_BATCH_MAX_ITEMS = getattr(settings, "CUSTOM_MUO_BATCH_MAX_ITEMS", 1000)
@@ -1,28 +1,68 @@
 import json
 import copy
+from mock import patch
+from unittest import skipUnless
+from StringIO import StringIO
+from datetime import timedelta
 from django.test import TestCase
+from django.test import TransactionTestCase
 from django.test import Client
 from django.core.urlresolvers import reverse
 from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.cache import caches
+from django.db import connection
+from django.db import transaction
+from django.db import IntegrityError
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from allauth.account.models import EmailAddress
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from cwe.models import CWE
 from cwe.models import Keyword
+from cwe.cwe_search import cwe_keyword_index
+from cwe.cwe_search import CWEKeywordSearch
+from cwe.cwe_search import CWESearchLocator
 from muo.models import MisuseCase
 from muo.models import MUOContainer
 from muo.models import UseCase
 from rest_api.views import CWERelatedList
+from rest_api.views import CWERelatedBatch
 from rest_api.views import CWEAllList
 from rest_api.views import CWESearchSingleString
 from rest_api.views import MisuseCaseRelated
 from rest_api.views import UseCaseRelated
 from rest_api.views import SaveCustomMUO
-
-
-class RestAPITestBase(TestCase):
+from rest_api.views import SaveCustomMUOBatch
+from rest_api.views import MUOBundle
+from rest_api.views import CatalogueExport
+from rest_api.pagination import paginate_by_cursor
+from rest_api.serializers import CWESerializer
+from rest_api.serializers import CWEBundleSerializer
+from rest_api.serializers import MisuseCaseSerializer
+from rest_api.serializers import UseCaseSerializer
+from rest_api.serializers import ValuesSerializer
+from rest_api.serializers import cwe_values_serializer
+from rest_api.serializers import misuse_case_values_serializer
+from rest_api.serializers import use_case_values_serializer
+from rest_api.authentication import TokenCache
+from rest_api.authentication import token_cache
+from rest_api.checks import check_token_cache
+from rest_api.response_cache import ResponseCache
+from rest_api.settings import RESPONSE_CACHE
+from cwe.settings import CWE_SEARCH_INDEX_CACHE
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class RestAPITestMixin(object):
 
     _cli = Client()     # The testing client
 
@@ -33,6 +73,8 @@ class RestAPITestBase(TestCase):
     VERY_LARGE_NUM = "999999999999999999999999999999999999999999999999999999999999999999999999999999999999999999999999"
 
     def setUp(self):
+        # The cached responses are not rolled back with the database after each test case
+        caches[RESPONSE_CACHE].clear()
         self.set_up_users_and_tokens()
         self.set_up_test_data()
 
@@ -68,27 +110,42 @@ class RestAPITestBase(TestCase):
 
     def http_get(self, url, params, auth_token_type=AUTH_TOKEN_TYPE_ACTIVE_USER):
         auth_token = self._user_1_token
-        if auth_token_type == RestAPITestBase.AUTH_TOKEN_TYPE_INACTIVE_USER:
+        if auth_token_type == RestAPITestMixin.AUTH_TOKEN_TYPE_INACTIVE_USER:
             auth_token = self._user_3_inactive_token
-        elif auth_token_type == RestAPITestBase.AUTH_TOKEN_TYPE_NONE:
+        elif auth_token_type == RestAPITestMixin.AUTH_TOKEN_TYPE_NONE:
             auth_token = None
         return self._cli.get(url, data=params, HTTP_AUTHORIZATION='Token '+str(auth_token))
 
     def http_post(self, url, data, auth_token_type=AUTH_TOKEN_TYPE_ACTIVE_USER):
         auth_token = self._user_1_token
-        if auth_token_type == RestAPITestBase.AUTH_TOKEN_TYPE_INACTIVE_USER:
+        if auth_token_type == RestAPITestMixin.AUTH_TOKEN_TYPE_INACTIVE_USER:
             auth_token = self._user_3_inactive_token
-        elif auth_token_type == RestAPITestBase.AUTH_TOKEN_TYPE_NONE:
+        elif auth_token_type == RestAPITestMixin.AUTH_TOKEN_TYPE_NONE:
             auth_token = None
         return self._cli.post(url, data, HTTP_AUTHORIZATION='Token '+str(auth_token))
 
 
+class RestAPITestBase(RestAPITestMixin, TestCase):
+    pass
+
+
+class RestAPITransactionTestBase(RestAPITestMixin, TransactionTestCase):
+    """
+    The base of the test cases which are not run in a transaction, for the behaviors which only happen
+    once a change is committed, e.g. the invalidation of the in-memory CWE indexes.
+    """
+    pass
+
+
 class TestCWETextRelated(RestAPITestBase):
 
     CWE_CODES = [101, 102, 103]     # The CWE codes used in the tests
     KEYWORD_NAMES = ["authent", "overflow", "bypass"]      # The names of keywords
 
     def set_up_test_data(self):
+        # The in-memory keyword index is not rolled back with the database after each test case
+        cwe_keyword_index.invalidate()
+
         # Create the keywords
         kw_auth = Keyword(name=self.KEYWORD_NAMES[0])
         kw_auth.save()
@@ -180,6 +237,139 @@ class TestCWETextRelated(RestAPITestBase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class TestCWETextRelatedBatch(RestAPITestBase):
+
+    CWE_CODES = [101, 102, 103]     # The CWE codes used in the tests
+    KEYWORD_NAMES = ["authent", "overflow", "bypass"]      # The names of keywords
+
+    TEXT_AUTHENTICATION = "authentication fails because ..."
+    TEXT_OVERFLOW = "the user can bypass the file access check due to a stack overflow caused by ..."
+    TEXT_NO_MATCH = "the password is leaked because the security level is incorrectly set..."
+
+    def set_up_test_data(self):
+        # The in-memory keyword index is not rolled back with the database after each test case
+        cwe_keyword_index.invalidate()
+
+        # Create the keywords
+        kw_auth = Keyword(name=self.KEYWORD_NAMES[0])
+        kw_auth.save()
+        kw_overflow = Keyword(name=self.KEYWORD_NAMES[1])
+        kw_overflow.save()
+        kw_bypass = Keyword(name=self.KEYWORD_NAMES[2])
+        kw_bypass.save()
+
+        # Create the CWEs
+        cwe101 = CWE(code=self.CWE_CODES[0], name="CWE #"+str(self.CWE_CODES[0]))
+        cwe101.save()
+        cwe101.keywords.add(kw_auth)    # Only one keyword
+
+        cwe102 = CWE(code=self.CWE_CODES[1], name="CWE #"+str(self.CWE_CODES[1]))
+        cwe102.save()
+        cwe102.keywords.add(kw_overflow, kw_bypass)    # Multiple keywords
+
+        cwe103 = CWE(code=self.CWE_CODES[2], name="CWE #"+str(self.CWE_CODES[2]))
+        cwe103.save()
+        cwe103.keywords.add(kw_overflow, kw_bypass)    # Multiple keywords
+
+    def tear_down_test_data(self):
+        # Delete all CWEs.
+        CWE.objects.all().delete()
+        # Delete all keywords.
+        Keyword.objects.all().delete()
+
+    # Helper methods
+
+    def _get_base_url(self):
+        return reverse("restapi_CWETextRelatedBatch")
+
+    def _cwe_info_found(self, content, code):
+        # The IDs depend on the database, so the ID of the CWE is read from it
+        cwe_info = {"id": CWE.objects.get(code=code).id, "code": code, "name": "CWE #" + str(code)}
+        return cwe_info in json.loads(content)[CWERelatedBatch.RESPONSE_KEY_CWE_OBJECTS]
+
+    def _form_post_data(self, texts):
+        return {CWERelatedBatch.PARAM_TEXTS: json.dumps(texts)}
+
+    # Positive test cases
+
+    def test_positive_search_texts(self):
+        texts = [self.TEXT_AUTHENTICATION, self.TEXT_OVERFLOW, self.TEXT_NO_MATCH, ""]
+        response = self.http_post(self._get_base_url(), self._form_post_data(texts))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = json.loads(response.content)
+        self.assertEqual(content[CWERelatedBatch.RESPONSE_KEY_RESULTS], [[101], [102, 103], [], []])
+        self.assertEqual([cwe["code"] for cwe in content[CWERelatedBatch.RESPONSE_KEY_CWE_OBJECTS]], [101, 102, 103])
+
+    def test_positive_cwes_serialized_once(self):
+        texts = [self.TEXT_OVERFLOW, self.TEXT_AUTHENTICATION, self.TEXT_OVERFLOW]
+        response = self.http_post(self._get_base_url(), self._form_post_data(texts))
+        content = json.loads(response.content)
+        self.assertEqual(content[CWERelatedBatch.RESPONSE_KEY_RESULTS], [[102, 103], [101], [102, 103]])
+        self.assertEqual([cwe["code"] for cwe in content[CWERelatedBatch.RESPONSE_KEY_CWE_OBJECTS]], [102, 103, 101])
+        self.assertEqual(self._cwe_info_found(content=response.content, code=101), True)
+
+    def test_positive_search_texts_with_limit(self):
+        max_return = CWERelatedBatch.CWE_MAX_RETURN
+        CWERelatedBatch.CWE_MAX_RETURN = 1   # Only return one CWE per text.
+        try:
+            response = self.http_post(self._get_base_url(), self._form_post_data([self.TEXT_OVERFLOW]))
+            content = json.loads(response.content)
+            self.assertEqual(content[CWERelatedBatch.RESPONSE_KEY_RESULTS], [[102]])
+        finally:
+            CWERelatedBatch.CWE_MAX_RETURN = max_return
+
+    def test_positive_json_data(self):
+        data = json.dumps({CWERelatedBatch.PARAM_TEXTS: [self.TEXT_AUTHENTICATION]})
+        response = self._cli.post(self._get_base_url(), data, content_type="application/json",
+                                  HTTP_AUTHORIZATION='Token ' + self._user_1_token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)[CWERelatedBatch.RESPONSE_KEY_RESULTS], [[101]])
+
+    def test_positive_empty_list(self):
+        response = self.http_post(self._get_base_url(), self._form_post_data([]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {CWERelatedBatch.RESPONSE_KEY_CWE_OBJECTS: [],
+                                                        CWERelatedBatch.RESPONSE_KEY_RESULTS: []})
+
+    # Negative test cases
+
+    def test_negative_malformed_texts(self):
+        malformed_data = [
+            {},     # No texts
+            {CWERelatedBatch.PARAM_TEXTS: "not a JSON string"},
+            {CWERelatedBatch.PARAM_TEXTS: json.dumps("a single text")},
+            {CWERelatedBatch.PARAM_TEXTS: json.dumps([self.TEXT_AUTHENTICATION, 101])},
+        ]
+        for data in malformed_data:
+            response = self.http_post(self._get_base_url(), data)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(json.loads(response.content), CWERelatedBatch._form_err_msg_malformed_texts())
+
+    def test_negative_too_many_texts(self):
+        max_texts = CWERelatedBatch.MAX_TEXTS
+        CWERelatedBatch.MAX_TEXTS = 2
+        try:
+            texts = [self.TEXT_AUTHENTICATION] * 3
+            response = self.http_post(self._get_base_url(), self._form_post_data(texts))
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        finally:
+            CWERelatedBatch.MAX_TEXTS = max_texts
+
+    def test_negative_wrong_method(self):
+        response = self.http_get(self._get_base_url(), self._form_post_data([self.TEXT_AUTHENTICATION]))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_negative_no_authentication_token(self):
+        response = self.http_post(self._get_base_url(), self._form_post_data([self.TEXT_AUTHENTICATION]),
+                                  auth_token_type=RestAPITestBase.AUTH_TOKEN_TYPE_NONE)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_negative_inactive_authentication_token(self):
+        response = self.http_post(self._get_base_url(), self._form_post_data([self.TEXT_AUTHENTICATION]),
+                                  auth_token_type=RestAPITestBase.AUTH_TOKEN_TYPE_INACTIVE_USER)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
 class TestCWEAllList(RestAPITestBase):
 
     CWE_CODES = [101, 102, 103]     # The CWE codes used in the tests
@@ -711,6 +901,94 @@ class TestCWESearchSingleString(RestAPITestBase):
         self.assertTrue(self._cwe_info_empty(content=response.content))
 
 
+class TestCWECursorPagination(RestAPITestBase):
+
+    CWE_CODES = [105, 101, 103, 102, 104]     # The CWE codes used in the tests, not created in order
+
+    def set_up_test_data(self):
+        # Construct the test database
+        for code in self.CWE_CODES:
+            cwe = CWE(code=code, name="CWE #"+str(code))
+            cwe.save()
+
+    # Helper methods
+
+    def _get_page(self, url_name, params):
+        response = self.http_get(reverse(url_name), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(response.content)
+
+    def _get_all_pages(self, url_name, params):
+        pages = []
+        params = dict(params, cursor='')
+        while True:
+            page = self._get_page(url_name, params)
+            pages.append(page)
+            if page[CWEAllList.RESPONSE_KEY_NEXT_CURSOR] is None:
+                return pages
+            params['cursor'] = page[CWEAllList.RESPONSE_KEY_NEXT_CURSOR]
+
+    def _codes(self, pages):
+        return [cwe_object['code'] for page in pages for cwe_object in page[CWEAllList.RESPONSE_KEY_CWE_OBJECTS]]
+
+    # Positive test cases
+
+    def test_positive_all_pages(self):
+        pages = self._get_all_pages("restapi_CWEAll", {'limit': 2})
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(self._codes(pages), [101, 102, 103, 104, 105])
+        for page in pages:
+            self.assertEqual(page[CWEAllList.RESPONSE_KEY_TOTAL_COUNT], 5)
+
+    def test_positive_exact_last_page(self):
+        pages = self._get_all_pages("restapi_CWEAll", {'limit': 5})
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(self._codes(pages), [101, 102, 103, 104, 105])
+
+    def test_positive_filtered(self):
+        pages = self._get_all_pages("restapi_CWEAll", {'limit': 1, 'name_contains': '10'})
+        self.assertEqual(self._codes(pages), [101, 102, 103, 104, 105])
+        pages = self._get_all_pages("restapi_CWEAll", {'limit': 1, 'code': 103})
+        self.assertEqual(self._codes(pages), [103])
+
+    def test_positive_search_single_string(self):
+        pages = self._get_all_pages("restapi_CWESearchSingleString", {'limit': 2, 'search_str': '10'})
+        self.assertEqual(self._codes(pages), [101, 102, 103, 104, 105])
+        self.assertEqual(pages[-1][CWESearchSingleString.RESPONSE_KEY_TOTAL_COUNT], 5)
+
+    def test_positive_page_not_shifted_by_insertion(self):
+        page = self._get_page("restapi_CWEAll", {'limit': 2, 'cursor': ''})
+        # A CWE inserted before the cursor should not shift the next page
+        CWE(code=100, name="CWE #100").save()
+        page = self._get_page("restapi_CWEAll", {'limit': 2, 'cursor': page[CWEAllList.RESPONSE_KEY_NEXT_CURSOR]})
+        self.assertEqual(self._codes([page]), [103, 104])
+
+    def test_positive_constant_queries(self):
+        page = self._get_page("restapi_CWEAll", {'limit': 1, 'cursor': ''})
+        # The next pages neither count the CWEs nor skip the previous ones
+        with self.assertNumQueries(1):
+            paginate_by_cursor(CWE.objects.all(), page[CWEAllList.RESPONSE_KEY_NEXT_CURSOR], 1)
+
+    def test_positive_offset_mode_unchanged(self):
+        page = self._get_page("restapi_CWEAll", {'limit': 2, 'offset': 0})
+        self.assertNotIn(CWEAllList.RESPONSE_KEY_NEXT_CURSOR, page)
+
+    # Negative test cases
+
+    def test_negative_invalid_cursor(self):
+        for cursor in ['abc', 'W10', '!!!', 'WyJhIiwxLDJd']:
+            response = self.http_get(reverse("restapi_CWEAll"), {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            response = self.http_get(reverse("restapi_CWESearchSingleString"), {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_negative_cursor_and_offset(self):
+        response = self.http_get(reverse("restapi_CWEAll"), {'cursor': '', 'offset': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.http_get(reverse("restapi_CWESearchSingleString"), {'cursor': '', 'offset': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class TestMisuseCaseSuggestion(RestAPITestBase):
 
     CWE_CODES = [101, 102, 103]     # The CWE codes used in the tests
@@ -858,6 +1136,72 @@ class TestMisuseCaseSuggestion(RestAPITestBase):
         self.assertEqual(self._misuse_case_info_found(json_content, 4), True)
         self.assertEqual(self._misuse_case_info_found(json_content, 5), False)
 
+    def test_positive_query_count_independent_of_cwes(self):
+        # The misuse cases of all the CWEs are read with a single query, so the number of queries
+        # should not grow with the number of requested CWEs. The first request caches the token.
+        self.http_get(self._get_base_url(), self._form_url_params([self.CWE_CODES[0]]))
+        with CaptureQueriesContext(connection) as single_cwe_queries:
+            self.http_get(self._get_base_url(), self._form_url_params([self.CWE_CODES[0]]))
+        with CaptureQueriesContext(connection) as all_cwes_queries:
+            self.http_get(self._get_base_url(), self._form_url_params(self.CWE_CODES))
+        self.assertEqual(len(all_cwes_queries), len(single_cwe_queries))
+
+    def test_positive_group_by_cwe(self):
+        params = self._form_url_params(self.CWE_CODES)
+        params[MisuseCaseRelated.PARAM_GROUP_BY] = MisuseCaseRelated.GROUP_BY_CWE
+        response = self.http_get(self._get_base_url(), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json_content = json.loads(response.content)
+        # Every misuse case is returned only once, even misuse case #3 which has two of the CWEs.
+        misuse_cases = json_content[MisuseCaseRelated.RESPONSE_KEY_MISUSE_CASES]
+        descriptions = dict((mu['id'], mu['misuse_case_description']) for mu in misuse_cases)
+        self.assertEqual(sorted(descriptions.values()),
+                         ["Misuse Case 1", "Misuse Case 2", "Misuse Case 3", "Misuse Case 4"])
+        # The misuse cases of each CWE are referred to by their IDs.
+        cwe_misuse_cases = json_content[MisuseCaseRelated.RESPONSE_KEY_CWE_MISUSE_CASES]
+        self.assertEqual(dict((code, [descriptions[mu_id] for mu_id in mu_ids])
+                              for code, mu_ids in cwe_misuse_cases.items()),
+                         {"101": ["Misuse Case 1"],
+                          "102": ["Misuse Case 2", "Misuse Case 3", "Misuse Case 4"],
+                          "103": ["Misuse Case 3"]})
+
+    def test_positive_group_by_cwe_without_misuse_cases(self):
+        CWE(code=104).save()
+        params = self._form_url_params([self.CWE_CODES[0], 104])
+        params[MisuseCaseRelated.PARAM_GROUP_BY] = MisuseCaseRelated.GROUP_BY_CWE
+        response = self.http_get(self._get_base_url(), params)
+        json_content = json.loads(response.content)
+        # The requested CWEs without any misuse case are still in the response.
+        misuse_case_ids = [mu['id'] for mu in json_content[MisuseCaseRelated.RESPONSE_KEY_MISUSE_CASES]]
+        self.assertEqual(len(misuse_case_ids), 1)
+        self.assertEqual(json_content[MisuseCaseRelated.RESPONSE_KEY_CWE_MISUSE_CASES],
+                         {"101": misuse_case_ids, "104": []})
+
+    def test_positive_fields(self):
+        params = self._form_url_params(self.CWE_CODES)
+        params[MisuseCaseRelated.PARAM_FIELDS] = "id,misuse_case_description"
+        response = self.http_get(self._get_base_url(), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json_content = json.loads(response.content)
+        # Only the requested fields are returned.
+        self.assertEqual(set(tuple(sorted(mu.keys())) for mu in json_content),
+                         set([('id', 'misuse_case_description')]))
+        self.assertEqual(sorted(mu['misuse_case_description'] for mu in json_content),
+                         ["Misuse Case 1", "Misuse Case 2", "Misuse Case 3", "Misuse Case 4"])
+
+    def test_positive_fields_group_by_cwe(self):
+        params = self._form_url_params(self.CWE_CODES)
+        params[MisuseCaseRelated.PARAM_GROUP_BY] = MisuseCaseRelated.GROUP_BY_CWE
+        params[MisuseCaseRelated.PARAM_FIELDS] = "name"
+        response = self.http_get(self._get_base_url(), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json_content = json.loads(response.content)
+        # The IDs are not returned when they are not requested, but the misuse cases are still grouped.
+        misuse_cases = json_content[MisuseCaseRelated.RESPONSE_KEY_MISUSE_CASES]
+        self.assertEqual(len(misuse_cases), 4)
+        self.assertEqual(set(tuple(mu.keys()) for mu in misuse_cases), set([('name',)]))
+        self.assertEqual(len(json_content[MisuseCaseRelated.RESPONSE_KEY_CWE_MISUSE_CASES]["102"]), 3)
+
     # Negative test cases
 
     def test_negative_very_large_cwe_id(self):
@@ -895,6 +1239,23 @@ class TestMisuseCaseSuggestion(RestAPITestBase):
                          str(json.dumps(MisuseCaseRelated()._form_err_msg_cwes_not_found([104, 105])))
                          )
 
+    def test_negative_invalid_group_by(self):
+        params = self._form_url_params([self.CWE_CODES[0]])
+        params[MisuseCaseRelated.PARAM_GROUP_BY] = "muo"
+        response = self.http_get(self._get_base_url(), params)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.content,
+                         str(json.dumps(MisuseCaseRelated()._form_err_msg_invalid_group_by("muo"))))
+
+    def test_negative_invalid_fields(self):
+        params = self._form_url_params([self.CWE_CODES[0]])
+        params[MisuseCaseRelated.PARAM_FIELDS] = "id,cwes,created_by"
+        response = self.http_get(self._get_base_url(), params)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.content,
+                         str(json.dumps(MisuseCaseRelated()._form_err_msg_invalid_fields(
+                             ["cwes", "created_by"], MisuseCaseSerializer))))
+
     def test_negative_no_authentication_token(self):
         response = self.http_get(self._get_base_url(), self._form_url_params([self.CWE_CODES[0]]),
                                  auth_token_type=RestAPITestBase.AUTH_TOKEN_TYPE_NONE)
@@ -1076,8 +1437,25 @@ class TestUseCaseSuggestion(RestAPITestBase):
         self.assertEqual(self._use_case_info_found(json_content, 6), True)
         self.assertEqual(self._use_case_info_found(json_content, 7), False)
 
+    def test_positive_fields(self):
+        params = self._form_url_params([n for n in range(1, 8)])
+        params[UseCaseRelated.PARAM_FIELDS] = "osr"
+        response = self.http_get(self._get_base_url(), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json_content = json.loads(response.content)
+        # Only the requested field is returned.
+        self.assertEqual(sorted(json_content, key=lambda uc: uc['osr']),
+                         [{'osr': self.DESCRIPTION_BASE_OSR + str(index)} for index in range(1, 7)])
+
     # Negative test cases
 
+    def test_negative_invalid_fields(self):
+        for fields_str in ["", "id,", "id,misuse_case", "osr,name,muo_container"]:
+            params = self._form_url_params([1])
+            params[UseCaseRelated.PARAM_FIELDS] = fields_str
+            response = self.http_get(self._get_base_url(), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_negative_very_large_misuse_case_id(self):
         response = self.http_get(self._get_base_url(), self._form_url_params([self.VERY_LARGE_NUM]))
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1115,6 +1493,594 @@ class TestUseCaseSuggestion(RestAPITestBase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class TestMUOBundle(RestAPITestBase):
+
+    CWE_CODES = [101, 102, 103]     # The CWE codes used in the tests
+
+    def _create_muo(self, cwes, muc_desc, approved, creator):
+        muc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_MISUSE_CASE)
+        muc_dict["misuse_case_description"] = muc_desc
+        uc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_USE_CASE)
+        uc_dict["use_case_description"] = "Use case of " + muc_desc
+        uc_dict["osr"] = "OSR of " + muc_desc
+        MUOContainer.create_custom_muo([cwe.code for cwe in cwes],
+                                       misusecase=muc_dict,
+                                       usecase=uc_dict,
+                                       created_by=creator)
+        muo = MUOContainer.objects.get(misuse_case__misuse_case_description=muc_desc)
+        if approved:
+            muo.action_submit()
+            muo.action_approve()
+
+    def set_up_test_data(self):
+        # The in-memory keyword index is not rolled back with the database after each test case
+        cwe_keyword_index.invalidate()
+
+        kw_auth = Keyword(name="authent")
+        kw_auth.save()
+
+        cwes = []
+        for code in self.CWE_CODES:
+            cwe = CWE(code=code, name="CWE #"+str(code))
+            cwe.save()
+            cwes.append(cwe)
+        cwes[0].keywords.add(kw_auth)
+
+        self._create_muo(cwes=[cwes[0], cwes[1]], muc_desc="Misuse Case 1", approved=True, creator=self._user_1)
+        self._create_muo(cwes=[cwes[1]], muc_desc="Misuse Case 2", approved=False, creator=self._user_1)
+        # A custom MUO of another user, which should never be returned
+        self._create_muo(cwes=[cwes[0]], muc_desc="Misuse Case 3", approved=False, creator=self._user_2)
+
+    def tear_down_test_data(self):
+        for muo in MUOContainer.objects.all():
+            if muo.status == 'approved':
+                muo.action_reject(reject_reason="In order to delete the test data.")
+        MUOContainer.objects.all().delete()
+        MisuseCase.objects.all().delete()
+        CWE.objects.all().delete()
+        Keyword.objects.all().delete()
+
+    # Helper methods
+
+    def _get_base_url(self):
+        return reverse("restapi_MUOBundle")
+
+    def _get_tree(self, json_content):
+        # Reduce the bundle to the CWE codes, the misuse case descriptions and the OSRs.
+        return [(json_cwe['code'],
+                 [(json_mu['misuse_case_description'], [json_uc['osr'] for json_uc in json_mu['use_cases']])
+                  for json_mu in json_cwe['misuse_cases']])
+                for json_cwe in json_content]
+
+    # Positive test cases
+
+    def test_positive_cwes(self):
+        response = self.http_get(self._get_base_url(), {MUOBundle.PARAM_CWES: "101,102,103"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._get_tree(json.loads(response.content)), [
+            (101, [("Misuse Case 1", ["OSR of Misuse Case 1"])]),
+            (102, [("Misuse Case 1", ["OSR of Misuse Case 1"]), ("Misuse Case 2", ["OSR of Misuse Case 2"])]),
+            (103, []),
+        ])
+
+    def test_positive_text(self):
+        response = self.http_get(self._get_base_url(), {MUOBundle.PARAM_TEXT: "authentication"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._get_tree(json.loads(response.content)),
+                         [(101, [("Misuse Case 1", ["OSR of Misuse Case 1"])])])
+
+    def test_positive_constant_queries(self):
+        # The token, the CWEs, the misuse cases and the use cases
+        with self.assertNumQueries(4):
+            self.http_get(self._get_base_url(), {MUOBundle.PARAM_CWES: "101"})
+
+        # More CWEs, misuse cases and use cases are read with the same queries
+        for index in range(4, 8):
+            self._create_muo(cwes=list(CWE.objects.all()), muc_desc="Misuse Case " + str(index),
+                             approved=(index % 2 == 0), creator=self._user_1)
+        # The token is cached since the first request
+        with self.assertNumQueries(3):
+            response = self.http_get(self._get_base_url(), {MUOBundle.PARAM_CWES: "101,102,103"})
+        self.assertEqual([len(json_cwe['misuse_cases']) for json_cwe in json.loads(response.content)], [5, 6, 4])
+
+    # Negative test cases
+
+    def test_negative_no_parameter(self):
+        response = self.http_get(self._get_base_url(), {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.content, str(json.dumps(MUOBundle._form_err_msg_exactly_one_present())))
+
+    def test_negative_both_parameters(self):
+        response = self.http_get(self._get_base_url(), {MUOBundle.PARAM_CWES: "101", MUOBundle.PARAM_TEXT: "text"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.content, str(json.dumps(MUOBundle._form_err_msg_exactly_one_present())))
+
+    def test_negative_malformed_cwes(self):
+        response = self.http_get(self._get_base_url(), {MUOBundle.PARAM_CWES: "101,"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.content,
+                         str(json.dumps(MisuseCaseRelated._form_err_msg_malformed_cwes("101,"))))
+
+    def test_negative_very_large_cwe_code(self):
+        response = self.http_get(self._get_base_url(), {MUOBundle.PARAM_CWES: self.VERY_LARGE_NUM})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_negative_not_found_cwes(self):
+        response = self.http_get(self._get_base_url(), {MUOBundle.PARAM_CWES: "101,104"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.content,
+                         str(json.dumps(MisuseCaseRelated._form_err_msg_cwes_not_found(["104"]))))
+
+    def test_negative_no_authentication_token(self):
+        response = self.http_get(self._get_base_url(), {MUOBundle.PARAM_CWES: "101"},
+                                 auth_token_type=RestAPITestBase.AUTH_TOKEN_TYPE_NONE)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestCatalogueExport(RestAPITestBase):
+
+    CWE_CODES = [101, 102, 103]     # The CWE codes used in the tests
+
+    def _create_muo(self, cwes, muc_desc, approved):
+        muc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_MISUSE_CASE)
+        muc_dict["misuse_case_description"] = muc_desc
+        uc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_USE_CASE)
+        uc_dict["use_case_description"] = "Use case of " + muc_desc
+        uc_dict["osr"] = "OSR of " + muc_desc
+        MUOContainer.create_custom_muo([cwe.code for cwe in cwes],
+                                       misusecase=muc_dict,
+                                       usecase=uc_dict,
+                                       created_by=self._user_1)
+        muo = MUOContainer.objects.get(misuse_case__misuse_case_description=muc_desc)
+        if approved:
+            muo.action_submit()
+            muo.action_approve()
+
+    def set_up_test_data(self):
+        cwes = []
+        for code in self.CWE_CODES:
+            cwe = CWE(code=code, name="CWE #"+str(code))
+            cwe.save()
+            cwes.append(cwe)
+
+        self._create_muo(cwes=[cwes[0], cwes[2]], muc_desc="Misuse Case 1", approved=True)
+        self._create_muo(cwes=[cwes[1]], muc_desc="Misuse Case 2", approved=False)
+
+    def tear_down_test_data(self):
+        for muo in MUOContainer.objects.all():
+            if muo.status == 'approved':
+                muo.action_reject(reject_reason="In order to delete the test data.")
+        MUOContainer.objects.all().delete()
+        MisuseCase.objects.all().delete()
+        CWE.objects.all().delete()
+
+    # Helper methods
+
+    def _get_base_url(self):
+        return reverse("restapi_CatalogueExport")
+
+    def _export(self, params=None):
+        response = self.http_get(self._get_base_url(), params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], CatalogueExport.CONTENT_TYPE)
+        content = b''.join(response.streaming_content)
+        return [json.loads(line) for line in content.splitlines()]
+
+    # Positive test cases
+
+    def test_positive_full_export(self):
+        records = self._export()
+        self.assertEqual([(record['type'], record.get('code')) for record in records],
+                         [('cwe', 101), ('cwe', 102), ('cwe', 103), ('misuse_case', None), ('use_case', None)])
+        misuse_case = records[3]
+        self.assertEqual(misuse_case['misuse_case_description'], "Misuse Case 1")
+        self.assertEqual(misuse_case['cwes'], [101, 103])
+        use_case = records[4]
+        self.assertEqual(use_case['misuse_case'], misuse_case['id'])
+        self.assertEqual(use_case['osr'], "OSR of Misuse Case 1")
+
+    def test_positive_chunks(self):
+        original_chunk_size = CatalogueExport.CHUNK_SIZE
+        CatalogueExport.CHUNK_SIZE = 1
+        try:
+            records = self._export()
+        finally:
+            CatalogueExport.CHUNK_SIZE = original_chunk_size
+        self.assertEqual(len(records), 5)
+
+    def test_positive_modified_since(self):
+        CWE.objects.filter(code=101).update(modified_at=timezone.now() - timedelta(days=2))
+        MisuseCase.objects.update(modified_at=timezone.now() - timedelta(days=2))
+        UseCase.objects.update(modified_at=timezone.now() - timedelta(days=2))
+        since = (timezone.now() - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        records = self._export({CatalogueExport.PARAM_MODIFIED_SINCE: since})
+        self.assertEqual([(record['type'], record.get('code')) for record in records], [('cwe', 102), ('cwe', 103)])
+
+    def test_positive_constant_queries(self):
+        # One query per chunk of each type, and one for the CWEs of each chunk of misuse cases
+        response = self.http_get(self._get_base_url(), {})
+        with self.assertNumQueries(4):
+            list(response.streaming_content)
+
+    # Negative test cases
+
+    def test_negative_invalid_modified_since(self):
+        for value in ["yesterday", "2015-13-01T00:00:00Z", ""]:
+            response = self.http_get(self._get_base_url(), {CatalogueExport.PARAM_MODIFIED_SINCE: value})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_negative_no_auth_token(self):
+        response = self.http_get(self._get_base_url(), {}, auth_token_type=RestAPITestBase.AUTH_TOKEN_TYPE_NONE)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestConditionalGet(RestAPITestBase):
+
+    CWE_CODES = [101, 102, 103]     # The CWE codes used in the tests
+
+    def set_up_test_data(self):
+        cwes = []
+        for code in self.CWE_CODES:
+            cwe = CWE(code=code, name="CWE #"+str(code))
+            cwe.save()
+            cwes.append(cwe)
+
+        muc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_MISUSE_CASE)
+        muc_dict["misuse_case_description"] = "Misuse Case 1"
+        uc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_USE_CASE)
+        MUOContainer.create_custom_muo([101, 102], misusecase=muc_dict, usecase=uc_dict, created_by=self._user_1)
+        self._misuse_case = MisuseCase.objects.get(misuse_case_description="Misuse Case 1")
+
+    def tear_down_test_data(self):
+        MUOContainer.objects.all().delete()
+        MisuseCase.objects.all().delete()
+        CWE.objects.all().delete()
+
+    # Helper methods
+
+    def _conditional_get(self, url, params, etag):
+        return self._cli.get(url, data=params, HTTP_AUTHORIZATION='Token '+str(self._user_1_token),
+                             HTTP_IF_NONE_MATCH=etag)
+
+    def _assert_not_modified_until_changed(self, url, params, change):
+        response = self.http_get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self._conditional_get(url, params, etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        change()
+        response = self._conditional_get(url, params, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    # Positive test cases
+
+    def test_positive_cwe_all_modified(self):
+        def change():
+            cwe = CWE.objects.get(code=102)
+            cwe.name = "Renamed"
+            cwe.save()
+        self._assert_not_modified_until_changed(reverse("restapi_CWEAll"), {'limit': 2}, change)
+
+    def test_positive_cwe_all_deleted(self):
+        def change():
+            CWE.objects.get(code=103).delete()
+        self._assert_not_modified_until_changed(reverse("restapi_CWEAll"), {}, change)
+
+    def test_positive_misuse_case_related(self):
+        def change():
+            self._misuse_case.misuse_case_description = "Changed"
+            self._misuse_case.save()
+        self._assert_not_modified_until_changed(reverse("restapi_MisuseCase_CWERelated"),
+                                                {MisuseCaseRelated.PARAM_CWES: "101,102"}, change)
+
+    def test_positive_use_case_related(self):
+        def change():
+            UseCase.objects.update(use_case_description="Changed", modified_at=timezone.now())
+        self._assert_not_modified_until_changed(reverse("restapi_UseCase_MisuseCaseRelated"),
+                                                {UseCaseRelated.PARAM_MISUSE_CASES: str(self._misuse_case.id)},
+                                                change)
+
+    def test_positive_not_modified_without_serializing(self):
+        response = self.http_get(reverse("restapi_CWEAll"), {})
+        # Only the total count and the validators of the page are read from the database, as the token is cached
+        with self.assertNumQueries(2):
+            response = self._conditional_get(reverse("restapi_CWEAll"), {}, response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_positive_private_cache(self):
+        response = self.http_get(reverse("restapi_CWEAll"), {})
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_positive_misuse_case_replaced(self):
+        def change():
+            # Another misuse case with the same modification time replaces the misuse case of the CWE
+            modified_at = MisuseCase.objects.get(id=self._misuse_case.id).modified_at
+            muc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_MISUSE_CASE)
+            muc_dict["misuse_case_description"] = "Misuse Case 2"
+            uc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_USE_CASE)
+            MUOContainer.create_custom_muo([101], misusecase=muc_dict, usecase=uc_dict, created_by=self._user_1)
+            MisuseCase.objects.update(modified_at=modified_at)
+            MUOContainer.objects.filter(misuse_case=self._misuse_case).delete()
+        self._assert_not_modified_until_changed(reverse("restapi_MisuseCase_CWERelated"),
+                                                {MisuseCaseRelated.PARAM_CWES: "101"}, change)
+
+    def test_positive_misuse_case_cwes_changed(self):
+        def change():
+            self._misuse_case.cwes.remove(CWE.objects.get(code=102))
+        self._assert_not_modified_until_changed(reverse("restapi_MisuseCase_CWERelated"),
+                                                {MisuseCaseRelated.PARAM_CWES: "101,102",
+                                                 MisuseCaseRelated.PARAM_GROUP_BY: "cwe"}, change)
+
+    def test_positive_cursor_modified(self):
+        def change():
+            cwe = CWE.objects.get(code=101)
+            cwe.name = "Renamed"
+            cwe.save()
+        self._assert_not_modified_until_changed(reverse("restapi_CWEAll"),
+                                                {CWEAllList.PARAM_CURSOR: "", 'limit': 2}, change)
+
+    def test_positive_next_cursor_modified(self):
+        response = self.http_get(reverse("restapi_CWEAll"), {CWEAllList.PARAM_CURSOR: "", 'limit': 1})
+        next_cursor = json.loads(response.content)[CWEAllList.RESPONSE_KEY_NEXT_CURSOR]
+
+        def change():
+            CWE.objects.get(code=103).delete()
+        self._assert_not_modified_until_changed(reverse("restapi_CWEAll"),
+                                                {CWEAllList.PARAM_CURSOR: next_cursor, 'limit': 2}, change)
+
+    # Negative test cases
+
+    def test_negative_other_page(self):
+        response = self.http_get(reverse("restapi_CWEAll"), {'offset': 0, 'limit': 1})
+        response = self._conditional_get(reverse("restapi_CWEAll"), {'offset': 1, 'limit': 1}, response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_negative_other_media_type(self):
+        response = self.http_get(reverse("restapi_CWEAll"), {})
+        response = self._cli.get(reverse("restapi_CWEAll"), HTTP_AUTHORIZATION='Token '+str(self._user_1_token),
+                                 HTTP_IF_NONE_MATCH=response['ETag'], HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_negative_stale_etag(self):
+        response = self._conditional_get(reverse("restapi_CWEAll"), {}, '"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestCachedTokenAuthentication(RestAPITransactionTestBase):
+
+    def setUp(self):
+        # The project settings cache the tokens, as the revocations are published through a cache shared by
+        # the processes. The revocations are only published once they are committed.
+        token_cache.invalidate()
+        super(TestCachedTokenAuthentication, self).setUp()
+
+    # Helper methods
+
+    def _get_base_url(self):
+        return reverse("restapi_CWEAll")
+
+    def _queries_token(self, auth_token):
+        with CaptureQueriesContext(connection) as queries:
+            response = self._cli.get(self._get_base_url(), HTTP_AUTHORIZATION='Token '+str(auth_token))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return any('authtoken_token' in query['sql'] for query in queries)
+
+    # Positive test cases
+
+    def test_positive_token_cached(self):
+        self.assertEqual(self._queries_token(self._user_1_token), True)
+        self.assertEqual(self._queries_token(self._user_1_token), False)
+        # Every token has its own entry
+        self.assertEqual(self._queries_token(self._user_2_token), True)
+        self.assertEqual(self._queries_token(self._user_2_token), False)
+
+    def test_positive_regenerated_token(self):
+        self._user_1.set_password('password')
+        self._user_1.save()
+        self.assertEqual(self._queries_token(self._user_1_token), True)
+
+        # Regenerate the token in the profile page
+        client = Client()
+        client.login(username='user_1', password='password')
+        client.post(reverse('user_profile'), {'rest_token_submit': ''})
+        new_token = Token.objects.get(user=self._user_1)
+        self.assertNotEqual(new_token.key, self._user_1_token)
+
+        response = self.http_get(self._get_base_url(), {})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self._queries_token(new_token), True)
+
+    def test_positive_cache_bounded(self):
+        cache = TokenCache(max_size=2, ttl=60, generation_key='test_token_cache_generation')
+        for key in ('a', 'b', 'c'):
+            cache.set(key, self._user_1, key, cache.generation.get())
+        # The least recently used entry is evicted
+        self.assertEqual(cache.get('a'), None)
+        self.assertEqual(cache.get('b'), (self._user_1, 'b'))
+        self.assertEqual(cache.get('c'), (self._user_1, 'c'))
+
+    def test_positive_cache_expired(self):
+        cache = TokenCache(max_size=2, ttl=60, generation_key='test_token_cache_generation')
+        with patch('rest_api.authentication.time.time', return_value=1000.0):
+            cache.set('a', self._user_1, 'a', cache.generation.get())
+        with patch('rest_api.authentication.time.time', return_value=1059.0):
+            self.assertEqual(cache.get('a'), (self._user_1, 'a'))
+        with patch('rest_api.authentication.time.time', return_value=1060.0):
+            self.assertEqual(cache.get('a'), None)
+
+    def test_positive_cache_invalidated_by_other_process(self):
+        cache = TokenCache(max_size=2, ttl=60, generation_key='test_token_cache_generation')
+        other_process_cache = TokenCache(max_size=2, ttl=60, generation_key='test_token_cache_generation')
+        cache.set('a', self._user_1, 'a', cache.generation.get())
+        other_process_cache.invalidate()
+        self.assertEqual(cache.get('a'), None)
+
+    def test_positive_cache_disabled(self):
+        cache = TokenCache(max_size=2, ttl=0, generation_key='test_token_cache_generation')
+        cache.set('a', self._user_1, 'a', cache.generation.get())
+        self.assertEqual(cache.get('a'), None)
+
+    def test_positive_revoked_on_commit(self):
+        self.assertEqual(self._queries_token(self._user_1_token), True)
+        with transaction.atomic():
+            Token.objects.filter(user=self._user_1).delete()
+            # Another process could still read the token until the deletion is committed
+            self.assertEqual(token_cache.get(self._user_1_token)[0], self._user_1)
+        self.assertEqual(token_cache.get(self._user_1_token), None)
+
+    def test_positive_not_revoked_on_rollback(self):
+        generation = token_cache.generation.get()
+        try:
+            with transaction.atomic():
+                self._user_1.is_active = False
+                self._user_1.save()
+                raise IntegrityError
+        except IntegrityError:
+            pass
+        self.assertEqual(token_cache.generation.get(), generation)
+
+    # Negative test cases
+
+    def test_negative_local_cache(self):
+        # The revocations would not reach the other processes
+        with self.settings(CACHES={CWE_SEARCH_INDEX_CACHE: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            cache = TokenCache(max_size=2, ttl=60, generation_key='test_token_cache_generation')
+            cache.set('a', self._user_1, 'a', cache.generation.get())
+            self.assertEqual(cache.get('a'), None)
+            self.assertEqual([error.id for error in check_token_cache(None)], ['rest_api.E001'])
+        self.assertEqual(check_token_cache(None), [])
+
+    def test_negative_deactivated_user(self):
+        self.http_get(self._get_base_url(), {})
+        self._user_1.is_active = False
+        self._user_1.save()
+        response = self.http_get(self._get_base_url(), {})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_negative_deleted_token(self):
+        self.http_get(self._get_base_url(), {})
+        Token.objects.filter(user=self._user_1).delete()
+        response = self.http_get(self._get_base_url(), {})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_negative_revoked_while_reading(self):
+        cache = TokenCache(max_size=2, ttl=60, generation_key='test_token_cache_generation')
+        generation = cache.generation.get()
+        # A token is revoked after the generation is read, and before the entry is cached
+        cache.invalidate()
+        cache.set('a', self._user_1, 'a', generation)
+        self.assertEqual(cache.get('a'), None)
+
+
+class TestResponseCache(RestAPITransactionTestBase):
+
+    def set_up_test_data(self):
+        # The in-memory indexes are not rolled back with the database after each test case
+        cwe_keyword_index.invalidate()
+
+        self._kw_auth = Keyword(name="authent")
+        self._kw_auth.save()
+        self._kw_overflow = Keyword(name="overflow")
+        self._kw_overflow.save()
+
+        self._cwe101 = CWE(code=101, name="Authentication Bypass")
+        self._cwe101.save()
+        self._cwe101.keywords.add(self._kw_auth)
+        self._cwe102 = CWE(code=102, name="Stack Overflow")
+        self._cwe102.save()
+        self._cwe102.keywords.add(self._kw_overflow)
+
+    def tear_down_test_data(self):
+        CWE.objects.all().delete()
+        Keyword.objects.all().delete()
+
+    # Helper methods
+
+    def _text_related_codes(self, text):
+        response = self.http_get(reverse("restapi_CWETextRelated"), {CWERelatedList.PARAM_TEXT: text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [json_cwe['code'] for json_cwe in json.loads(response.content)]
+
+    def _search_str_names(self, search_str):
+        response = self.http_get(reverse("restapi_CWESearchSingleString"),
+                                 {CWESearchSingleString.PARAM_SEARCH_STR: search_str})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [json_cwe['name'] for json_cwe in
+                json.loads(response.content)[CWESearchSingleString.RESPONSE_KEY_CWE_OBJECTS]]
+
+    # Positive test cases
+
+    def test_positive_text_related_cached(self):
+        self.assertEqual(self._text_related_codes("The authentication fails"), [101])
+        # The same stemmed token set, with other stop words, case and inflections, is read from the cache.
+        # Only the cached response is read from the database, as the authentication token is cached too.
+        with self.assertNumQueries(1):
+            self.assertEqual(self._text_related_codes("AUTHENTICATED failing"), [101])
+
+    def test_positive_text_related_invalidated_by_keyword_change(self):
+        self.assertEqual(self._text_related_codes("authentication overflow"), [101, 102])
+        self._cwe102.keywords.remove(self._kw_overflow)
+        self.assertEqual(self._text_related_codes("authentication overflow"), [101])
+
+    def test_positive_text_related_per_provider(self):
+        self.assertEqual(self._text_related_codes("authentication"), [101])
+        # Another search algorithm does not read the responses of the first one.
+        provider = CWESearchLocator.service_provider
+        CWESearchLocator.service_provider = CWEKeywordSearch()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self._text_related_codes("authentication"), [101])
+        finally:
+            CWESearchLocator.service_provider = provider
+        self.assertNotEqual(len(queries), 0)
+
+    def test_positive_batch_only_missing_texts_searched(self):
+        url = reverse("restapi_CWETextRelatedBatch")
+        self.http_post(url, {CWERelatedBatch.PARAM_TEXTS: json.dumps(["authentication"])})
+
+        cwe_search = CWESearchLocator.get_instance()
+        with patch.object(cwe_search, 'search_cwes_many', wraps=cwe_search.search_cwes_many) as search_cwes_many:
+            response = self.http_post(url, {CWERelatedBatch.PARAM_TEXTS:
+                                            json.dumps(["authentication", "overflow", "overflows"])})
+        # The first text was cached by the previous batch and the last two have the same stemmed token set.
+        self.assertEqual(search_cwes_many.call_args[0][0], ["overflow"])
+        json_content = json.loads(response.content)
+        self.assertEqual(json_content[CWERelatedBatch.RESPONSE_KEY_RESULTS], [[101], [102], [102]])
+        self.assertEqual([json_cwe['code'] for json_cwe in json_content[CWERelatedBatch.RESPONSE_KEY_CWE_OBJECTS]],
+                         [101, 102])
+
+    def test_positive_search_str_cached(self):
+        self.assertEqual(self._search_str_names("bypass"), ["Authentication Bypass"])
+        # Only the cached response is read from the database, as the token is cached too
+        with self.assertNumQueries(1):
+            self.assertEqual(self._search_str_names("BYPASS"), ["Authentication Bypass"])
+
+    def test_positive_search_str_invalidated_by_cwe_change(self):
+        self.assertEqual(self._search_str_names("bypass"), ["Authentication Bypass"])
+        self._cwe101.name = "Authentication Bypass by Spoofing"
+        self._cwe101.save()
+        self.assertEqual(self._search_str_names("bypass"), ["Authentication Bypass by Spoofing"])
+
+    def test_positive_disabled(self):
+        response_cache = ResponseCache('text_related', policies={'text_related': {'timeout': 0}})
+        response_cache.set('key', [1])
+        self.assertEqual(response_cache.get('key'), None)
+
+    def test_positive_max_entry_size(self):
+        response_cache = ResponseCache('text_related',
+                                       policies={'text_related': {'timeout': 60, 'max_entry_size': 10}})
+        response_cache.set_many({'small': [1], 'large': range(100)})
+        self.assertEqual(response_cache.get('small'), [1])
+        self.assertEqual(response_cache.get('large'), None)
+
+
 class TestSaveCustomMUO(RestAPITestBase):
 
     _cli = Client()
@@ -1426,4 +2392,280 @@ class TokenCreationDeletion(TestCase):
 
         # Verify: The created token has been deleted.
         tokens = Token.objects.filter(user=client_user)
-        self.assertEqual(tokens.count(), 0)
\ No newline at end of file
+        self.assertEqual(tokens.count(), 0)
+
+
+class TestSaveCustomMUOBatch(RestAPITestBase):
+
+    CWE_CODES = [101, 102, 103]     # The CWE codes used in the tests
+
+    def set_up_test_data(self):
+        for code in self.CWE_CODES:
+            CWE(code=code, name="CWE #"+str(code)).save()
+
+    def tear_down_test_data(self):
+        MUOContainer.objects.all().delete()
+        MisuseCase.objects.all().delete()
+        UseCase.objects.all().delete()
+        CWE.objects.all().delete()
+
+    # Helper methods
+
+    def _get_base_url(self):
+        return reverse("restapi_CustomMUO_CreateBatch")
+
+    def _form_muo(self, cwe_code_list, index):
+        muc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_MISUSE_CASE)
+        muc_dict["misuse_case_description"] = "Misuse Case " + str(index)
+        uc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_USE_CASE)
+        uc_dict["use_case_description"] = "Use Case " + str(index)
+        uc_dict["osr"] = "OSR " + str(index)
+        return {SaveCustomMUO.PARAM_CWE_CODES: cwe_code_list,
+                SaveCustomMUO.PARAM_MISUSE_CASE: muc_dict,
+                SaveCustomMUO.PARAM_USE_CASE: uc_dict}
+
+    def _post_muos(self, muos):
+        return self.http_post(self._get_base_url(), {SaveCustomMUOBatch.PARAM_MUOS: json.dumps(muos)})
+
+    # Positive test cases
+
+    def test_positive_all_valid(self):
+        response = self._post_muos([self._form_muo([101], 0), self._form_muo([102, 103], 1)])
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+        muo_names = json.loads(response.content)[SaveCustomMUOBatch.RESPONSE_KEY_MUO_CONTAINERS]
+        self.assertEqual(len(muo_names), 2)
+        for index, (muo_name, cwe_codes) in enumerate(zip(muo_names, [[101], [102, 103]])):
+            muo = MUOContainer.objects.get(name=muo_name)
+            self.assertEqual(muo.name, "MUO-{0:05d}".format(muo.id))
+            self.assertEqual((muo.is_custom, muo.is_published, muo.status), (True, False, 'draft'))
+            self.assertEqual(muo.created_by, self._user_1)
+            self.assertEqual(sorted(cwe.code for cwe in muo.cwes.all()), cwe_codes)
+
+            misuse_case = muo.misuse_case
+            self.assertEqual(misuse_case.name, "MU-{0:05d}".format(misuse_case.id))
+            self.assertEqual(misuse_case.misuse_case_description, "Misuse Case " + str(index))
+            self.assertEqual(sorted(cwe.code for cwe in misuse_case.cwes.all()), cwe_codes)
+
+            use_case = muo.usecase_set.get()
+            self.assertEqual(use_case.name, "UC-{0:05d}".format(use_case.id))
+            self.assertEqual(use_case.misuse_case, misuse_case)
+            self.assertEqual(use_case.osr, "OSR " + str(index))
+
+    def test_positive_json_data(self):
+        response = self._cli.post(self._get_base_url(),
+                                  json.dumps({SaveCustomMUOBatch.PARAM_MUOS: [self._form_muo([101], 0)]}),
+                                  content_type='application/json',
+                                  HTTP_AUTHORIZATION='Token '+self._user_1_token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertEqual(MUOContainer.objects.count(), 1)
+
+    def test_positive_constant_queries(self):
+        # The first request caches the token
+        self._post_muos([self._form_muo([101], 0)])
+        with CaptureQueriesContext(connection) as few_muos_queries:
+            self._post_muos([self._form_muo([101], index) for index in range(2)])
+        with CaptureQueriesContext(connection) as many_muos_queries:
+            self._post_muos([self._form_muo(self.CWE_CODES, index) for index in range(30)])
+        self.assertEqual(len(many_muos_queries), len(few_muos_queries))
+        self.assertEqual(MUOContainer.objects.count(), 33)
+        self.assertEqual(UseCase.objects.filter(name="/").count(), 0)
+
+    # Negative test cases
+
+    def test_negative_invalid_muos(self):
+        muo_missing_section = self._form_muo([101], 2)
+        del muo_missing_section[SaveCustomMUO.PARAM_USE_CASE]
+        muo_missing_field = self._form_muo([101], 4)
+        del muo_missing_field[SaveCustomMUO.PARAM_MISUSE_CASE]["misuse_case_source"]
+        muos = [
+            self._form_muo([101], 0),
+            self._form_muo([101, 104], 1),     # CWE not found
+            muo_missing_section,
+            self._form_muo("101", 3),     # Not a list of CWE codes
+            muo_missing_field,
+        ]
+        response = self._post_muos(muos)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(json.loads(response.content)[SaveCustomMUOBatch.RESPONSE_KEY_ERRORS], {
+            "1": MisuseCaseRelated._form_err_msg_cwes_not_found([104]),
+            "2": SaveCustomMUO._form_err_msg_section_missing([SaveCustomMUO.PARAM_USE_CASE]),
+            "3": SaveCustomMUO._form_err_msg_invalid_cwe_codes('"101"'),
+            "4": SaveCustomMUO._form_err_msg_fields_missing("misuse case", ["misuse_case_source"]),
+        })
+        # Nothing is saved, not even the valid MUO.
+        self.assertEqual(MUOContainer.objects.count(), 0)
+        self.assertEqual(MisuseCase.objects.count(), 0)
+
+    def test_negative_malformed_muos(self):
+        for muos_str in ["", "{}", "[", "101"]:
+            response = self.http_post(self._get_base_url(), {SaveCustomMUOBatch.PARAM_MUOS: muos_str})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.content, str(json.dumps(SaveCustomMUOBatch._form_err_msg_malformed_muos())))
+
+    def test_negative_too_many_muos(self):
+        max_items = SaveCustomMUOBatch.MAX_ITEMS
+        SaveCustomMUOBatch.MAX_ITEMS = 1
+        try:
+            response = self._post_muos([self._form_muo([101], index) for index in range(2)])
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.content, str(json.dumps(SaveCustomMUOBatch._form_err_msg_too_many_muos(2))))
+        finally:
+            SaveCustomMUOBatch.MAX_ITEMS = max_items
+
+    def test_negative_wrong_method(self):
+        response = self.http_get(self._get_base_url(), {})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_negative_no_authentication_token(self):
+        response = self.http_post(self._get_base_url(), {SaveCustomMUOBatch.PARAM_MUOS: "[]"},
+                                  auth_token_type=RestAPITestBase.AUTH_TOKEN_TYPE_NONE)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+
+@skipUnless(msgpack is not None, "The MessagePack renderer and parser need the msgpack-python package")
+class TestMessagePack(RestAPITestBase):
+
+    CWE_CODES = [101, 102]     # The CWE codes used in the tests
+
+    MEDIA_TYPE = "application/msgpack"
+
+    def set_up_test_data(self):
+        for code in self.CWE_CODES:
+            CWE(code=code, name=u"CWE \u00e9 #"+str(code)).save()
+        muc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_MISUSE_CASE)
+        muc_dict["misuse_case_description"] = u"Misuse Case \u00e9"
+        MUOContainer.create_custom_muo(self.CWE_CODES, misusecase=muc_dict,
+                                       usecase=copy.deepcopy(SaveCustomMUO.TEMPLATE_USE_CASE),
+                                       created_by=self._user_1)
+
+    def tear_down_test_data(self):
+        MUOContainer.objects.all().delete()
+        MisuseCase.objects.all().delete()
+        UseCase.objects.all().delete()
+        CWE.objects.all().delete()
+
+    # Helper methods
+
+    def _get_misuse_cases(self, params, **headers):
+        return self._cli.get(reverse("restapi_MisuseCase_CWERelated"), data=params,
+                             HTTP_AUTHORIZATION='Token '+self._user_1_token, **headers)
+
+    def _post_msgpack(self, content):
+        return self._cli.post(reverse("restapi_CustomMUO_CreateBatch"), content, content_type=self.MEDIA_TYPE,
+                              HTTP_AUTHORIZATION='Token '+self._user_1_token)
+
+    # Positive test cases
+
+    def test_positive_accept_header(self):
+        params = {MisuseCaseRelated.PARAM_CWES: "101,102"}
+        json_response = self._get_misuse_cases(params)
+        self.assertEqual(json_response['Content-Type'], "application/json")
+
+        response = self._get_misuse_cases(params, HTTP_ACCEPT=self.MEDIA_TYPE)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], self.MEDIA_TYPE)
+        # The same data is returned, and MessagePack is more compact than JSON.
+        self.assertEqual(msgpack.unpackb(response.content, encoding='utf-8'), json.loads(json_response.content))
+        self.assertLess(len(response.content), len(json_response.content))
+
+    def test_positive_format_parameter(self):
+        response = self._get_misuse_cases({MisuseCaseRelated.PARAM_CWES: "101", 'format': 'msgpack'})
+        self.assertEqual(response['Content-Type'], self.MEDIA_TYPE)
+        misuse_cases = msgpack.unpackb(response.content, encoding='utf-8')
+        self.assertEqual([mu['misuse_case_description'] for mu in misuse_cases], [u"Misuse Case \u00e9"])
+
+    def test_positive_error_message(self):
+        response = self._get_misuse_cases({MisuseCaseRelated.PARAM_CWES: "101,"}, HTTP_ACCEPT=self.MEDIA_TYPE)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(msgpack.unpackb(response.content, encoding='utf-8'),
+                         MisuseCaseRelated._form_err_msg_malformed_cwes("101,"))
+
+    def test_positive_request_data(self):
+        muc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_MISUSE_CASE)
+        muc_dict["misuse_case_description"] = u"Misuse Case \u00e8"
+        muos = [{SaveCustomMUO.PARAM_CWE_CODES: [101],
+                 SaveCustomMUO.PARAM_MISUSE_CASE: muc_dict,
+                 SaveCustomMUO.PARAM_USE_CASE: copy.deepcopy(SaveCustomMUO.TEMPLATE_USE_CASE)}]
+        response = self._post_msgpack(msgpack.packb({SaveCustomMUOBatch.PARAM_MUOS: muos}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertTrue(MisuseCase.objects.filter(misuse_case_description=u"Misuse Case \u00e8").exists())
+
+    # Negative test cases
+
+    def test_negative_malformed_request_data(self):
+        response = self._post_msgpack(b"\xc1")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestValuesSerializer(TestCase):
+
+    def setUp(self):
+        for code in [101, 102, 103]:
+            CWE(code=code, name=u"CWE \u00e9 #"+str(code)).save()
+        muc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_MISUSE_CASE)
+        muc_dict["misuse_case_description"] = u"Misuse Case \u00e9"
+        uc_dict = copy.deepcopy(SaveCustomMUO.TEMPLATE_USE_CASE)
+        uc_dict["osr_pattern_type"] = "event-driven"
+        uc_dict["osr"] = u"OSR \u00e9"
+        MUOContainer.create_custom_muo([101, 102], misusecase=muc_dict, usecase=uc_dict, created_by=None)
+        # Some of the fields are left to NULL
+        muc = MisuseCase(misuse_case_description="Misuse Case 2")
+        muc.save()
+        UseCase(misuse_case=muc, muo_container=MUOContainer.objects.get(), osr_pattern_type=None).save()
+
+    # Helper methods
+
+    def _assert_parity(self, serializer_class, values_serializer, queryset, fields=None):
+        if fields is None:
+            expected = serializer_class(queryset, many=True).data
+        else:
+            expected = serializer_class(queryset, many=True, fields=fields).data
+        self.assertTrue(len(expected) > 0)
+        # The output should be the same whatever the input: a queryset, model instances or values.
+        for data in [queryset.all(), list(queryset.all()), list(queryset.values())]:
+            output = values_serializer.serialize(data, fields=fields)
+            self.assertEqual(output, expected)
+            # The rendered JSON, including the order of the keys, should be the same.
+            self.assertEqual(json.dumps(output), json.dumps(expected))
+
+    # Positive test cases
+
+    def test_positive_cwe_parity(self):
+        self._assert_parity(CWESerializer, cwe_values_serializer, CWE.objects.order_by('code'))
+
+    def test_positive_misuse_case_parity(self):
+        self._assert_parity(MisuseCaseSerializer, misuse_case_values_serializer, MisuseCase.objects.order_by('id'))
+
+    def test_positive_use_case_parity(self):
+        self._assert_parity(UseCaseSerializer, use_case_values_serializer, UseCase.objects.order_by('id'))
+
+    def test_positive_projection_parity(self):
+        self._assert_parity(MisuseCaseSerializer, misuse_case_values_serializer, MisuseCase.objects.order_by('id'),
+                            fields=['misuse_case_description', 'id'])
+        self._assert_parity(UseCaseSerializer, use_case_values_serializer, UseCase.objects.order_by('id'),
+                            fields=['osr'])
+
+    def test_positive_single_query(self):
+        with self.assertNumQueries(1):
+            use_case_values_serializer.serialize(UseCase.objects.all())
+
+    def test_positive_benchmark(self):
+        stdout = StringIO()
+        call_command('benchmark_serializers', '--rows', '50', '--repeat', '1', stdout=stdout)
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(sorted(report['serializers']), ['cwe', 'misuse_case', 'use_case'])
+        for result in report['serializers'].values():
+            self.assertEqual(result['rows'], 50)
+            self.assertTrue(result['identical_output'])
+        # The synthetic rows are rolled back.
+        self.assertEqual(CWE.objects.count(), 3)
+        self.assertEqual(UseCase.objects.count(), 2)
+
+    # Negative test cases
+
+    def test_negative_unsupported_serializer(self):
+        # The nested serializers are not plain model fields.
+        with self.assertRaises(ImproperlyConfigured):
+            ValuesSerializer(CWEBundleSerializer).serialize(CWE.objects.all())
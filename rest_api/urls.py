@@ -3,9 +3,13 @@ from rest_api import views
 
 urlpatterns = [
     url(r'^cwe/text_related$', views.CWERelatedList.as_view(), name="restapi_CWETextRelated"),
+    url(r'^cwe/text_related_batch$', views.CWERelatedBatch.as_view(), name="restapi_CWETextRelatedBatch"),
     url(r'^cwe/all$', views.CWEAllList.as_view(), name="restapi_CWEAll"),
     url(r'^cwe/search_str', views.CWESearchSingleString.as_view(), name="restapi_CWESearchSingleString"),
     url(r'^misuse_case/cwe_related$', views.MisuseCaseRelated.as_view(), name="restapi_MisuseCase_CWERelated"),
     url(r'^use_case/misuse_case_related$', views.UseCaseRelated.as_view(), name="restapi_UseCase_MisuseCaseRelated"),
+    url(r'^muo/bundle$', views.MUOBundle.as_view(), name="restapi_MUOBundle"),
+    url(r'^catalogue/export$', views.CatalogueExport.as_view(), name="restapi_CatalogueExport"),
     url(r'^custom_muo/save$', views.SaveCustomMUO.as_view(), name="restapi_CustomMUO_Create"),
+    url(r'^custom_muo/save_batch$', views.SaveCustomMUOBatch.as_view(), name="restapi_CustomMUO_CreateBatch"),
 ]
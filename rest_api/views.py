@@ -1,23 +1,40 @@
 import re
 import json
+from collections import OrderedDict
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from cwe.models import CWE
 from cwe.cwe_search import CWESearchLocator
+from cwe.cwe_lookup import lookup_cwes, lookup_cwes_by_name, DJANGO_DB_INTEGER_FIELD_SAFE_UPPER_LIMIT
+from muo.models import MisuseCase
 from muo.models import MUOContainer
+from muo.models import PublishedMisuseCase
 from muo.models import UseCase
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_api.conditional import QuerysetValidators
+from rest_api.export import iter_catalogue_records, iter_ndjson
+from rest_api.pagination import InvalidCursor, paginate_by_cursor
+from rest_api.response_cache import ResponseCache, provider_identity, stemmed_token_set
 from rest_api.serializers import CWESerializer
+from rest_api.serializers import CWEBundleSerializer
 from rest_api.serializers import MisuseCaseSerializer
 from rest_api.serializers import UseCaseSerializer
+from rest_api.serializers import cwe_values_serializer
+from rest_api.serializers import misuse_case_values_serializer
+from rest_api.serializers import use_case_values_serializer
 from .settings import SUGGESTED_CWE_MAX_RETURN
+from .settings import SUGGESTED_CWE_BATCH_MAX_TEXTS
+from .settings import CATALOGUE_EXPORT_CHUNK_SIZE
+from .settings import CUSTOM_MUO_BATCH_MAX_ITEMS
 
 
 # Constants
 FIELD_LENGTH_CWE_NAME = 128
-DJANGO_DB_INTEGER_FIELD_SAFE_UPPER_LIMIT = 2147483647
 
 
 class CWEAllList(APIView):
@@ -31,6 +48,7 @@ class CWEAllList(APIView):
     PARAM_LIMIT = "limit"
     PARAM_CODE = "code"
     PARAM_NAME_CONTAINS = "name_contains"
+    PARAM_CURSOR = "cursor"
 
     DEFAULT_OFFSET = "0"  # The default value of offset in GET method
     DEFAULT_LIMIT = "10"   # The default value of limit in GET method
@@ -38,6 +56,7 @@ class CWEAllList(APIView):
 
     RESPONSE_KEY_CWE_OBJECTS = "cwe_objects"
     RESPONSE_KEY_TOTAL_COUNT = "total_count"
+    RESPONSE_KEY_NEXT_CURSOR = "next_cursor"
 
     @staticmethod
     def _validate_parameter(value):
@@ -68,6 +87,12 @@ class CWEAllList(APIView):
                 str(FIELD_LENGTH_CWE_NAME) + " characters, but now '" +
                 param_name + "' has " + str(len(param_value)) + " characters.")
 
+    @staticmethod
+    def _form_err_msg_invalid_cursor(param_name, param_value):
+        return ("Invalid argument: '" + param_name +
+                "' should be a cursor returned as 'next_cursor', but now '" + param_name +
+                "' = '" + param_value + "'")
+
     def get(self, request):
         """
         @brief: Return the CWE objects in the database.
@@ -97,6 +122,13 @@ class CWEAllList(APIView):
                 err_msg = self._form_err_msg_not_positive_integer(self.PARAM_LIMIT, limit_str)
                 return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
 
+        # Get the value of 'cursor'. When it is present, even empty for the first page, the CWE objects
+        # are paged through with the cursor instead of the offset, so they should not appear together.
+        cursor = request.GET.get(self.PARAM_CURSOR)
+        if (cursor is not None) and (request.GET.get(self.PARAM_OFFSET) is not None):
+            err_msg = self._form_err_msg_both_present(self.PARAM_OFFSET, self.PARAM_CURSOR)
+            return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
+
         # Get the values of 'code' and 'name_contains'.
         # When neither of them appears, that means no restriction will be applied to the search.
         # When either of them appears, that means one parameter will be applied to the search.
@@ -138,28 +170,49 @@ class CWEAllList(APIView):
         if cwe_code is not None:
             cwe_objects = cwe_objects.filter(code=cwe_code)
         elif name_contains_str is not None:
-            cwe_objects = cwe_objects.filter(name__icontains=name_contains_str)
+            cwe_objects = lookup_cwes_by_name(name_contains_str, cwe_objects)
 
         # Now we have all the CWE objects that meet the search criteria.
-        # Count how many CWE objects there are totally before applying the offset and limit.
-        # This total count is helpful for pagination.
-        cwe_objects_total_count = cwe_objects.count()
-
-        if offset < cwe_objects.count():
-            cwe_returned = cwe_objects[offset:offset+limit]
+        if cursor is not None:
+            # Page through the CWE objects ordered by their code, starting after the cursor. Each page
+            # costs the same whatever its depth. The total count is only computed for the first page
+            # and the cursors carry it to the next ones.
+            try:
+                cwe_returned, next_cursor, cwe_objects_total_count = paginate_by_cursor(cwe_objects, cursor, limit)
+            except InvalidCursor:
+                err_msg = self._form_err_msg_invalid_cursor(self.PARAM_CURSOR, cursor)
+                return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
         else:
-            # If offset is too large and exceeds the size of CWE objects, we return an empty list.
-            cwe_returned = list()
-        
-        serializer = CWESerializer(cwe_returned, many=True)
-        
+            # Count the CWE objects before applying the offset and limit. This total count is helpful
+            # for pagination.
+            cwe_objects_total_count = cwe_objects.count()
+
+            if offset < cwe_objects_total_count:
+                # The pages are ordered by code, unless the name search has ranked the CWE objects.
+                if not cwe_objects.ordered:
+                    cwe_objects = cwe_objects.order_by('code', 'id')
+                cwe_returned = cwe_objects[offset:offset+limit]
+            else:
+                # If offset is too large and exceeds the size of CWE objects, we return an empty list.
+                cwe_returned = CWE.objects.none()
+
+        # If the client already has the current version of the page, we don't need to return it again.
+        # The validators only read the IDs and the modification times of the CWE objects of the page,
+        # which the page of a cursor has already read.
+        validators = QuerysetValidators(request, [cwe_returned], [cwe_objects_total_count])
+        if validators.match(request):
+            return validators.not_modified_response()
+
         # Return both the CWE objects and the total count.
         returned_data = {
-            self.RESPONSE_KEY_CWE_OBJECTS: serializer.data,
+            self.RESPONSE_KEY_CWE_OBJECTS: cwe_values_serializer.serialize(cwe_returned),
             self.RESPONSE_KEY_TOTAL_COUNT: cwe_objects_total_count
         }
+        if cursor is not None:
+            # Also return the cursor of the next page, which is None after the last page.
+            returned_data[self.RESPONSE_KEY_NEXT_CURSOR] = next_cursor
 
-        return Response(data=returned_data)
+        return validators.set_headers(Response(data=returned_data))
 
 
 class CWESearchSingleString(APIView):
@@ -170,6 +223,7 @@ class CWESearchSingleString(APIView):
     PARAM_OFFSET = "offset"
     PARAM_LIMIT = "limit"
     PARAM_SEARCH_STR = "search_str"
+    PARAM_CURSOR = "cursor"
 
     DEFAULT_OFFSET = "0"  # The default value of offset in GET method
     DEFAULT_LIMIT = "10"   # The default value of limit in GET method
@@ -177,6 +231,10 @@ class CWESearchSingleString(APIView):
 
     RESPONSE_KEY_CWE_OBJECTS = "cwe_objects"
     RESPONSE_KEY_TOTAL_COUNT = "total_count"
+    RESPONSE_KEY_NEXT_CURSOR = "next_cursor"
+
+    # The cache of the responses
+    response_cache = ResponseCache('search_str')
 
     @staticmethod
     def _form_err_msg_not_positive_integer(param_name, param_value):
@@ -184,6 +242,18 @@ class CWESearchSingleString(APIView):
                 "' should be a positive integer like '101', but now '" + param_name +
                 "' = '" + param_value + "'")
 
+    @staticmethod
+    def _form_err_msg_both_present(param_name1, param_name2):
+        return ("Invalid arguments: '" + param_name1 +
+                "' and '" + param_name2 + "' should not be present at the same time."
+                )
+
+    @staticmethod
+    def _form_err_msg_invalid_cursor(param_name, param_value):
+        return ("Invalid argument: '" + param_name +
+                "' should be a cursor returned as 'next_cursor', but now '" + param_name +
+                "' = '" + param_value + "'")
+
     def get(self, request):
         """
         @brief: Return the CWE objects in the database.
@@ -213,6 +283,13 @@ class CWESearchSingleString(APIView):
                 err_msg = self._form_err_msg_not_positive_integer(self.PARAM_LIMIT, limit_str)
                 return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
 
+        # Get the value of 'cursor'. When it is present, even empty for the first page, the CWE objects
+        # are paged through with the cursor instead of the offset, so they should not appear together.
+        cursor = request.GET.get(self.PARAM_CURSOR)
+        if (cursor is not None) and (request.GET.get(self.PARAM_OFFSET) is not None):
+            err_msg = self._form_err_msg_both_present(self.PARAM_OFFSET, self.PARAM_CURSOR)
+            return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
+
         # 'offset' and 'limit' should be integers so we convert the offset_str and limit_str.
         offset = int(offset_str)
         limit = int(limit_str)
@@ -223,35 +300,52 @@ class CWESearchSingleString(APIView):
         # we can only treat it as an arbitrary string.
         search_str = request.GET.get(self.PARAM_SEARCH_STR)
 
+        # The search is case-insensitive, so the same search string in another case gets the same
+        # response from the cache.
+        cache_key = self.response_cache.make_key(self.response_cache.version(),
+                                                 search_str.lower() if search_str is not None else None,
+                                                 offset, limit, cursor)
+        returned_data = self.response_cache.get(cache_key)
+        if returned_data is not None:
+            return Response(data=returned_data)
+
         # Now the arguments should be valid.
-        cwe_objects = CWE.objects.all()
-        # Filter the CWE objects according to search_str. We search this string in code and name.
-        if search_str is not None:
-            if search_str.isdigit():
-                # If search_str is in the form of an integer, then we search in 'code' or 'name'.
-                cwe_objects = cwe_objects.filter(Q(code=search_str) | Q(name__icontains=search_str))
-            else:
-                # Otherwise, we only search in 'name'.
-                cwe_objects = cwe_objects.filter(name__icontains=search_str)
+        # Filter the CWE objects according to search_str. We search this string in code and name:
+        # if search_str is in the form of an integer, then we search in 'code' or 'name', otherwise
+        # we only search in 'name'.
+        cwe_objects = lookup_cwes(search_str)
 
         # Now we have all the CWE objects that meet the search criteria.
-        # Count how many CWE objects there are totally before applying the offset and limit.
-        # This total count is helpful for pagination.
-        cwe_objects_total_count = cwe_objects.count()
-
-        if offset < cwe_objects.count():
-            cwe_returned = cwe_objects[offset:offset+limit]
+        if cursor is not None:
+            # Page through the CWE objects ordered by their code, starting after the cursor. Each page
+            # costs the same whatever its depth. The total count is only computed for the first page
+            # and the cursors carry it to the next ones.
+            try:
+                cwe_returned, next_cursor, cwe_objects_total_count = paginate_by_cursor(cwe_objects, cursor, limit)
+            except InvalidCursor:
+                err_msg = self._form_err_msg_invalid_cursor(self.PARAM_CURSOR, cursor)
+                return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
         else:
-            # If offset is too large and exceeds the size of CWE objects, we return an empty list.
-            cwe_returned = list()
+            # Count how many CWE objects there are totally before applying the offset and limit.
+            # This total count is helpful for pagination.
+            cwe_objects_total_count = cwe_objects.count()
 
-        serializer = CWESerializer(cwe_returned, many=True)
+            if offset < cwe_objects_total_count:
+                cwe_returned = cwe_objects[offset:offset+limit]
+            else:
+                # If offset is too large and exceeds the size of CWE objects, we return an empty list.
+                cwe_returned = list()
 
         # Return both the CWE objects and the total count.
         returned_data = {
-            self.RESPONSE_KEY_CWE_OBJECTS: serializer.data,
+            self.RESPONSE_KEY_CWE_OBJECTS: cwe_values_serializer.serialize(cwe_returned),
             self.RESPONSE_KEY_TOTAL_COUNT: cwe_objects_total_count
         }
+        if cursor is not None:
+            # Also return the cursor of the next page, which is None after the last page.
+            returned_data[self.RESPONSE_KEY_NEXT_CURSOR] = next_cursor
+
+        self.response_cache.set(cache_key, returned_data)
 
         return Response(data=returned_data)
 
@@ -267,6 +361,9 @@ class CWERelatedList(APIView):
     # without having to modify the settings.py manually.
     CWE_MAX_RETURN = SUGGESTED_CWE_MAX_RETURN
 
+    # The cache of the responses
+    response_cache = ResponseCache('text_related')
+
     def get(self, request):
         """
         @brief: Return the CWE objects that are suggested given the text.
@@ -276,21 +373,138 @@ class CWERelatedList(APIView):
 
         text = request.GET.get(self.PARAM_TEXT)
 
+        # The texts with the same stemmed token set get the same suggestions from the same algorithm.
+        cwe_search = CWESearchLocator.get_instance()
+        cache_key = self.response_cache.make_key(self.response_cache.version(), provider_identity(cwe_search),
+                                                 self.CWE_MAX_RETURN, stemmed_token_set(cwe_search, text))
+        cached_data = self.response_cache.get(cache_key)
+        if cached_data is not None:
+            return Response(data=cached_data)
+
         # Get the suggested CWEs.
-        cwe_count_tuples = CWESearchLocator.get_instance().search_cwes(text)
-        cwe_list = [cwe_count_tuple[0] for cwe_count_tuple in cwe_count_tuples][0:self.CWE_MAX_RETURN]
+        cwe_count_tuples = cwe_search.search_cwes(text, max_results=self.CWE_MAX_RETURN)
+        cwe_list = [cwe_count_tuple[0] for cwe_count_tuple in cwe_count_tuples]
 
-        serializer = CWESerializer(cwe_list, many=True)
+        cwe_data_list = cwe_values_serializer.serialize(cwe_list)
+        self.response_cache.set(cache_key, cwe_data_list)
 
-        return Response(data=serializer.data)
+        return Response(data=cwe_data_list)
+
+
+class CWERelatedBatch(APIView):
+    """
+    @brief: List the CWEs that are related to each of the given texts.
+    """
+
+    PARAM_TEXTS = "texts"
+
+    RESPONSE_KEY_CWE_OBJECTS = "cwe_objects"
+    RESPONSE_KEY_RESULTS = "results"
+
+    # This allows the unit test to modify the limits dynamically
+    # without having to modify the settings.py manually.
+    CWE_MAX_RETURN = SUGGESTED_CWE_MAX_RETURN
+    MAX_TEXTS = SUGGESTED_CWE_BATCH_MAX_TEXTS
+
+    # The cache of the suggestions of each text
+    response_cache = ResponseCache('text_related_batch')
+
+    @staticmethod
+    def _form_err_msg_malformed_texts():
+        return ("Text list is malformed: '" + CWERelatedBatch.PARAM_TEXTS + "' " +
+                "should be a JSON string of a list of strings.")
+
+    @staticmethod
+    def _form_err_msg_too_many_texts(text_count):
+        return ("Too many texts: at most " + str(CWERelatedBatch.MAX_TEXTS) +
+                " texts can be sent at a time, but now " + str(text_count) + " texts are sent.")
+
+    @staticmethod
+    def _form_err_msg_method_not_allowed():
+        return "Use POST method for this REST API function."
+
+    def get(self, request):
+        # The texts can be too long for a URL, so they must be sent with the POST method.
+        return Response(data=self._form_err_msg_method_not_allowed(), status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def post(self, request):
+        """
+        @brief: Return the CWE objects that are suggested for each of the given texts. Every CWE object
+                is returned only once, and the result of each text is the list of the suggested CWE codes.
+        @param: [in] request: The HTTP request.
+        @return: rest_framework.response.Response
+        """
+
+        # The texts are either a JSON string of a list (form data) or a list (JSON data).
+        texts = request.data.get(self.PARAM_TEXTS) if isinstance(request.data, dict) else None
+        try:
+            if isinstance(texts, basestring):
+                texts = json.loads(texts)
+            if not isinstance(texts, list) or not all(isinstance(text, basestring) for text in texts):
+                raise ValueError
+        except ValueError:
+            return Response(data=self._form_err_msg_malformed_texts(), status=status.HTTP_400_BAD_REQUEST)
+
+        if len(texts) > self.MAX_TEXTS:
+            err_msg = self._form_err_msg_too_many_texts(len(texts))
+            return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
+
+        # The suggestions of each text are cached separately, so that the texts already sent in another
+        # batch are not searched again. The texts with the same stemmed token set are searched only once.
+        cwe_search = CWESearchLocator.get_instance()
+        version = self.response_cache.version()
+        cache_keys = [self.response_cache.make_key(version, provider_identity(cwe_search), self.CWE_MAX_RETURN,
+                                                   stemmed_token_set(cwe_search, text))
+                      for text in texts]
+        cwe_data_lists = self.response_cache.get_many(list(set(cache_keys)))
+
+        missing_texts = OrderedDict()
+        for cache_key, text in zip(cache_keys, texts):
+            if cache_key not in cwe_data_lists:
+                missing_texts.setdefault(cache_key, text)
+
+        if missing_texts:
+            # Get the suggested CWEs of all the missing texts in a single pass.
+            cwe_count_tuple_lists = cwe_search.search_cwes_many(missing_texts.values(),
+                                                                max_results=self.CWE_MAX_RETURN)
+            missing_data_lists = dict(
+                (cache_key, cwe_values_serializer.serialize([cwe for cwe, count in cwe_count_tuples]))
+                for cache_key, cwe_count_tuples in zip(missing_texts, cwe_count_tuple_lists))
+            self.response_cache.set_many(missing_data_lists)
+            cwe_data_lists.update(missing_data_lists)
+
+        cwe_data_lists = [cwe_data_lists[cache_key] for cache_key in cache_keys]
+
+        # Return every suggested CWE only once, in the order in which they are first suggested.
+        cwe_data_dict = OrderedDict()
+        for cwe_data_list in cwe_data_lists:
+            for cwe_data in cwe_data_list:
+                cwe_data_dict.setdefault(cwe_data['id'], cwe_data)
+
+        returned_data = {
+            self.RESPONSE_KEY_CWE_OBJECTS: cwe_data_dict.values(),
+            self.RESPONSE_KEY_RESULTS: [[cwe_data['code'] for cwe_data in cwe_data_list]
+                                        for cwe_data_list in cwe_data_lists],
+        }
+
+        return Response(data=returned_data)
 
 
 class MisuseCaseRelated(APIView):
     """
-    @brief: List the misuse cases that are related to the specified CWEs.
+    @brief: List the misuse cases that are related to the specified CWEs. With "group_by=cwe", the
+        misuse cases are returned once along with the IDs of the misuse cases of each CWE. With
+        "fields=id,name", only the given fields of the misuse cases are returned.
     """
 
     PARAM_CWES = "cwes"
+    PARAM_GROUP_BY = "group_by"
+    PARAM_FIELDS = "fields"
+
+    GROUP_BY_CWE = "cwe"
+
+    RESPONSE_KEY_MISUSE_CASES = "misuse_cases"
+    RESPONSE_KEY_CWE_MISUSE_CASES = "cwe_misuse_cases"
 
     @staticmethod
     def _validate_parameter(cwes_str):
@@ -326,6 +540,21 @@ class MisuseCaseRelated(APIView):
                 ("".join(str(cwe_code)+',' for cwe_code in too_large_cwe_codes)).rstrip(',')
                 )
 
+    @staticmethod
+    def _form_err_msg_invalid_group_by(group_by_str):
+        return ("Invalid argument: '" + MisuseCaseRelated.PARAM_GROUP_BY + "' can only be '" +
+                MisuseCaseRelated.GROUP_BY_CWE + "', but now '" + MisuseCaseRelated.PARAM_GROUP_BY +
+                "' = '" + group_by_str + "'")
+
+    @staticmethod
+    def _get_fields(fields_str):
+        return [field_name.strip() for field_name in fields_str.split(',')]
+
+    @staticmethod
+    def _form_err_msg_invalid_fields(invalid_fields, serializer_class):
+        return ("The following fields are invalid: " + ",".join(invalid_fields) + ". " +
+                "The fields can be: " + ",".join(serializer_class.Meta.fields) + ".")
+
     @staticmethod
     def _form_err_msg_cwes_not_found(cwe_codes_not_found):
         err_msg = ("The CWE of the following codes are not found: " +
@@ -356,42 +585,86 @@ class MisuseCaseRelated(APIView):
             err_msg = self._form_err_msg_too_large_cwe_code(too_large_cwe_codes)
             return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
 
-        # Get the current user.
-        curr_user = request.user
+        # Get the "group_by" parameter value and validate it.
+        group_by_str = request.GET.get(self.PARAM_GROUP_BY)
+        if group_by_str is not None and group_by_str != self.GROUP_BY_CWE:
+            err_msg = self._form_err_msg_invalid_group_by(group_by_str)
+            return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
 
-        # Create the set of returned unique misuse case.
-        misuse_case_set = set()
+        # Get the "fields" parameter value and validate it. Without it, all the fields are returned.
+        fields = None
+        fields_str = request.GET.get(self.PARAM_FIELDS)
+        if fields_str is not None:
+            fields = self._get_fields(fields_str)
+            invalid_fields = MisuseCaseSerializer.get_invalid_fields(fields)
+            if len(invalid_fields) > 0:
+                err_msg = self._form_err_msg_invalid_fields(invalid_fields, MisuseCaseSerializer)
+                return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
 
-        # Try to get all the CWE objects.
-        cwes = CWE.objects.filter(code__in=cwe_code_set)
+        # Get the current user.
+        curr_user = request.user
 
         # If there is any CWE not found, then we return an error.
-        cwe_codes_fetched = set([str(cwe.code) for cwe in cwes])
+        cwe_codes_fetched = set(str(code) for code in CWE.objects.filter(code__in=cwe_code_set)
+                                                                .values_list('code', flat=True))
         cwe_codes_not_found = cwe_code_set - cwe_codes_fetched
 
         if len(cwe_codes_not_found) > 0:
             err_msg = self._form_err_msg_cwes_not_found(cwe_codes_not_found)
             return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
 
-        # Find the misuse cases that are related to the CWEs.
-        for cwe in cwes:
-            # First, find all the MUO containers associated with the CWEs.
-            cwe_misuse_cases_generic = cwe.misuse_cases.approved()
-            cwe_misuse_cases_custom = cwe.misuse_cases.filter(created_by=curr_user).custom().draft()
-            # Join the two sets
-            misuse_case_set |= set(cwe_misuse_cases_generic | cwe_misuse_cases_custom)
+        # Find the misuse cases that are related to the CWEs: the generic ones, which are approved and read
+        # from the published catalogue, and the custom ones of the current user, which are still drafts.
+        # All of them are found with a single query.
+        misuse_cases = MisuseCase.objects.filter(
+            Q(id__in=PublishedMisuseCase.objects.filter(cwe_code__in=cwe_code_set).values('misuse_case_id')) |
+            Q(created_by=curr_user, muocontainer__is_custom=True, muocontainer__status='draft',
+              cwes__code__in=cwe_code_set)).distinct()
+
+        # If the client already has the current version of the response, we don't need to return it again.
+        # When grouping by CWE, the CWEs of the misuse cases are part of the response too.
+        validated_querysets = [misuse_cases]
+        if group_by_str is not None:
+            validated_querysets.append(misuse_cases.order_by('id', 'cwes__code').values_list('id', 'cwes__code'))
+        validators = QuerysetValidators(request, validated_querysets)
+        if validators.match(request):
+            return validators.not_modified_response()
+
+        if group_by_str is None:
+            # Only the projected fields are read from the database.
+            misuse_case_data = misuse_case_values_serializer.serialize(misuse_cases.order_by('id'), fields=fields)
+            return validators.set_headers(Response(data=misuse_case_data, exception=Exception()))
+
+        # When grouping by CWE, the misuse cases are read along with the code of each of their requested
+        # CWEs, still with a single query. Every misuse case is returned only once, and the IDs of the
+        # misuse cases of each CWE are returned separately. The IDs are always read to group the misuse cases.
+        value_fields = (MisuseCaseSerializer.Meta.fields if fields is None else
+                        ['id'] + [field_name for field_name in fields if field_name != 'id'])
+        misuse_case_dict = OrderedDict()
+        cwe_misuse_cases = dict((code, []) for code in cwe_code_set)
+        for values in misuse_cases.order_by('id').values(*(tuple(value_fields) + ('cwes__code',))):
+            cwe_code = str(values.pop('cwes__code'))
+            misuse_case_dict.setdefault(values['id'], values)
+            if cwe_code in cwe_misuse_cases and values['id'] not in cwe_misuse_cases[cwe_code]:
+                cwe_misuse_cases[cwe_code].append(values['id'])
 
-        serializer = MisuseCaseSerializer(misuse_case_set, many=True)
+        returned_data = {
+            self.RESPONSE_KEY_MISUSE_CASES: misuse_case_values_serializer.serialize(misuse_case_dict.values(),
+                                                                                    fields=fields),
+            self.RESPONSE_KEY_CWE_MISUSE_CASES: cwe_misuse_cases,
+        }
 
-        return Response(data=serializer.data, exception=Exception())
+        return validators.set_headers(Response(data=returned_data))
 
 
 class UseCaseRelated(APIView):
     """
-    @brief: List the misuse cases that are related to the specified CWEs.
+    @brief: List the use cases that are related to the specified misuse cases. With "fields=id,name",
+        only the given fields of the use cases are returned.
     """
 
     PARAM_MISUSE_CASES = "misuse_cases"
+    PARAM_FIELDS = "fields"
 
     @staticmethod
     def _validate_parameter(misuse_cases_str):
@@ -453,6 +726,16 @@ class UseCaseRelated(APIView):
             err_msg = self._form_err_msg_too_large_misuse_case_ids(too_large_muc_ids)
             return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
 
+        # Get the "fields" parameter value and validate it. Without it, all the fields are returned.
+        fields = None
+        fields_str = request.GET.get(self.PARAM_FIELDS)
+        if fields_str is not None:
+            fields = MisuseCaseRelated._get_fields(fields_str)
+            invalid_fields = UseCaseSerializer.get_invalid_fields(fields)
+            if len(invalid_fields) > 0:
+                err_msg = MisuseCaseRelated._form_err_msg_invalid_fields(invalid_fields, UseCaseSerializer)
+                return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
+
         # Get all the use cases that refer to these misuse cases.
         use_cases_related = UseCase.objects.filter(misuse_case_id__in=misuse_case_id_set)
         use_cases_generic = use_cases_related.approved()
@@ -461,10 +744,147 @@ class UseCaseRelated(APIView):
         # Get all the use cases to be returned.
         use_cases = use_cases_generic | use_cases_custom
 
-        # Remove the duplicated use cases, if there are any.
-        serializer = UseCaseSerializer(use_cases, many=True)
+        # If the client already has the current version of the response, we don't need to return it again.
+        validators = QuerysetValidators(request, [use_cases])
+        if validators.match(request):
+            return validators.not_modified_response()
 
-        return Response(data=serializer.data, exception=Exception())
+        # Only the projected fields are read from the database.
+        use_case_data = use_case_values_serializer.serialize(use_cases, fields=fields)
+
+        return validators.set_headers(Response(data=use_case_data, exception=Exception()))
+
+
+class MUOBundle(APIView):
+    """
+    @brief: List the CWEs that are specified or related to the given text, along with their misuse cases,
+        the use cases of these misuse cases and their overlooked security requirements, in a single call.
+    """
+
+    PARAM_CWES = "cwes"
+    PARAM_TEXT = "text"
+
+    # This allows the unit test to modify the max return dynamically
+    # without having to modify the settings.py manually.
+    CWE_MAX_RETURN = SUGGESTED_CWE_MAX_RETURN
+
+    @staticmethod
+    def _form_err_msg_exactly_one_present():
+        return ("Invalid arguments: exactly one of '" + MUOBundle.PARAM_CWES +
+                "' and '" + MUOBundle.PARAM_TEXT + "' should be present.")
+
+    @staticmethod
+    def _prefetch_misuse_cases(user):
+        """
+        @brief: Form the prefetch of the misuse cases of the CWEs which the user can see, and of their use
+            cases: the generic ones, which are approved, and the custom ones of the user, which are still
+            drafts. The whole tree is read with one query per level, whatever the number of objects.
+        @param: [in] user: The current user.
+        @return: django.db.models.Prefetch
+        """
+        use_cases = UseCase.objects.filter(
+            Q(published_entry__isnull=False) |
+            Q(created_by=user, muo_container__is_custom=True, muo_container__status='draft')).order_by('id')
+        misuse_cases = MisuseCase.objects.filter(
+            Q(id__in=PublishedMisuseCase.objects.values('misuse_case_id')) |
+            Q(created_by=user, muocontainer__is_custom=True, muocontainer__status='draft')).distinct()
+        misuse_cases = misuse_cases.order_by('id').prefetch_related(
+            Prefetch('usecase_set', queryset=use_cases, to_attr='bundle_use_cases'))
+        return Prefetch('misuse_cases', queryset=misuse_cases, to_attr='bundle_misuse_cases')
+
+    def get(self, request):
+        """
+        @brief: Return the CWE objects with their misuse cases and use cases. The CWEs are either given
+                by their codes, in the same format as for the related misuse cases, or suggested given a
+                text, in the same way as for the related CWEs.
+        @param: [in] request: The HTTP request.
+        @return: rest_framework.response.Response
+        """
+
+        cwes_str = request.GET.get(self.PARAM_CWES)
+        text = request.GET.get(self.PARAM_TEXT)
+        if (cwes_str is None) == (text is None):
+            return Response(data=self._form_err_msg_exactly_one_present(), status=status.HTTP_400_BAD_REQUEST)
+
+        prefetch = self._prefetch_misuse_cases(request.user)
+
+        if cwes_str is not None:
+            # Validate the CWE codes in the same way as for the related misuse cases.
+            if MisuseCaseRelated._validate_parameter(cwes_str=cwes_str) is False:
+                err_msg = MisuseCaseRelated._form_err_msg_malformed_cwes(cwes_str)
+                return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
+
+            cwe_code_set = MisuseCaseRelated._get_distinct_cwe_codes(cwes_str=cwes_str)
+
+            too_large_cwe_codes = MisuseCaseRelated._validate_cwe_code_range(cwe_code_set)
+            if len(too_large_cwe_codes) > 0:
+                err_msg = MisuseCaseRelated._form_err_msg_too_large_cwe_code(too_large_cwe_codes)
+                return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
+
+            cwes = list(CWE.objects.filter(code__in=cwe_code_set).order_by('code').prefetch_related(prefetch))
+
+            # If there is any CWE not found, then we return an error.
+            cwe_codes_not_found = cwe_code_set - set(str(cwe.code) for cwe in cwes)
+            if len(cwe_codes_not_found) > 0:
+                err_msg = MisuseCaseRelated._form_err_msg_cwes_not_found(cwe_codes_not_found)
+                return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            # Get the suggested CWEs, and then read them again along with their misuse cases and use cases,
+            # in the order in which they are suggested.
+            cwe_count_tuples = CWESearchLocator.get_instance().search_cwes(text, max_results=self.CWE_MAX_RETURN)
+            cwe_ids = [cwe.id for cwe, count in cwe_count_tuples]
+            cwe_dict = CWE.objects.prefetch_related(prefetch).in_bulk(cwe_ids)
+            cwes = [cwe_dict[cwe_id] for cwe_id in cwe_ids if cwe_id in cwe_dict]
+
+        serializer = CWEBundleSerializer(cwes, many=True)
+
+        return Response(data=serializer.data)
+
+
+class CatalogueExport(APIView):
+    """
+    @brief: Export the approved catalogue of CWEs, misuse cases and use cases as newline-delimited JSON.
+    """
+
+    PARAM_MODIFIED_SINCE = "modified_since"
+
+    CONTENT_TYPE = "application/x-ndjson"
+
+    # This allows the unit test to modify the chunk size dynamically
+    # without having to modify the settings.py manually.
+    CHUNK_SIZE = CATALOGUE_EXPORT_CHUNK_SIZE
+
+    @staticmethod
+    def _form_err_msg_invalid_timestamp(param_name, param_value):
+        return ("Invalid argument: '" + param_name +
+                "' should be an ISO 8601 timestamp like '2015-07-01T00:00:00Z', but now '" + param_name +
+                "' = '" + param_value + "'")
+
+    def get(self, request):
+        """
+        @brief: Stream the records of the approved catalogue, one JSON object per line. The records
+                are read from the database in chunks while they are sent, so the memory used does not
+                depend on the size of the catalogue.
+        @param: [in] request: The HTTP request.
+        @return: django.http.StreamingHttpResponse
+        """
+
+        # Get the value of 'modified_since' and validate it.
+        modified_since_str = request.GET.get(self.PARAM_MODIFIED_SINCE)
+        modified_since = None
+        if modified_since_str is not None:
+            try:
+                modified_since = parse_datetime(modified_since_str)
+            except ValueError:
+                modified_since = None
+            if modified_since is None:
+                err_msg = self._form_err_msg_invalid_timestamp(self.PARAM_MODIFIED_SINCE, modified_since_str)
+                return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(modified_since):
+                modified_since = timezone.make_aware(modified_since, timezone.utc)
+
+        records = iter_catalogue_records(modified_since=modified_since, chunk_size=self.CHUNK_SIZE)
+        return StreamingHttpResponse(iter_ndjson(records), content_type=self.CONTENT_TYPE)
 
 
 class SaveCustomMUO(APIView):
@@ -652,3 +1072,121 @@ class SaveCustomMUO(APIView):
             return Response(data=e.message, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(status=status.HTTP_200_OK)
+
+
+class SaveCustomMUOBatch(APIView):
+    """
+    @brief: Save many custom MUOs at once. Every MUO is validated before any of them is saved, and
+        they are either all saved in a single transaction or none of them is.
+    """
+
+    PARAM_MUOS = "muos"
+
+    RESPONSE_KEY_ERRORS = "errors"
+    RESPONSE_KEY_MUO_CONTAINERS = "muo_containers"
+
+    # This allows the unit test to modify the limit dynamically
+    # without having to modify the settings.py manually.
+    MAX_ITEMS = CUSTOM_MUO_BATCH_MAX_ITEMS
+
+    @staticmethod
+    def _form_err_msg_malformed_muos():
+        return ("MUO list is malformed: '" + SaveCustomMUOBatch.PARAM_MUOS + "' " +
+                "should be a JSON string of a list of dictionaries.")
+
+    @staticmethod
+    def _form_err_msg_too_many_muos(muo_count):
+        return ("Too many MUOs: at most " + str(SaveCustomMUOBatch.MAX_ITEMS) +
+                " MUOs can be sent at a time, but now " + str(muo_count) + " MUOs are sent.")
+
+    @staticmethod
+    def _validate_cwe_codes(cwe_codes):
+        return (isinstance(cwe_codes, list) and
+                all(isinstance(code, (int, long)) and not isinstance(code, bool) and
+                    0 <= code <= DJANGO_DB_INTEGER_FIELD_SAFE_UPPER_LIMIT for code in cwe_codes))
+
+    def _validate_muo(self, muo):
+        """
+        @brief: Validate a custom MUO in the same way as SaveCustomMUO, except that its sections are JSON
+                values instead of JSON strings.
+        @param: [in] muo: The custom MUO.
+        @return: The error message, or None if the MUO is valid.
+        """
+        if not isinstance(muo, dict):
+            return self._form_err_msg_malformed_muos()
+
+        sections_missing = SaveCustomMUO._check_all_sections_present(muo)
+        if len(sections_missing) > 0:
+            return SaveCustomMUO._form_err_msg_section_missing(sections_missing)
+
+        if not self._validate_cwe_codes(muo[SaveCustomMUO.PARAM_CWE_CODES]):
+            return SaveCustomMUO._form_err_msg_invalid_cwe_codes(json.dumps(muo[SaveCustomMUO.PARAM_CWE_CODES]))
+
+        for param, object_name, template in ((SaveCustomMUO.PARAM_MISUSE_CASE, "misuse case",
+                                              SaveCustomMUO.TEMPLATE_MISUSE_CASE),
+                                             (SaveCustomMUO.PARAM_USE_CASE, "use case",
+                                              SaveCustomMUO.TEMPLATE_USE_CASE)):
+            if SaveCustomMUO._validate_object_format_dict(muo[param]) is False:
+                return SaveCustomMUO._form_err_msg_wrong_format(object_name)
+            fields_missing = SaveCustomMUO._validate_object_fields(template, muo[param])
+            if len(fields_missing) > 0:
+                return SaveCustomMUO._form_err_msg_fields_missing(object_name, fields_missing)
+
+        return None
+
+    def get(self, request):
+        # The MUOs can be too long for a URL, so they must be sent with the POST method.
+        return Response(data=SaveCustomMUO._form_err_msg_method_not_allowed(),
+                        status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def post(self, request):
+        """
+        @brief: Save the custom MUOs. If any of them is invalid, nothing is saved and the error of every
+                invalid MUO is returned along with its index in the list.
+        @param: [in] request: The HTTP request.
+        @return: rest_framework.response.Response
+        """
+
+        # The MUOs are either a JSON string of a list (form data) or a list (JSON data).
+        muos = request.data.get(self.PARAM_MUOS) if isinstance(request.data, dict) else None
+        try:
+            if isinstance(muos, basestring):
+                muos = json.loads(muos)
+            if not isinstance(muos, list):
+                raise ValueError
+        except ValueError:
+            return Response(data=self._form_err_msg_malformed_muos(), status=status.HTTP_400_BAD_REQUEST)
+
+        if len(muos) > self.MAX_ITEMS:
+            err_msg = self._form_err_msg_too_many_muos(len(muos))
+            return Response(data=err_msg, status=status.HTTP_400_BAD_REQUEST)
+
+        # Validate every MUO before saving any of them.
+        err_msgs = [self._validate_muo(muo) for muo in muos]
+
+        # Check that the CWEs of all the valid MUOs exist, with a single query.
+        cwe_codes = set(code for muo, err_msg in zip(muos, err_msgs) if err_msg is None
+                        for code in muo[SaveCustomMUO.PARAM_CWE_CODES])
+        cwe_codes_not_found = cwe_codes - set(CWE.objects.filter(code__in=cwe_codes).values_list('code', flat=True))
+
+        # Report the error of every invalid MUO, along with its index in the list.
+        errors = OrderedDict()
+        for index, (muo, err_msg) in enumerate(zip(muos, err_msgs)):
+            if err_msg is None:
+                muo_cwe_codes_not_found = cwe_codes_not_found.intersection(muo[SaveCustomMUO.PARAM_CWE_CODES])
+                if muo_cwe_codes_not_found:
+                    err_msg = MisuseCaseRelated._form_err_msg_cwes_not_found(sorted(muo_cwe_codes_not_found))
+            if err_msg is not None:
+                errors[index] = err_msg
+
+        if errors:
+            return Response(data={self.RESPONSE_KEY_ERRORS: errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Save all the custom MUOs at once.
+        muo_containers = MUOContainer.create_custom_muos(
+            [(muo[SaveCustomMUO.PARAM_CWE_CODES], muo[SaveCustomMUO.PARAM_MISUSE_CASE], muo[SaveCustomMUO.PARAM_USE_CASE])
+             for muo in muos],
+            created_by=request.user)
+
+        return Response(data={self.RESPONSE_KEY_MUO_CONTAINERS: [muo_container.name for muo_container in muo_containers]})
+